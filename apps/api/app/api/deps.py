@@ -4,10 +4,13 @@ from redis import Redis
 from rq import Queue
 
 from app.core.config import get_settings
-from app.services.cache_service import CacheService
-from app.services.job_service import JobService
-from app.services.llm_service import LLMService
+from app.services.cache_service import AsyncCacheService, CacheService
+from app.services.job_service import AsyncJobService, JobService
+from app.services.llm_service import AsyncLLMService, LLMService
+from app.services.single_flight import SingleFlight
 from app.services.storage_service import StorageService
+from app.services.topic_index import TopicIndex
+from app.workers.tasks_render import RENDER_QUEUE
 
 
 @lru_cache
@@ -17,8 +20,8 @@ def get_redis() -> Redis:
 
 
 @lru_cache
-def get_queue() -> Queue:
-    return Queue("render", connection=get_redis())
+def get_queue(name: str = RENDER_QUEUE) -> Queue:
+    return Queue(name, connection=get_redis())
 
 
 @lru_cache
@@ -39,3 +42,38 @@ def get_llm_service() -> LLMService:
 @lru_cache
 def get_cache_service() -> CacheService:
     return CacheService()
+
+
+@lru_cache
+def get_async_job_service() -> AsyncJobService:
+    return AsyncJobService(get_job_service())
+
+
+@lru_cache
+def get_async_llm_service() -> AsyncLLMService:
+    return AsyncLLMService()
+
+
+@lru_cache
+def get_async_cache_service() -> AsyncCacheService:
+    return AsyncCacheService(get_cache_service())
+
+
+@lru_cache
+def get_single_flight() -> SingleFlight:
+    settings = get_settings()
+    wait_sec = settings.llm_request_timeout_sec + 30
+    return SingleFlight(
+        redis=get_async_cache_service().redis,
+        lock_ttl_sec=wait_sec,
+        wait_timeout_sec=wait_sec,
+    )
+
+
+@lru_cache
+def get_topic_index() -> TopicIndex:
+    settings = get_settings()
+    return TopicIndex(
+        threshold=settings.generate_similarity_threshold,
+        max_entries=settings.generate_similarity_max_entries,
+    )
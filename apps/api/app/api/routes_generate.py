@@ -1,41 +1,147 @@
+import json
+from collections.abc import AsyncIterator
+
 from fastapi import APIRouter, Depends, HTTPException
 
-from app.api.deps import get_cache_service, get_llm_service
+from app.api.deps import (
+    get_async_cache_service,
+    get_async_llm_service,
+    get_single_flight,
+    get_topic_index,
+)
+from app.api.sse import format_sse, sse_response
+from app.core.config import get_settings
 from app.schemas.generate import GenerateRequest, GenerateResponse
-from app.services.cache_service import CacheService
+from app.services.cache_service import AsyncCacheService
 from app.services.code_validator import CodeValidator
-from app.services.llm_service import LLMService
+from app.services.llm_service import AsyncLLMService
+from app.services.single_flight import SingleFlight
+from app.services.topic_index import TopicIndex
 
 router = APIRouter(tags=["generate"])
 validator = CodeValidator()
 
 
+def _topic_partition(payload: GenerateRequest, llm_service: AsyncLLMService) -> str:
+    # Near-duplicate topics only share code when everything else about the request matches.
+    options = payload.model_dump_json(exclude={"topic"})
+    return f"{llm_service.provider}:{llm_service.model_name}:{options}"
+
+
+async def _finalize(
+    code: str,
+    warnings: list[str],
+    payload: GenerateRequest,
+    request_hash: str,
+    llm_service: AsyncLLMService,
+    cache_service: AsyncCacheService,
+    topic_index: TopicIndex | None,
+) -> GenerateResponse:
+    validation = validator.validate(code)
+    if not validation.ok:
+        warnings.extend(validation.errors)
+    elif not warnings:
+        await cache_service.set_generation(request_hash, code)
+        if topic_index is not None:
+            topic_index.add(_topic_partition(payload, llm_service), payload.topic, request_hash)
+
+    return GenerateResponse(code=code, model=llm_service.model_name, warnings=warnings)
+
+
+async def _stream_generation(
+    payload: GenerateRequest,
+    request_hash: str,
+    llm_service: AsyncLLMService,
+    cache_service: AsyncCacheService,
+    topic_index: TopicIndex | None,
+) -> AsyncIterator[str]:
+    async for event in llm_service.stream_code(payload):
+        if event.code is None:
+            yield format_sse("token", json.dumps({"text": event.delta}))
+            continue
+        response = await _finalize(
+            event.code,
+            event.warnings,
+            payload,
+            request_hash,
+            llm_service,
+            cache_service,
+            topic_index,
+        )
+        yield format_sse("done", response.model_dump_json())
+
+
+async def _single_event(event: str, data: str) -> AsyncIterator[str]:
+    yield format_sse(event, data)
+
+
 @router.post("/generate", response_model=GenerateResponse)
-def generate(
+async def generate(
     payload: GenerateRequest,
-    llm_service: LLMService = Depends(get_llm_service),
-    cache_service: CacheService = Depends(get_cache_service),
+    stream: bool = False,
+    llm_service: AsyncLLMService = Depends(get_async_llm_service),
+    cache_service: AsyncCacheService = Depends(get_async_cache_service),
+    single_flight: SingleFlight = Depends(get_single_flight),
+    similar_topics: TopicIndex = Depends(get_topic_index),
 ):
     request_hash = cache_service.hash_text(
-        f"gen:v3:{llm_service.provider}:{llm_service.model_name}:{payload.model_dump_json()}"
+        f"gen:v4:{llm_service.provider}:{llm_service.model_name}:{payload.model_dump_json()}"
     )
-    cached_code = cache_service.get_generation(request_hash)
-    if cached_code:
-        return GenerateResponse(
-            code=cached_code,
-            model=llm_service.model_name,
-            warnings=["Served from generation cache"],
+    topic_index = similar_topics if get_settings().generate_similarity_cache else None
+    partition = _topic_partition(payload, llm_service)
+
+    async def cached_response() -> str | None:
+        cached_code = await cache_service.get_generation(request_hash)
+        if cached_code:
+            if topic_index is not None:
+                # Entries cached by other replicas join this replica's index on first use.
+                topic_index.add(partition, payload.topic, request_hash)
+            return GenerateResponse(
+                code=cached_code,
+                model=llm_service.model_name,
+                warnings=["Served from generation cache"],
+            ).model_dump_json()
+        if topic_index is None:
+            return None
+        for match in topic_index.lookup(partition, payload.topic):
+            similar_code = await cache_service.get_generation(match.request_hash)
+            if not similar_code:
+                topic_index.discard(match.request_hash)
+                continue
+            label = (
+                f"Served from similarity cache ({match.similarity:.0%} match with "
+                f"topic {match.topic!r})"
+            )
+            return GenerateResponse(
+                code=similar_code, model=llm_service.model_name, warnings=[label]
+            ).model_dump_json()
+        return None
+
+    cached = await cached_response()
+    if cached:
+        if stream:
+            return sse_response(_single_event("done", cached))
+        return GenerateResponse.model_validate_json(cached)
+
+    if stream:
+        # Not coalesced: each client gets its own token stream from its own provider call.
+        return sse_response(
+            _stream_generation(payload, request_hash, llm_service, cache_service, topic_index)
+        )
+
+    async def generate_response() -> str:
+        code, warnings = await llm_service.generate_code(payload)
+        response = await _finalize(
+            code, warnings, payload, request_hash, llm_service, cache_service, topic_index
         )
+        return response.model_dump_json()
 
     try:
-        code, warnings = llm_service.generate_code(payload)
+        if get_settings().generate_single_flight:
+            body = await single_flight.do(request_hash, generate_response, lookup=cached_response)
+        else:
+            body = await generate_response()
     except Exception as exc:
         raise HTTPException(status_code=502, detail=f"LLM generation failed: {exc}") from exc
 
-    validation = validator.validate(code)
-    if not validation.ok:
-        warnings.extend(validation.errors)
-    elif not warnings:
-        cache_service.set_generation(request_hash, code)
-
-    return GenerateResponse(code=code, model=llm_service.model_name, warnings=warnings)
+    return GenerateResponse.model_validate_json(body)
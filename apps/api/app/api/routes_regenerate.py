@@ -1,18 +1,31 @@
 from fastapi import APIRouter, Depends, HTTPException
 
-from app.api.deps import get_llm_service
+from app.api.deps import get_async_cache_service, get_async_llm_service
 from app.schemas.render import RegenerateRequest, RegenerateResponse
+from app.services.cache_service import AsyncCacheService
 from app.services.code_validator import CodeValidator
-from app.services.llm_service import LLMService
+from app.services.llm_service import AsyncLLMService
 
 router = APIRouter(tags=["regenerate"])
 validator = CodeValidator()
 
 
 @router.post("/regenerate", response_model=RegenerateResponse)
-def regenerate(payload: RegenerateRequest, llm_service: LLMService = Depends(get_llm_service)):
+async def regenerate(
+    payload: RegenerateRequest,
+    llm_service: AsyncLLMService = Depends(get_async_llm_service),
+    cache_service: AsyncCacheService = Depends(get_async_cache_service),
+):
+    regen_hash = cache_service.hash_text(
+        f"regen:v2:{llm_service.provider}:{llm_service.model_name}:"
+        f"{cache_service.hash_text(payload.code)}:{payload.instruction.strip()}"
+    )
+    cached_code = await cache_service.get_regeneration(regen_hash)
+    if cached_code:
+        return RegenerateResponse(code=cached_code)
+
     try:
-        code = llm_service.regenerate_with_instruction(payload.code, payload.instruction)
+        code = await llm_service.regenerate_with_instruction(payload.code, payload.instruction)
     except Exception as exc:
         raise HTTPException(status_code=502, detail=f"LLM regeneration failed: {exc}") from exc
 
@@ -20,4 +33,7 @@ def regenerate(payload: RegenerateRequest, llm_service: LLMService = Depends(get
     if not validation.ok:
         raise HTTPException(status_code=400, detail={"errors": validation.errors})
 
+    # An unchanged script is no answer to the instruction; asking again may do better.
+    if code != payload.code:
+        await cache_service.set_regeneration(regen_hash, code)
     return RegenerateResponse(code=code)
@@ -1,14 +1,26 @@
+import logging
+
 from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
 
 from app.api.deps import get_cache_service, get_job_service, get_queue, get_storage_service
 from app.core.config import get_settings
-from app.domain.enums import JobStatus
+from app.domain.enums import TERMINAL_STATUSES, JobStatus
 from app.schemas.render import RenderRequest, RenderResponse
 from app.services.cache_service import CacheService
+from app.services.code_normalizer import canonicalize_module
 from app.services.code_validator import CodeValidator
 from app.services.job_service import JobService
 from app.services.storage_service import StorageService
-from app.workers.tasks_render import process_render_job
+from app.workers.tasks_render import (
+    PREVIEW_VARIANT,
+    enqueue_render,
+    estimate_job_seconds,
+    process_render_job,
+    render_queue_name,
+    share_finished_render,
+)
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(tags=["render"])
 validator = CodeValidator()
@@ -26,44 +38,85 @@ def render(
     if not validation.ok and not payload.retry_on_error:
         raise HTTPException(status_code=400, detail={"errors": validation.errors})
 
-    render_hash = cache_service.hash_text(f"render:v2:{payload.quality}:{payload.code}")
+    settings = get_settings()
+    render_source = payload.code
+    estimate_fields = {}
+    if validation.tree is not None:
+        if settings.render_cache_normalize:
+            render_source = canonicalize_module(validation.tree)
+        try:
+            estimate_fields["estimated_render_sec"] = estimate_job_seconds(
+                validation.tree, payload.quality, payload.progressive
+            )
+        except (ArithmeticError, ValueError, RecursionError):
+            # The estimate only orders queues; a script it cannot size still renders.
+            logger.warning("Render cost estimate failed", exc_info=True)
+    # Progressive and plain jobs differ in what followers get (a preview), so never mix them.
+    render_hash = cache_service.hash_text(
+        f"render:v3:{payload.quality}:{payload.progressive}:{render_source}"
+    )
+    record = job_service.create_job(render_hash=render_hash, **estimate_fields)
+    job_id = record["job_id"]
+
     cached_job_id = cache_service.get_render_job(render_hash)
     if cached_job_id:
-        cached_video = storage_service.get(cached_job_id)
-        if cached_video:
-            record = job_service.create_job()
-            cloned = storage_service.clone(cached_job_id, record["job_id"])
-            if cloned:
-                job_service.update_job(
-                    record["job_id"],
-                    status=JobStatus.DONE.value,
-                    stage="done",
-                    progress=100,
-                    video_path=cloned,
-                )
-                return RenderResponse(job_id=record["job_id"], status=JobStatus.DONE.value)
-
-    record = job_service.create_job()
-    settings = get_settings()
+        shared_status = _share_render(cached_job_id, job_id, job_service, storage_service)
+        if shared_status:
+            return RenderResponse(job_id=job_id, status=shared_status)
 
     if settings.use_queue:
-        queue = get_queue()
-        queue.enqueue(
-            "app.workers.tasks_render.process_render_job",
-            record["job_id"],
+        queue_name = render_queue_name(
+            payload.quality, estimate_fields.get("estimated_render_sec"), payload.progressive
+        )
+        enqueue_render(
+            get_queue(queue_name),
+            job_id,
             payload.code,
             payload.quality,
             payload.retry_on_error,
-            job_timeout=settings.render_timeout_sec + 20,
+            payload.progressive,
         )
     else:
         background_tasks.add_task(
             process_render_job,
-            record["job_id"],
+            job_id,
             payload.code,
             payload.quality,
             payload.retry_on_error,
+            payload.progressive,
         )
 
-    cache_service.set_render_job(render_hash, record["job_id"])
-    return RenderResponse(job_id=record["job_id"], status=record["status"])
+    cache_service.set_render_job(render_hash, job_id)
+    return RenderResponse(job_id=job_id, status=record["status"])
+
+
+def _share_render(
+    leader_id: str, job_id: str, job_service: JobService, storage_service: StorageService
+) -> str | None:
+    """Reuse ``leader_id``'s render for ``job_id``: copy its video if finished, or follow
+    it while it is in flight. Returns the job's status, or None if it must render itself.
+    """
+    if share_finished_render(job_service, storage_service, leader_id, job_id):
+        return JobStatus.DONE.value
+
+    leader = job_service.get_job_fields(leader_id, "status", "stage", "progress")
+    if not leader or leader["status"] in TERMINAL_STATUSES:
+        return None
+    job_service.update_job(job_id, leader_job_id=leader_id, **leader)
+    job_service.add_follower(leader_id, job_id)
+    # A preview stored before the attach was not cloned for this job by the worker.
+    if storage_service.clone(leader_id, job_id, variant=PREVIEW_VARIANT):
+        job_service.update_job(job_id, preview_ready=True)
+
+    # The leader may have settled between the read above and the attach. Whoever
+    # removes the follower from the leader's list (this request or the worker) settles it.
+    leader = job_service.get_job_fields(leader_id, "status")
+    if leader and leader["status"] not in TERMINAL_STATUSES:
+        return leader["status"]
+    if not job_service.remove_follower(leader_id, job_id):
+        follower = job_service.get_job_fields(job_id, "status")
+        return follower["status"] if follower else None
+    job_service.update_job(job_id, leader_job_id=None)
+    if share_finished_render(job_service, storage_service, leader_id, job_id):
+        return JobStatus.DONE.value
+    return None
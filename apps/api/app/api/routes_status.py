@@ -1,15 +1,92 @@
-from fastapi import APIRouter, Depends, HTTPException
+import hashlib
+from collections.abc import AsyncIterator
 
-from app.api.deps import get_job_service
-from app.schemas.job import JobStatusResponse
-from app.services.job_service import JobService
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
+
+from app.api.deps import get_async_job_service
+from app.api.sse import format_sse, sse_response
+from app.core.config import get_settings
+from app.schemas.job import JobStatusBatchRequest, JobStatusBatchResponse, JobStatusResponse
+from app.services.job_service import AsyncJobService
 
 router = APIRouter(tags=["status"])
 
 
+def _etag(*versions: str) -> str:
+    digest = hashlib.sha256("|".join(versions).encode("utf-8")).hexdigest()[:32]
+    return f'"{digest}"'
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+def _not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+
 @router.get("/status/{job_id}", response_model=JobStatusResponse)
-def status(job_id: str, job_service: JobService = Depends(get_job_service)):
-    item = job_service.get_job(job_id)
+async def status(
+    job_id: str,
+    response: Response,
+    if_none_match: str | None = Header(default=None),
+    job_service: AsyncJobService = Depends(get_async_job_service),
+):
+    if if_none_match:
+        # Revalidation only needs updated_at; skip the full read when nothing changed.
+        version = await job_service.get_job_fields(job_id, "updated_at")
+        if version and _etag_matches(if_none_match, _etag(job_id, version["updated_at"])):
+            return _not_modified(_etag(job_id, version["updated_at"]))
+
+    item = await job_service.get_job(job_id)
     if not item:
         raise HTTPException(status_code=404, detail="Job not found")
+    response.headers["ETag"] = _etag(job_id, item["updated_at"])
+    response.headers["Cache-Control"] = "no-cache"
     return JobStatusResponse(**item)
+
+
+@router.post("/status/batch", response_model=JobStatusBatchResponse)
+async def status_batch(
+    payload: JobStatusBatchRequest,
+    response: Response,
+    if_none_match: str | None = Header(default=None),
+    job_service: AsyncJobService = Depends(get_async_job_service),
+):
+    job_ids = list(dict.fromkeys(payload.job_ids))
+    items = await job_service.get_jobs(job_ids)
+
+    found = [item for item in items if item]
+    missing = [job_id for job_id, item in zip(job_ids, items, strict=True) if not item]
+    etag = _etag(
+        *(f"{item['job_id']}:{item['updated_at']}" for item in found),
+        *(f"{job_id}:missing" for job_id in missing),
+    )
+    if _etag_matches(if_none_match, etag):
+        return _not_modified(etag)
+
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+    return JobStatusBatchResponse(
+        jobs=[JobStatusResponse(**item) for item in found],
+        missing=missing,
+    )
+
+
+async def _job_events(job_id: str, job_service: AsyncJobService) -> AsyncIterator[str]:
+    heartbeat_sec = get_settings().status_stream_heartbeat_sec
+    async for item in job_service.watch(job_id, heartbeat_sec=heartbeat_sec):
+        if item is None:
+            yield ": keepalive\n\n"
+            continue
+        yield format_sse("status", JobStatusResponse(**item).model_dump_json())
+
+
+@router.get("/status/{job_id}/events")
+async def status_events(job_id: str, job_service: AsyncJobService = Depends(get_async_job_service)):
+    if not await job_service.get_job_fields(job_id, "status"):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return sse_response(_job_events(job_id, job_service))
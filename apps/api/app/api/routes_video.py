@@ -1,32 +1,105 @@
+from pathlib import Path
+from typing import Literal
+
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.responses import FileResponse
 
-from app.api.deps import get_job_service, get_storage_service
+from app.api.deps import get_async_job_service, get_storage_service
 from app.domain.enums import JobStatus
-from app.services.job_service import JobService
+from app.services.job_service import AsyncJobService
 from app.services.storage_service import StorageService
+from app.services.video_packager import ANIMATED_PREVIEW_FILE, POSTER_FILE
 
 router = APIRouter(tags=["video"])
 
+HLS_MEDIA_TYPES = {
+    ".m3u8": "application/vnd.apple.mpegurl",
+    ".m4s": "video/iso.segment",
+    ".mp4": "video/mp4",
+}
+# A finished job's packaged files never change.
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
 
 @router.get("/video/{job_id}")
-def video(
+async def video(
     job_id: str,
+    variant: Literal["preview"] | None = None,
     storage_service: StorageService = Depends(get_storage_service),
-    job_service: JobService = Depends(get_job_service),
+    job_service: AsyncJobService = Depends(get_async_job_service),
 ):
-    job = job_service.get_job(job_id)
+    job = await job_service.get_job_fields(job_id, "status", "preview_ready")
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
-    if job["status"] != JobStatus.DONE.value:
+    if variant == "preview":
+        if not job["preview_ready"]:
+            raise HTTPException(status_code=409, detail="Preview is not ready yet")
+    elif job["status"] != JobStatus.DONE.value:
         raise HTTPException(status_code=409, detail="Video is not ready yet")
 
-    video_path = storage_service.get(job_id)
+    video_path = storage_service.get(job_id, variant=variant)
     if not video_path:
         raise HTTPException(status_code=404, detail="Video not found")
 
     return FileResponse(
         path=video_path,
         media_type="video/mp4",
-        filename=f"{job_id}.mp4",
+        filename=f"{job_id}.{variant}.mp4" if variant else f"{job_id}.mp4",
+    )
+
+
+async def _require_done(job_service: AsyncJobService, job_id: str) -> None:
+    job = await job_service.get_job_fields(job_id, "status")
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job["status"] != JobStatus.DONE.value:
+        raise HTTPException(status_code=409, detail="Video is not ready yet")
+
+
+@router.get("/video/{job_id}/poster")
+async def video_poster(
+    job_id: str,
+    storage_service: StorageService = Depends(get_storage_service),
+    job_service: AsyncJobService = Depends(get_async_job_service),
+):
+    await _require_done(job_service, job_id)
+    path = storage_service.get_asset(job_id, POSTER_FILE)
+    if not path:
+        raise HTTPException(status_code=404, detail="Poster not found")
+    return FileResponse(
+        path=path, media_type="image/jpeg", headers={"Cache-Control": IMMUTABLE_CACHE_CONTROL}
+    )
+
+
+@router.get("/video/{job_id}/preview")
+async def video_animated_preview(
+    job_id: str,
+    storage_service: StorageService = Depends(get_storage_service),
+    job_service: AsyncJobService = Depends(get_async_job_service),
+):
+    await _require_done(job_service, job_id)
+    path = storage_service.get_asset(job_id, ANIMATED_PREVIEW_FILE)
+    if not path:
+        raise HTTPException(status_code=404, detail="Animated preview not found")
+    return FileResponse(
+        path=path, media_type="image/webp", headers={"Cache-Control": IMMUTABLE_CACHE_CONTROL}
+    )
+
+
+@router.get("/video/{job_id}/hls/{name}")
+async def video_hls(
+    job_id: str,
+    name: str,
+    storage_service: StorageService = Depends(get_storage_service),
+    job_service: AsyncJobService = Depends(get_async_job_service),
+):
+    await _require_done(job_service, job_id)
+    path = storage_service.get_hls(job_id, name)
+    if not path:
+        raise HTTPException(status_code=404, detail="HLS file not found")
+
+    return FileResponse(
+        path=path,
+        media_type=HLS_MEDIA_TYPES[Path(name).suffix],
+        headers={"Cache-Control": IMMUTABLE_CACHE_CONTROL},
     )
@@ -9,6 +9,11 @@ class Settings(BaseSettings):
     app_name: str = "Manim AI API"
     llm_provider: str = "hf_router"
     llm_request_timeout_sec: int = 120
+    llm_max_connections: int = 200
+    generate_single_flight: bool = True
+    generate_similarity_cache: bool = False
+    generate_similarity_threshold: float = 0.8
+    generate_similarity_max_entries: int = 10000
 
     hf_router_base_url: str = "https://router.huggingface.co/v1"
     hf_endpoint_url: str = ""
@@ -20,25 +25,58 @@ class Settings(BaseSettings):
     openai_model: str = "gpt-5-mini"
     ollama_base_url: str = "http://ollama:11434"
     ollama_model: str = "deepseek-coder:1.3b"
+    ollama_keep_alive: str = "30m"
+    llm_warmup_on_startup: bool = True
 
     redis_url: str = "redis://redis:6379/0"
+    redis_max_connections: int = 100
+    cache_local_max_entries: int = 1024
+    cache_local_max_bytes: int = 32 * 1024 * 1024
+    cache_generate_ttl_sec: int = 7 * 24 * 3600
+    cache_render_ttl_sec: int = 24 * 3600
+    cache_repair_ttl_sec: int = 7 * 24 * 3600
+    cache_compress_min_bytes: int = 2048
     use_queue: bool = True
 
     video_storage_root: str = "/data/videos"
+    video_faststart: bool = True
+    video_hls: bool = False
+    video_hls_segment_sec: int = 4
+    video_thumbnails: bool = True
     render_timeout_sec: int = 120
     max_render_retries: int = 2
+    render_fix_candidates: int = 1
+    render_preflight: bool = False
+    render_preflight_timeout_sec: int = 60
     render_mode: str = "docker"
     default_render_quality: str = "1080p30"
+    render_cache_normalize: bool = False
+    render_pool_size: int = 2
+    render_pool_max_renders: int = 50
+    render_pool_max_rss_mb: int = 1536
+    render_partial_cache_dir: str = ""
+    render_partial_cache_max_mb: int = 2048
+    render_section_parallelism: int = 1
+    render_size_buckets: bool = True
+    render_short_max_sec: int = 30
+    render_long_min_sec: int = 180
+    render_interactive_qualities: str = "480p15"
+    render_worker_queues: str = ""
+    render_worker_steal: bool = True
+    render_workers: int = 0
 
     renderer_image: str = "manim-ai-renderer:latest"
     sandbox_cpu: str = "1.0"
     sandbox_memory: str = "1g"
+    sandbox_cpuset: str = ""
     sandbox_pids_limit: int = 256
     sandbox_read_only: bool = True
     sandbox_network_disabled: bool = True
     sandbox_no_new_privileges: bool = True
     sandbox_seccomp_profile: str = "/app/app/sandbox/seccomp/renderer-seccomp.json"
 
+    status_stream_heartbeat_sec: int = 15
+
     cors_origins: str = "http://localhost:3000"
     rate_limit_per_min: int = 60
 
@@ -9,3 +9,8 @@ class JobStatus(StrEnum):
     DONE = "done"
     FAILED = "failed"
     TIMEOUT = "timeout"
+
+
+TERMINAL_STATUSES = frozenset({JobStatus.DONE, JobStatus.FAILED, JobStatus.TIMEOUT})
+# Statuses the render worker may move a job out of; terminal jobs are never written again.
+ACTIVE_STATUSES = frozenset(JobStatus) - TERMINAL_STATUSES
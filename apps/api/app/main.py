@@ -1,6 +1,12 @@
+import asyncio
+import logging
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from app.api.deps import get_async_llm_service, get_cache_service
 from app.api.routes_generate import router as generate_router
 from app.api.routes_regenerate import router as regenerate_router
 from app.api.routes_render import router as render_router
@@ -12,8 +18,26 @@ from app.core.security import SimpleRateLimitMiddleware
 
 settings = get_settings()
 configure_logging()
+logger = logging.getLogger(__name__)
+
+
+async def _warm_up_llm() -> None:
+    try:
+        await get_async_llm_service().warm_up()
+    except Exception as exc:
+        logger.warning("LLM warm-up failed: %s", exc)
+
 
-app = FastAPI(title=settings.app_name, version="0.1.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    # In the background: loading a model can take longer than health checks allow.
+    warm_up = asyncio.create_task(_warm_up_llm()) if settings.llm_warmup_on_startup else None
+    yield
+    if warm_up is not None:
+        warm_up.cancel()
+
+
+app = FastAPI(title=settings.app_name, version="0.1.0", lifespan=lifespan)
 app.add_middleware(RequestIdMiddleware)
 app.add_middleware(SimpleRateLimitMiddleware)
 app.add_middleware(
@@ -30,6 +54,11 @@ def health():
     return {"status": "ok"}
 
 
+@app.get("/health/cache")
+def cache_health():
+    return get_cache_service().stats()
+
+
 app.include_router(generate_router)
 app.include_router(regenerate_router)
 app.include_router(render_router)
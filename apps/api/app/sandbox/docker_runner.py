@@ -4,83 +4,160 @@ import os
 import shutil
 import subprocess
 import tempfile
+import uuid
 from pathlib import Path
+from threading import Event
 
 from app.core.config import get_settings
-from app.services.render_types import RenderResult, RenderTimeoutError
+from app.services.partial_cache import get_partial_cache
+from app.services.render_process import run_process
+from app.services.render_types import EmptyRenderError, RenderResult, RenderTimeoutError
+
+# In-container mount points for the render's private partial movie dir and the shared cache.
+PARTIALS_MOUNT = "/partials"
+PARTIAL_CACHE_MOUNT = "/partial-cache"
+# entrypoint.sh exit status when Manim succeeded without writing a video.
+NO_OUTPUT_EXIT_CODE = 3
+# entrypoint.sh mode argument that runs the scene through manim_dry_run.py instead.
+DRY_RUN_MODE = "dry_run"
+# Seconds to wait for ``docker kill`` when a render is cancelled or times out.
+DOCKER_KILL_TIMEOUT_SEC = 10
+
+
+def _container_name(job_id: str) -> str:
+    return f"manim-{job_id}-{uuid.uuid4().hex[:8]}"
 
 
 class DockerRunner:
     def __init__(self) -> None:
         self.settings = get_settings()
 
-    def run(self, job_id: str, code: str, quality: str) -> RenderResult:
-        with tempfile.TemporaryDirectory(prefix=f"sandbox_{job_id}_") as tmp_dir:
-            workspace_dir = Path(tmp_dir) / "workspace"
-            output_dir = Path(tmp_dir) / "output"
-            workspace_dir.mkdir(parents=True, exist_ok=True)
-            output_dir.mkdir(parents=True, exist_ok=True)
-
-            script_path = workspace_dir / "scene.py"
-            script_path.write_text(code, encoding="utf-8")
-
-            cmd = [
-                "docker",
-                "run",
-                "--rm",
-                "--cpus",
-                self.settings.sandbox_cpu,
-                "--memory",
-                self.settings.sandbox_memory,
-                "--pids-limit",
-                str(self.settings.sandbox_pids_limit),
-                "--tmpfs",
-                "/tmp:size=256m",
-                "-v",
-                f"{workspace_dir}:/workspace:rw",
-                "-v",
-                f"{output_dir}:/output:rw",
-            ]
-
-            if self.settings.sandbox_network_disabled:
-                cmd.extend(["--network", "none"])
-            if self.settings.sandbox_read_only:
-                cmd.append("--read-only")
-            if self.settings.sandbox_no_new_privileges:
-                cmd.extend(["--security-opt", "no-new-privileges"])
-            if Path(self.settings.sandbox_seccomp_profile).exists():
-                cmd.extend(["--security-opt", f"seccomp={self.settings.sandbox_seccomp_profile}"])
+    def _prepare(self, tmp_dir: str, code: str, name: str) -> list[str]:
+        """Write the script into a fresh workspace and return the base ``docker run`` args."""
+        workspace_dir = Path(tmp_dir) / "workspace"
+        output_dir = Path(tmp_dir) / "output"
+        workspace_dir.mkdir(parents=True, exist_ok=True)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        (workspace_dir / "scene.py").write_text(code, encoding="utf-8")
 
-            cmd.extend(
-                [
-                    self.settings.renderer_image,
-                    "/entrypoint.sh",
-                    "scene.py",
-                    "GeneratedScene",
-                    quality,
-                ]
+        cmd = [
+            "docker",
+            "run",
+            "--rm",
+            "--name",
+            name,
+            "--cpus",
+            self.settings.sandbox_cpu,
+            "--memory",
+            self.settings.sandbox_memory,
+            "--pids-limit",
+            str(self.settings.sandbox_pids_limit),
+            "--tmpfs",
+            "/tmp:size=256m",
+            "-v",
+            f"{workspace_dir}:/workspace:rw",
+            "-v",
+            f"{output_dir}:/output:rw",
+        ]
+        if self.settings.sandbox_cpuset:
+            cmd.extend(["--cpuset-cpus", self.settings.sandbox_cpuset])
+        return cmd
+
+    def _security_args(self) -> list[str]:
+        args: list[str] = []
+        if self.settings.sandbox_network_disabled:
+            args.extend(["--network", "none"])
+        if self.settings.sandbox_read_only:
+            args.append("--read-only")
+        if self.settings.sandbox_no_new_privileges:
+            args.extend(["--security-opt", "no-new-privileges"])
+        if Path(self.settings.sandbox_seccomp_profile).exists():
+            args.extend(["--security-opt", f"seccomp={self.settings.sandbox_seccomp_profile}"])
+        return args
+
+    def _execute(
+        self, cmd: list[str], name: str, timeout: int, cancel: Event | None = None
+    ) -> None:
+        def kill_container() -> None:
+            # Killing the docker client leaves the container running.
+            subprocess.run(
+                ["docker", "kill", name],
+                check=False,
+                capture_output=True,
+                timeout=DOCKER_KILL_TIMEOUT_SEC,
             )
 
-            try:
-                subprocess.run(
-                    cmd,
-                    check=True,
-                    timeout=self.settings.render_timeout_sec,
-                    capture_output=True,
-                    text=True,
+        try:
+            run_process(cmd, timeout, cancel=cancel, on_stop=kill_container)
+        except subprocess.TimeoutExpired as exc:
+            raise RenderTimeoutError("Sandbox render timed out") from exc
+        except subprocess.CalledProcessError as exc:
+            if exc.returncode == NO_OUTPUT_EXIT_CODE:
+                raise EmptyRenderError("Sandbox render finished but output.mp4 is missing") from exc
+            stderr = (exc.stderr or "").strip()
+            stdout = (exc.stdout or "").strip()
+            raise RuntimeError(stderr or stdout or "Sandbox render failed") from exc
+
+    def run(
+        self,
+        job_id: str,
+        code: str,
+        quality: str,
+        scene_class: str = "GeneratedScene",
+        cancel: Event | None = None,
+    ) -> RenderResult:
+        with tempfile.TemporaryDirectory(prefix=f"sandbox_{job_id}_") as tmp_dir:
+            name = _container_name(job_id)
+            cmd = self._prepare(tmp_dir, code, name)
+            partial_cache = get_partial_cache()
+            partial_dir = Path(tmp_dir) / "partials"
+            if partial_cache:
+                # The shared cache is read-only inside the sandbox; new partials land in
+                # the render's own directory and are collected on the host afterwards.
+                partial_cache.prepare(quality, partial_dir, link_root=PARTIAL_CACHE_MOUNT)
+                cmd.extend(
+                    [
+                        "-v",
+                        f"{partial_dir}:{PARTIALS_MOUNT}:rw",
+                        "-v",
+                        f"{partial_cache.quality_dir(quality)}:{PARTIAL_CACHE_MOUNT}:ro",
+                    ]
                 )
-            except subprocess.TimeoutExpired as exc:
-                raise RenderTimeoutError("Sandbox render timed out") from exc
-            except subprocess.CalledProcessError as exc:
-                stderr = (exc.stderr or "").strip()
-                stdout = (exc.stdout or "").strip()
-                raise RuntimeError(stderr or stdout or "Sandbox render failed") from exc
-
-            output_file = output_dir / "output.mp4"
+            cmd.extend(self._security_args())
+            # The image's ENTRYPOINT is entrypoint.sh; these become its positional args.
+            cmd.extend([self.settings.renderer_image, "scene.py", scene_class, quality])
+
+            rendered = False
+            try:
+                self._execute(cmd, name, self.settings.render_timeout_sec, cancel=cancel)
+                rendered = True
+            finally:
+                if partial_cache:
+                    partial_cache.collect(quality, partial_dir, rendered=rendered)
+
+            output_file = Path(tmp_dir) / "output" / "output.mp4"
             if not output_file.exists():
-                raise RuntimeError("Sandbox render finished but output.mp4 is missing")
+                raise EmptyRenderError("Sandbox render finished but output.mp4 is missing")
 
             fd, stable_output = tempfile.mkstemp(prefix=f"{job_id}_", suffix=".mp4")
             os.close(fd)
             shutil.copyfile(output_file, stable_output)
             return RenderResult(video_file=stable_output)
+
+    def dry_run(
+        self,
+        job_id: str,
+        code: str,
+        quality: str,
+        timeout: int,
+        scene_class: str = "GeneratedScene",
+    ) -> None:
+        """Run the scene's ``construct()`` in the same sandbox without writing any frames."""
+        with tempfile.TemporaryDirectory(prefix=f"sandbox_{job_id}_") as tmp_dir:
+            name = _container_name(job_id)
+            cmd = self._prepare(tmp_dir, code, name)
+            cmd.extend(self._security_args())
+            cmd.extend(
+                [self.settings.renderer_image, "scene.py", scene_class, quality, DRY_RUN_MODE]
+            )
+            self._execute(cmd, name, timeout)
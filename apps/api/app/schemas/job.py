@@ -1,7 +1,9 @@
 from datetime import datetime
 from typing import Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, computed_field
+
+from app.domain.enums import TERMINAL_STATUSES
 
 
 class JobStatusResponse(BaseModel):
@@ -12,6 +14,26 @@ class JobStatusResponse(BaseModel):
     error: Optional[str]
     created_at: datetime
     updated_at: datetime
+    leader_job_id: Optional[str] = None
+    preview_ready: bool = False
+    estimated_render_sec: Optional[int] = None
+
+    @computed_field
+    @property
+    def eta_sec(self) -> Optional[int]:
+        """Estimated render seconds left, from the static estimate and current progress."""
+        if self.estimated_render_sec is None or self.status in TERMINAL_STATUSES:
+            return None
+        return self.estimated_render_sec * (100 - self.progress) // 100
+
+
+class JobStatusBatchRequest(BaseModel):
+    job_ids: list[str] = Field(min_length=1, max_length=200)
+
+
+class JobStatusBatchResponse(BaseModel):
+    jobs: list[JobStatusResponse]
+    missing: list[str] = Field(default_factory=list)
 
 
 class ApiError(BaseModel):
@@ -5,6 +5,7 @@ class RenderRequest(BaseModel):
     code: str = Field(min_length=1, max_length=100_000)
     quality: str = Field(default="1080p30")
     retry_on_error: bool = True
+    progressive: bool = False
 
 
 class RenderResponse(BaseModel):
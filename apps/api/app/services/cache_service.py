@@ -1,19 +1,114 @@
 from __future__ import annotations
 
+import base64
 import hashlib
+import re
+import time
+import zlib
+from collections import Counter, OrderedDict
 from threading import Lock
 
 from redis import Redis
+from redis.asyncio import ConnectionPool as AsyncConnectionPool
+from redis.asyncio import Redis as AsyncRedis
 
 from app.core.config import get_settings
 
+# Python source cannot contain NUL bytes, so this prefix never collides with a plain value.
+COMPRESSED_PREFIX = "\x00zlib:"
+# Namespaces whose Redis values are repointed in place (the render worker hands a render
+# over to a follower job), so a local copy would go stale; they bypass the in-process tier
+# whenever Redis is available.
+REMOTE_ONLY_NAMESPACES = frozenset({"render"})
+
+# Noise that differs between runs of the same failure, and what it is replaced with.
+_ERROR_NOISE = (
+    (re.compile(r"\x1b\[[0-9;]*m"), ""),  # ANSI colours from Rich tracebacks
+    (re.compile(r"(?:/[\w.@+-]+)*/([\w.-]+\.\w+)"), r"\1"),  # absolute paths -> file names
+    (re.compile(r"\bline \d+"), "line N"),
+    (re.compile(r"\b0x[0-9a-fA-F]+\b"), "0x?"),
+    (re.compile(r"\bjob_[0-9a-f]{12}\b"), "job"),
+    (re.compile(r"[│╭╮╰╯─]+"), " "),  # Rich traceback box drawing
+)
+
+
+def error_signature(error: str) -> str:
+    """``error`` with temp paths, line numbers and other per-run noise removed, so repeats
+    of the same failure map to the same cache key.
+    """
+    for pattern, replacement in _ERROR_NOISE:
+        error = pattern.sub(replacement, error)
+    return " ".join(error.split())
+
+
+class LRUCache:
+    """Thread-safe in-process LRU bounded by entry count and total bytes, with per-entry TTL."""
+
+    def __init__(self, max_entries: int, max_bytes: int) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        self._bytes = 0
+        self._items: OrderedDict[str, tuple[str, float | None, int]] = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            value, expires_at, _ = item
+            if expires_at is not None and expires_at <= time.monotonic():
+                self._pop(key)
+                return None
+            self._items.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, ttl_sec: int | None = None) -> None:
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        expires_at = time.monotonic() + ttl_sec if ttl_sec else None
+        with self._lock:
+            self._pop(key)
+            self._items[key] = (value, expires_at, size)
+            self._bytes += size
+            while len(self._items) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._items))
+                self._pop(oldest)
+                self.evictions += 1
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def _pop(self, key: str) -> None:
+        item = self._items.pop(key, None)
+        if item is not None:
+            self._bytes -= item[2]
+
 
 class CacheService:
+    """Two-tier cache: a bounded in-process LRU in front of Redis.
+
+    Redis keys get a per-namespace TTL and large values are stored zlib-compressed.
+    When Redis is unavailable the LRU is the only tier.
+    """
+
     def __init__(self) -> None:
         self.settings = get_settings()
         self._redis: Redis | None = None
-        self._mem: dict[str, str] = {}
+        self._local = LRUCache(
+            max_entries=self.settings.cache_local_max_entries,
+            max_bytes=self.settings.cache_local_max_bytes,
+        )
+        self._counters: Counter[str] = Counter()
         self._lock = Lock()
+        self._ttls = {
+            "generate": self.settings.cache_generate_ttl_sec,
+            "render": self.settings.cache_render_ttl_sec,
+            "fix": self.settings.cache_repair_ttl_sec,
+            "regenerate": self.settings.cache_repair_ttl_sec,
+        }
         try:
             self._redis = Redis.from_url(self.settings.redis_url, decode_responses=True)
             self._redis.ping()
@@ -23,18 +118,86 @@ class CacheService:
     def hash_text(self, text: str) -> str:
         return hashlib.sha256(text.encode("utf-8")).hexdigest()
 
-    def _get(self, key: str) -> str | None:
-        if self._redis:
-            return self._redis.get(key)
+    def stats(self) -> dict[str, int]:
         with self._lock:
-            return self._mem.get(key)
+            counters = dict(self._counters)
+        return {
+            "local_hits": counters.get("local_hits", 0),
+            "remote_hits": counters.get("remote_hits", 0),
+            "misses": counters.get("misses", 0),
+            "evictions": self._local.evictions,
+            "local_entries": len(self._local),
+        }
+
+    def _record(self, counter: str) -> None:
+        with self._lock:
+            self._counters[counter] += 1
+
+    def _namespace(self, key: str) -> str:
+        # Keys look like "cache:<namespace>:<hash>".
+        return key.split(":", 2)[1] if key.count(":") >= 2 else ""
+
+    def _ttl_for(self, key: str) -> int | None:
+        return self._ttls.get(self._namespace(key)) or None
+
+    def _uses_local(self, key: str) -> bool:
+        return not self._redis or self._namespace(key) not in REMOTE_ONLY_NAMESPACES
+
+    def _encode(self, value: str) -> str:
+        raw = value.encode("utf-8")
+        if len(raw) < self.settings.cache_compress_min_bytes:
+            return value
+        packed = base64.b64encode(zlib.compress(raw)).decode("ascii")
+        return f"{COMPRESSED_PREFIX}{packed}"
+
+    def _decode(self, value: str) -> str:
+        if not value.startswith(COMPRESSED_PREFIX):
+            return value
+        packed = value[len(COMPRESSED_PREFIX) :]
+        return zlib.decompress(base64.b64decode(packed)).decode("utf-8")
+
+    @property
+    def has_redis(self) -> bool:
+        return self._redis is not None
+
+    # The tier primitives below let AsyncCacheService do the Redis I/O itself while
+    # sharing this instance's local tier, encoding and counters.
+
+    def get_local(self, key: str) -> str | None:
+        """Look ``key`` up in the in-process tier only."""
+        value = self._local.get(key) if self._uses_local(key) else None
+        if value is not None:
+            self._record("local_hits")
+        return value
+
+    def accept_remote(self, key: str, raw: str | None) -> str | None:
+        """Decode what Redis returned for ``key`` (``None`` for a miss) and fill the local tier."""
+        if raw is None:
+            self._record("misses")
+            return None
+        value = self._decode(raw)
+        if self._uses_local(key):
+            self._local.set(key, value, self._ttl_for(key))
+        self._record("remote_hits")
+        return value
+
+    def set_local(self, key: str, value: str) -> tuple[str, int | None]:
+        """Store ``value`` in the local tier; returns the Redis value and TTL to write."""
+        ttl = self._ttl_for(key)
+        if self._uses_local(key):
+            self._local.set(key, value, ttl)
+        return self._encode(value), ttl
+
+    def _get(self, key: str) -> str | None:
+        value = self.get_local(key)
+        if value is not None:
+            return value
+        return self.accept_remote(key, self._redis.get(key) if self._redis else None)
 
     def _set(self, key: str, value: str) -> None:
+        encoded, ttl = self.set_local(key, value)
         if self._redis:
-            self._redis.set(key, value)
-            return
-        with self._lock:
-            self._mem[key] = value
+            self._redis.set(key, encoded, ex=ttl)
 
     def get_generation(self, request_hash: str) -> str | None:
         return self._get(f"cache:generate:{request_hash}")
@@ -47,3 +210,60 @@ class CacheService:
 
     def set_render_job(self, render_hash: str, job_id: str) -> None:
         self._set(f"cache:render:{render_hash}", job_id)
+
+    def get_fix(self, fix_hash: str) -> str | None:
+        return self._get(f"cache:fix:{fix_hash}")
+
+    def set_fix(self, fix_hash: str, code: str) -> None:
+        self._set(f"cache:fix:{fix_hash}", code)
+
+
+class AsyncCacheService:
+    """``redis.asyncio`` front for the generation and regeneration caches.
+
+    Shares the in-process tier and counters of the wrapped ``CacheService`` so sync
+    and async handlers see the same hot entries.
+    """
+
+    def __init__(self, cache: CacheService) -> None:
+        self.settings = cache.settings
+        self._cache = cache
+        self._redis: AsyncRedis | None = None
+        if cache.has_redis:
+            pool = AsyncConnectionPool.from_url(
+                self.settings.redis_url,
+                decode_responses=True,
+                max_connections=self.settings.redis_max_connections,
+            )
+            self._redis = AsyncRedis(connection_pool=pool)
+
+    @property
+    def redis(self) -> AsyncRedis | None:
+        return self._redis
+
+    def hash_text(self, text: str) -> str:
+        return self._cache.hash_text(text)
+
+    async def _get(self, key: str) -> str | None:
+        value = self._cache.get_local(key)
+        if value is not None:
+            return value
+        raw = await self._redis.get(key) if self._redis else None
+        return self._cache.accept_remote(key, raw)
+
+    async def _set(self, key: str, value: str) -> None:
+        encoded, ttl = self._cache.set_local(key, value)
+        if self._redis:
+            await self._redis.set(key, encoded, ex=ttl)
+
+    async def get_generation(self, request_hash: str) -> str | None:
+        return await self._get(f"cache:generate:{request_hash}")
+
+    async def set_generation(self, request_hash: str, code: str) -> None:
+        await self._set(f"cache:generate:{request_hash}", code)
+
+    async def get_regeneration(self, regen_hash: str) -> str | None:
+        return await self._get(f"cache:regenerate:{regen_hash}")
+
+    async def set_regeneration(self, regen_hash: str, code: str) -> None:
+        await self._set(f"cache:regenerate:{regen_hash}", code)
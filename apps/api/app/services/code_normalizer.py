@@ -0,0 +1,28 @@
+import ast
+import copy
+
+_DOCSTRING_OWNERS = (ast.Module, ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)
+
+
+class _DocstringStripper(ast.NodeTransformer):
+    def generic_visit(self, node: ast.AST) -> ast.AST:
+        super().generic_visit(node)
+        if isinstance(node, _DOCSTRING_OWNERS) and node.body:
+            first = node.body[0]
+            if (
+                isinstance(first, ast.Expr)
+                and isinstance(first.value, ast.Constant)
+                and isinstance(first.value.value, str)
+            ):
+                node.body = node.body[1:] or [ast.Pass()]
+        return node
+
+
+def canonicalize_module(tree: ast.Module) -> str:
+    """Render a parsed module back to source with comments, docstrings and formatting removed.
+
+    Two scripts that differ only cosmetically (whitespace, comments, quote style,
+    docstrings) produce the same canonical source. The input tree is not modified.
+    """
+    stripped = _DocstringStripper().visit(copy.deepcopy(tree))
+    return ast.unparse(stripped)
@@ -1,5 +1,8 @@
 import ast
+import hashlib
+from collections import OrderedDict
 from dataclasses import dataclass, field
+from threading import Lock
 
 FORBIDDEN_IMPORTS = {
     "os",
@@ -36,97 +39,160 @@ KNOWN_SCENE_METHODS = {
 class ValidationResult:
     ok: bool
     errors: list[str] = field(default_factory=list)
+    # The script, kept so ``tree`` can be parsed on demand; None if it is not valid Python.
+    source: str | None = field(default=None, repr=False, compare=False)
+    _tree: ast.Module | None = field(default=None, init=False, repr=False, compare=False)
+
+    @property
+    def tree(self) -> ast.Module | None:
+        if self._tree is None and self.source is not None:
+            self._tree = ast.parse(self.source)
+        return self._tree
+
+
+@dataclass(frozen=True)
+class _Verdict:
+    ok: bool
+    errors: tuple[str, ...]
+    parsed: bool
+
+
+# Bump whenever the rules above or in _RuleVisitor change, so memoized results are not reused.
+RULESET_VERSION = 1
+VALIDATION_CACHE_SIZE = 512
+
+# Only verdicts are memoized: an AST is dozens of times the size of its source.
+_results: OrderedDict[str, _Verdict] = OrderedDict()
+_results_lock = Lock()
+
+
+class _RuleVisitor(ast.NodeVisitor):
+    """Checks every rule in a single traversal, tracking enclosing ``GeneratedScene`` classes."""
+
+    def __init__(self) -> None:
+        self.errors: list[str] = []
+        self._seen_errors: set[str] = set()
+        self.has_required_import = False
+        self.has_scene = False
+        self.has_construct = False
+        # Methods defined by each enclosing GeneratedScene, innermost last.
+        self._scene_methods: list[set[str]] = []
+
+    def add_error(self, message: str) -> None:
+        if message not in self._seen_errors:
+            self._seen_errors.add(message)
+            self.errors.append(message)
+
+    def visit_ImportFrom(self, node: ast.ImportFrom) -> None:
+        if node.module == "manim":
+            self.has_required_import = True
+        elif node.module and node.module.split(".")[0] in FORBIDDEN_IMPORTS:
+            self.add_error(f"Forbidden import from: {node.module}")
+
+    def visit_Import(self, node: ast.Import) -> None:
+        for alias in node.names:
+            if alias.name.split(".")[0] in FORBIDDEN_IMPORTS:
+                self.add_error(f"Forbidden import: {alias.name}")
+
+    def visit_ClassDef(self, node: ast.ClassDef) -> None:
+        if node.name != "GeneratedScene":
+            self.generic_visit(node)
+            return
+        if any(isinstance(base, ast.Name) and base.id == "Scene" for base in node.bases):
+            self.has_scene = True
+        defined_methods = {child.name for child in node.body if isinstance(child, ast.FunctionDef)}
+        if "construct" in defined_methods:
+            self.has_construct = True
+        self._scene_methods.append(defined_methods)
+        self.generic_visit(node)
+        self._scene_methods.pop()
+
+    def visit_Call(self, node: ast.Call) -> None:
+        fn_name = None
+        if isinstance(node.func, ast.Name):
+            fn_name = node.func.id
+        elif isinstance(node.func, ast.Attribute):
+            fn_name = node.func.attr
+        if fn_name in FORBIDDEN_CALLS:
+            self.add_error(f"Forbidden call: {fn_name}")
+
+        if (
+            self._scene_methods
+            and isinstance(node.func, ast.Attribute)
+            and isinstance(node.func.value, ast.Name)
+            and node.func.value.id == "self"
+        ):
+            self._check_scene_call(node, node.func.attr)
+        self.generic_visit(node)
+
+    def _check_scene_call(self, node: ast.Call, method_name: str) -> None:
+        if method_name in KNOWN_SCENE_METHODS:
+            return
+        if all(method_name in methods for methods in self._scene_methods):
+            return
+        line = getattr(node, "lineno", "?")
+        if method_name.startswith("_"):
+            self.add_error(
+                f"Undefined private method on self at line {line}: self.{method_name}(...). "
+                "Do not invent private Scene helpers unless defined in class."
+            )
+        else:
+            self.add_error(
+                f"Unknown Scene method at line {line}: self.{method_name}(...). "
+                "Use valid Manim Scene APIs or define the helper method in class."
+            )
 
 
 class CodeValidator:
-    def validate(self, code: str) -> ValidationResult:
-        errors: list[str] = []
-        seen_errors: set[str] = set()
+    """Static safety and contract checks for generated scripts.
 
-        def add_error(message: str) -> None:
-            if message not in seen_errors:
-                seen_errors.add(message)
-                errors.append(message)
+    Verdicts are memoized process-wide by code hash and ``RULESET_VERSION``, so repeat
+    validations of the same script (route, worker retries, regenerate) are a lookup;
+    ``tree`` of a memoized result is parsed again only if a caller asks for it.
+    """
 
-        if len(code.encode("utf-8")) > 100_000:
-            errors.append("Code exceeds max size 100KB")
+    def validate(self, code: str) -> ValidationResult:
+        encoded = code.encode("utf-8")
+        key = f"{RULESET_VERSION}:{hashlib.sha256(encoded).hexdigest()}"
+        with _results_lock:
+            cached = _results.get(key)
+            if cached is not None:
+                _results.move_to_end(key)
+        if cached is not None:
+            return ValidationResult(
+                ok=cached.ok,
+                errors=list(cached.errors),
+                source=code if cached.parsed else None,
+            )
+
+        result = self._validate(code, len(encoded))
+        verdict = _Verdict(result.ok, tuple(result.errors), result.source is not None)
+        with _results_lock:
+            _results[key] = verdict
+            while len(_results) > VALIDATION_CACHE_SIZE:
+                _results.popitem(last=False)
+        return result
+
+    def _validate(self, code: str, size: int) -> ValidationResult:
+        visitor = _RuleVisitor()
+        if size > 100_000:
+            visitor.add_error("Code exceeds max size 100KB")
 
         try:
             tree = ast.parse(code)
         except SyntaxError as exc:
-            return ValidationResult(ok=False, errors=[f"Syntax error: {exc.msg} at line {exc.lineno}"])
-
-        has_required_import = False
-        has_scene = False
-        has_construct = False
-
-        for node in ast.walk(tree):
-            if isinstance(node, ast.ImportFrom):
-                if node.module == "manim":
-                    has_required_import = True
-                elif node.module and node.module.split(".")[0] in FORBIDDEN_IMPORTS:
-                    add_error(f"Forbidden import from: {node.module}")
-
-            if isinstance(node, ast.Import):
-                for alias in node.names:
-                    root = alias.name.split(".")[0]
-                    if root in FORBIDDEN_IMPORTS:
-                        add_error(f"Forbidden import: {alias.name}")
-
-            if isinstance(node, ast.Call):
-                fn_name = None
-                if isinstance(node.func, ast.Name):
-                    fn_name = node.func.id
-                elif isinstance(node.func, ast.Attribute):
-                    fn_name = node.func.attr
-                if fn_name in FORBIDDEN_CALLS:
-                    add_error(f"Forbidden call: {fn_name}")
-
-            if isinstance(node, ast.ClassDef) and node.name == "GeneratedScene":
-                for base in node.bases:
-                    if isinstance(base, ast.Name) and base.id == "Scene":
-                        has_scene = True
-
-                defined_methods = {
-                    child.name for child in node.body if isinstance(child, ast.FunctionDef)
-                }
-                for child in node.body:
-                    if isinstance(child, ast.FunctionDef) and child.name == "construct":
-                        has_construct = True
-
-                for class_node in ast.walk(node):
-                    if not isinstance(class_node, ast.Call):
-                        continue
-                    if not isinstance(class_node.func, ast.Attribute):
-                        continue
-                    if not isinstance(class_node.func.value, ast.Name):
-                        continue
-                    if class_node.func.value.id != "self":
-                        continue
-
-                    method_name = class_node.func.attr
-                    if method_name in defined_methods:
-                        continue
-                    if method_name in KNOWN_SCENE_METHODS:
-                        continue
-
-                    line = getattr(class_node, "lineno", "?")
-                    if method_name.startswith("_"):
-                        add_error(
-                            f"Undefined private method on self at line {line}: self.{method_name}(...). "
-                            "Do not invent private Scene helpers unless defined in class."
-                        )
-                    else:
-                        add_error(
-                            f"Unknown Scene method at line {line}: self.{method_name}(...). "
-                            "Use valid Manim Scene APIs or define the helper method in class."
-                        )
-
-        if not has_required_import:
-            add_error("Missing required import: from manim import *")
-        if not has_scene:
-            add_error("Missing required class: GeneratedScene(Scene)")
-        if not has_construct:
-            add_error("Missing required method: construct(self)")
-
-        return ValidationResult(ok=not errors, errors=errors)
+            return ValidationResult(
+                ok=False, errors=[f"Syntax error: {exc.msg} at line {exc.lineno}"]
+            )
+
+        visitor.visit(tree)
+        if not visitor.has_required_import:
+            visitor.add_error("Missing required import: from manim import *")
+        if not visitor.has_scene:
+            visitor.add_error("Missing required class: GeneratedScene(Scene)")
+        if not visitor.has_construct:
+            visitor.add_error("Missing required method: construct(self)")
+
+        result = ValidationResult(ok=not visitor.errors, errors=visitor.errors, source=code)
+        result._tree = tree
+        return result
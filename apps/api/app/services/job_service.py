@@ -1,21 +1,148 @@
 from __future__ import annotations
 
+import asyncio
 import json
+import logging
 import uuid
+from collections import defaultdict
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterable
 from datetime import UTC, datetime
 from threading import Lock
-from typing import Any
+from typing import Any, TypeVar
 
 from redis import Redis
+from redis.asyncio import ConnectionPool as AsyncConnectionPool
+from redis.asyncio import Redis as AsyncRedis
+from redis.exceptions import RedisError, ResponseError
 
 from app.core.config import get_settings
-from app.domain.enums import JobStatus
+from app.domain.enums import TERMINAL_STATUSES, JobStatus
+
+logger = logging.getLogger(__name__)
+T = TypeVar("T")
+
+BOOL_FIELDS = {"preview_ready"}
+INT_FIELDS = {"progress", "estimated_render_sec"}
+JobListener = Callable[[dict[str, Any]], None]
+# Fields a follower job copies from its leader while the leader is still running.
+MIRRORED_FIELDS = ("status", "stage", "progress", "error", "preview_ready")
+NULLABLE_FIELDS = {"error", "video_path", "leader_job_id", "estimated_render_sec"}
+
+# KEYS[1] = job hash. ARGV = allowed current statuses (comma-separated, "" for any),
+# pub/sub channel for the updated job, number of field/value pairs to HSET, the
+# pairs, then field names to HDEL. Returns nil for a missing job, an empty list
+# when the status guard rejects the update, and the full hash otherwise.
+UPDATE_JOB_SCRIPT = """
+if redis.call("EXISTS", KEYS[1]) == 0 then
+    return nil
+end
+if ARGV[1] ~= "" then
+    local current = redis.call("HGET", KEYS[1], "status")
+    local allowed = false
+    for status in string.gmatch(ARGV[1], "[^,]+") do
+        if status == current then
+            allowed = true
+        end
+    end
+    if not allowed then
+        return {}
+    end
+end
+local pairs_count = tonumber(ARGV[3])
+local first_del = 4 + pairs_count * 2
+if pairs_count > 0 then
+    redis.call("HSET", KEYS[1], unpack(ARGV, 4, first_del - 1))
+end
+if first_del <= #ARGV then
+    redis.call("HDEL", KEYS[1], unpack(ARGV, first_del, #ARGV))
+end
+local flat = redis.call("HGETALL", KEYS[1])
+local item = {}
+for i = 1, #flat, 2 do
+    item[flat[i]] = flat[i + 1]
+end
+redis.call("PUBLISH", ARGV[2], cjson.encode(item))
+return flat
+"""
+
+# Jobs written before jobs became hashes are JSON strings under the same key. KEYS[1] =
+# job key; rewrites such a key as a hash in place (nulls dropped, booleans encoded the
+# way _encode_value does). Returns 1 if it migrated the key, 0 otherwise.
+MIGRATE_JOB_SCRIPT = """
+if redis.call("TYPE", KEYS[1]).ok ~= "string" then
+    return 0
+end
+local item = cjson.decode(redis.call("GET", KEYS[1]))
+local ttl = redis.call("PTTL", KEYS[1])
+redis.call("DEL", KEYS[1])
+for field, value in pairs(item) do
+    if value ~= cjson.null then
+        if type(value) == "boolean" then
+            value = value and "True" or "False"
+        end
+        redis.call("HSET", KEYS[1], field, tostring(value))
+    end
+end
+if ttl > 0 then
+    redis.call("PEXPIRE", KEYS[1], ttl)
+end
+return 1
+"""
+
+
+def _is_legacy_error(error: object) -> bool:
+    # Hash commands (and the update script) on a legacy JSON string key fail with WRONGTYPE.
+    return isinstance(error, ResponseError) and "WRONGTYPE" in str(error)
+
+
+def _encode_value(value: Any) -> str:
+    return str(value)
+
+
+def _decode_job(raw: dict[str, str]) -> dict[str, Any] | None:
+    if not raw:
+        return None
+    item: dict[str, Any] = dict(raw)
+    for name in INT_FIELDS:
+        if name in item:
+            item[name] = int(item[name])
+    for name in BOOL_FIELDS:
+        if name in item:
+            item[name] = item[name] == _encode_value(True)
+    for name in NULLABLE_FIELDS:
+        item.setdefault(name, None)
+    return item
+
+
+def _decode_fields(fields: tuple[str, ...], values: list[str | None]) -> dict[str, Any] | None:
+    # values[0] is the job_id, fetched alongside the requested fields to detect missing jobs.
+    if values[0] is None:
+        return None
+    raw = {name: value for name, value in zip(fields, values[1:], strict=True) if value is not None}
+    item = _decode_job({**raw, "job_id": values[0]})
+    return {name: item.get(name) for name in fields}
+
+
+def _pairs_to_dict(flat: list[str]) -> dict[str, str]:
+    return dict(zip(flat[::2], flat[1::2], strict=True))
 
 
 class JobService:
+    """Job state stored as one Redis hash per job.
+
+    Updates run as a single Lua call (HSET + HDEL + HGETALL), so each progress tick
+    is one round trip and concurrent writers never overwrite each other's fields.
+
+    A job can have followers: duplicate submissions attached to it while it runs.
+    Non-terminal updates are mirrored onto them; the render worker settles them
+    once the leader finishes.
+    """
+
     def __init__(self) -> None:
         self.settings = get_settings()
         self._mem: dict[str, dict[str, Any]] = {}
+        self._listeners: defaultdict[str, list[JobListener]] = defaultdict(list)
+        self._followers: defaultdict[str, list[str]] = defaultdict(list)
         self._lock = Lock()
         self._redis: Redis | None = None
         try:
@@ -23,6 +150,12 @@ class JobService:
             self._redis.ping()
         except Exception:
             self._redis = None
+        self._update_script = (
+            self._redis.register_script(UPDATE_JOB_SCRIPT) if self._redis else None
+        )
+        self._migrate_script = (
+            self._redis.register_script(MIGRATE_JOB_SCRIPT) if self._redis else None
+        )
 
     def _now(self) -> str:
         return datetime.now(UTC).isoformat()
@@ -30,10 +163,29 @@ class JobService:
     def _key(self, job_id: str) -> str:
         return f"job:{job_id}"
 
-    def create_job(self) -> dict[str, Any]:
+    def _channel(self, job_id: str) -> str:
+        return f"job-events:{job_id}"
+
+    def _followers_key(self, job_id: str) -> str:
+        return f"job:{job_id}:followers"
+
+    def add_listener(self, job_id: str, callback: JobListener) -> None:
+        """Register an in-process callback for updates when Redis pub/sub is unavailable."""
+        with self._lock:
+            self._listeners[job_id].append(callback)
+
+    def remove_listener(self, job_id: str, callback: JobListener) -> None:
+        with self._lock:
+            listeners = self._listeners.get(job_id, [])
+            if callback in listeners:
+                listeners.remove(callback)
+            if not listeners:
+                self._listeners.pop(job_id, None)
+
+    def _new_job(self) -> dict[str, Any]:
         job_id = f"job_{uuid.uuid4().hex[:12]}"
         now = self._now()
-        payload = {
+        return {
             "job_id": job_id,
             "status": JobStatus.QUEUED.value,
             "progress": 0,
@@ -44,32 +196,381 @@ class JobService:
             "video_path": None,
         }
 
+    def _with_legacy(self, job_id: str, call: Callable[[], T]) -> T:
+        """Run ``call``, migrating a legacy JSON job key and retrying once if it hits one."""
+        try:
+            return call()
+        except ResponseError as exc:
+            if not _is_legacy_error(exc):
+                raise
+        self._migrate_script(keys=[self._key(job_id)])
+        return call()
+
+    def _read_hash(self, job_id: str) -> dict[str, str]:
+        key = self._key(job_id)
+        return self._with_legacy(job_id, lambda: self._redis.hgetall(key))
+
+    def _hash_mapping(self, payload: dict[str, Any]) -> dict[str, str]:
+        return {name: _encode_value(value) for name, value in payload.items() if value is not None}
+
+    def _script_args(
+        self, job_id: str, updates: dict[str, Any], from_statuses: Iterable[str] | None
+    ) -> list[str]:
+        updates = {**updates, "updated_at": self._now()}
+        to_set = self._hash_mapping(updates)
+        to_delete = [name for name, value in updates.items() if value is None]
+        guard = ",".join(_encode_value(status) for status in from_statuses) if from_statuses else ""
+        args = [guard, self._channel(job_id), str(len(to_set))]
+        for name, value in to_set.items():
+            args.extend([name, value])
+        args.extend(to_delete)
+        return args
+
+    def _mem_update(
+        self, job_id: str, updates: dict[str, Any], from_statuses: Iterable[str] | None
+    ) -> dict[str, Any] | None:
+        with self._lock:
+            item = self._mem.get(job_id)
+            if not item:
+                return None
+            if from_statuses and item["status"] not in {_encode_value(s) for s in from_statuses}:
+                return None
+            item.update(updates)
+            item["updated_at"] = self._now()
+            snapshot = dict(item)
+            listeners = list(self._listeners.get(job_id, []))
+        for callback in listeners:
+            callback(dict(snapshot))
+        return snapshot
+
+    def create_job(self, **fields: Any) -> dict[str, Any]:
+        payload = {**self._new_job(), **fields}
+        job_id = payload["job_id"]
+
         if self._redis:
-            self._redis.set(self._key(job_id), json.dumps(payload))
+            self._redis.hset(self._key(job_id), mapping=self._hash_mapping(payload))
             return payload
 
         with self._lock:
             self._mem[job_id] = payload
-        return payload
+        return dict(payload)
 
     def get_job(self, job_id: str) -> dict[str, Any] | None:
         if self._redis:
-            value = self._redis.get(self._key(job_id))
-            return json.loads(value) if value else None
-        return self._mem.get(job_id)
+            return _decode_job(self._read_hash(job_id))
+        with self._lock:
+            item = self._mem.get(job_id)
+            return dict(item) if item else None
+
+    def get_job_fields(self, job_id: str, *fields: str) -> dict[str, Any] | None:
+        if not self._redis:
+            item = self.get_job(job_id)
+            return {name: item.get(name) for name in fields} if item else None
+        key = self._key(job_id)
+        values = self._with_legacy(job_id, lambda: self._redis.hmget(key, ["job_id", *fields]))
+        return _decode_fields(fields, values)
+
+    def get_jobs(self, job_ids: list[str]) -> list[dict[str, Any] | None]:
+        if not self._redis:
+            return [self.get_job(job_id) for job_id in job_ids]
+        pipe = self._redis.pipeline(transaction=False)
+        for job_id in job_ids:
+            pipe.hgetall(self._key(job_id))
+        results = pipe.execute(raise_on_error=False)
+        for index, (job_id, raw) in enumerate(zip(job_ids, results, strict=True)):
+            if isinstance(raw, Exception):
+                if not _is_legacy_error(raw):
+                    raise raw
+                results[index] = self._read_hash(job_id)
+        return [_decode_job(raw) for raw in results]
+
+    def transition_job(
+        self, job_id: str, from_statuses: Iterable[str], **updates: Any
+    ) -> dict[str, Any] | None:
+        """Apply ``updates`` only if the job's current status is one of ``from_statuses``."""
+        return self._apply(job_id, updates, list(from_statuses))
 
     def update_job(self, job_id: str, **updates: Any) -> dict[str, Any] | None:
-        item = self.get_job(job_id)
-        if not item:
-            return None
+        return self._apply(job_id, updates, None)
 
-        item.update(updates)
-        item["updated_at"] = self._now()
+    def add_follower(self, leader_id: str, follower_id: str) -> None:
+        if not self._redis:
+            with self._lock:
+                self._followers[leader_id].append(follower_id)
+            return
+        self._redis.rpush(self._followers_key(leader_id), follower_id)
 
-        if self._redis:
-            self._redis.set(self._key(job_id), json.dumps(item))
-        else:
+    def followers(self, leader_id: str) -> list[str]:
+        if not self._redis:
             with self._lock:
-                self._mem[job_id] = item
+                return list(self._followers.get(leader_id, []))
+        return self._redis.lrange(self._followers_key(leader_id), 0, -1)
 
+    def remove_follower(self, leader_id: str, follower_id: str) -> bool:
+        """Detach a follower; returns False if someone else already removed it."""
+        if not self._redis:
+            with self._lock:
+                followers = self._followers.get(leader_id, [])
+                if follower_id not in followers:
+                    return False
+                followers.remove(follower_id)
+                return True
+        return self._redis.lrem(self._followers_key(leader_id), 0, follower_id) > 0
+
+    def drain_followers(self, leader_id: str) -> list[str]:
+        """Atomically detach and return all followers of ``leader_id``, oldest first."""
+        if not self._redis:
+            with self._lock:
+                return self._followers.pop(leader_id, [])
+        pipe = self._redis.pipeline(transaction=True)
+        pipe.lrange(self._followers_key(leader_id), 0, -1)
+        pipe.delete(self._followers_key(leader_id))
+        followers, _ = pipe.execute()
+        return followers
+
+    def _apply(
+        self, job_id: str, updates: dict[str, Any], from_statuses: list[str] | None
+    ) -> dict[str, Any] | None:
+        if not self._redis:
+            item = self._mem_update(job_id, updates, from_statuses)
+            with self._lock:
+                followers = list(self._followers.get(job_id, []))
+        else:
+
+            def update() -> list[Any]:
+                pipe = self._redis.pipeline(transaction=False)
+                self._update_script(
+                    keys=[self._key(job_id)],
+                    args=self._script_args(job_id, updates, from_statuses),
+                    client=pipe,
+                )
+                pipe.lrange(self._followers_key(job_id), 0, -1)
+                return pipe.execute()
+
+            result, followers = self._with_legacy(job_id, update)
+            item = _decode_job(_pairs_to_dict(result)) if result else None
+        if item and followers:
+            self._mirror(followers, updates)
         return item
+
+    def _mirror(self, follower_ids: list[str], updates: dict[str, Any]) -> None:
+        # Terminal states are not mirrored: followers of a finished leader get their own
+        # copy of the video, followers of a failed one take over the render.
+        if updates.get("status") in TERMINAL_STATUSES:
+            return
+        mirrored = {name: updates[name] for name in MIRRORED_FIELDS if name in updates}
+        if not mirrored:
+            return
+        if not self._redis:
+            for follower_id in follower_ids:
+                self._mem_update(follower_id, mirrored, None)
+            return
+        pipe = self._redis.pipeline(transaction=False)
+        for follower_id in follower_ids:
+            self._update_script(
+                keys=[self._key(follower_id)],
+                args=self._script_args(follower_id, mirrored, None),
+                client=pipe,
+            )
+        pipe.execute()
+
+
+class JobEventHub:
+    """One ``PSUBSCRIBE job-events:*`` connection per process, fanned out to in-process
+    queues, so open status streams do not each hold a Redis connection.
+
+    Uses its own client, so subscribers never take connections from the pool that
+    serves ``/status``. The listener reconnects on errors; updates published while it
+    is down are caught up by watchers re-reading the job on their heartbeat.
+    """
+
+    CHANNEL_PREFIX = "job-events:"
+    RECONNECT_DELAY_SEC = 1.0
+
+    def __init__(self, redis_url: str) -> None:
+        self._redis = AsyncRedis.from_url(redis_url, decode_responses=True)
+        self._subscribers: dict[str, set[asyncio.Queue[dict[str, Any]]]] = defaultdict(set)
+        self._task: asyncio.Task[None] | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._ready = asyncio.Event()
+
+    async def subscribe(self, job_id: str) -> asyncio.Queue[dict[str, Any]]:
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._loop is not loop:
+            self._loop = loop
+            self._ready = asyncio.Event()
+            self._task = asyncio.create_task(self._listen())
+        updates: asyncio.Queue[dict[str, Any]] = asyncio.Queue()
+        self._subscribers[job_id].add(updates)
+        await self._ready.wait()
+        return updates
+
+    def unsubscribe(self, job_id: str, updates: asyncio.Queue[dict[str, Any]]) -> None:
+        queues = self._subscribers.get(job_id)
+        if queues is None:
+            return
+        queues.discard(updates)
+        if not queues:
+            del self._subscribers[job_id]
+
+    def dispatch(self, channel: str, data: str) -> None:
+        queues = self._subscribers.get(channel.removeprefix(self.CHANNEL_PREFIX))
+        if not queues:
+            return
+        item = _decode_job(json.loads(data))
+        for updates in queues:
+            updates.put_nowait(item)
+
+    async def _listen(self) -> None:
+        while True:
+            pubsub = self._redis.pubsub()
+            try:
+                await pubsub.psubscribe(f"{self.CHANNEL_PREFIX}*")
+                self._ready.set()
+                async for message in pubsub.listen():
+                    if message["type"] == "pmessage":
+                        self.dispatch(message["channel"], message["data"])
+            except (OSError, RedisError) as exc:
+                logger.warning("Job event listener lost Redis, reconnecting: %s", exc)
+                # Let waiting subscribers proceed; their heartbeat re-reads cover the gap.
+                self._ready.set()
+                await asyncio.sleep(self.RECONNECT_DELAY_SEC)
+            finally:
+                await pubsub.aclose()
+
+
+class AsyncJobService:
+    """``redis.asyncio`` variant of ``JobService`` for async route handlers.
+
+    Falls back to the wrapped ``JobService`` in-memory store when Redis is
+    unavailable, so jobs created by sync handlers stay visible here.
+    """
+
+    def __init__(self, jobs: JobService) -> None:
+        self.settings = jobs.settings
+        self._jobs = jobs
+        self._redis: AsyncRedis | None = None
+        if jobs._redis is not None:
+            pool = AsyncConnectionPool.from_url(
+                self.settings.redis_url,
+                decode_responses=True,
+                max_connections=self.settings.redis_max_connections,
+            )
+            self._redis = AsyncRedis(connection_pool=pool)
+        self._events = JobEventHub(self.settings.redis_url) if self._redis else None
+        self._update_script = (
+            self._redis.register_script(UPDATE_JOB_SCRIPT) if self._redis else None
+        )
+        self._migrate_script = (
+            self._redis.register_script(MIGRATE_JOB_SCRIPT) if self._redis else None
+        )
+
+    async def _with_legacy(self, job_id: str, call: Callable[[], Awaitable[T]]) -> T:
+        try:
+            return await call()
+        except ResponseError as exc:
+            if not _is_legacy_error(exc):
+                raise
+        await self._migrate_script(keys=[self._jobs._key(job_id)])
+        return await call()
+
+    async def _read_hash(self, job_id: str) -> dict[str, str]:
+        key = self._jobs._key(job_id)
+        return await self._with_legacy(job_id, lambda: self._redis.hgetall(key))
+
+    async def create_job(self, **fields: Any) -> dict[str, Any]:
+        if not self._redis:
+            return self._jobs.create_job(**fields)
+        payload = {**self._jobs._new_job(), **fields}
+        await self._redis.hset(
+            self._jobs._key(payload["job_id"]), mapping=self._jobs._hash_mapping(payload)
+        )
+        return payload
+
+    async def get_job(self, job_id: str) -> dict[str, Any] | None:
+        if not self._redis:
+            return self._jobs.get_job(job_id)
+        return _decode_job(await self._read_hash(job_id))
+
+    async def get_job_fields(self, job_id: str, *fields: str) -> dict[str, Any] | None:
+        if not self._redis:
+            return self._jobs.get_job_fields(job_id, *fields)
+        key = self._jobs._key(job_id)
+        values = await self._with_legacy(
+            job_id, lambda: self._redis.hmget(key, ["job_id", *fields])
+        )
+        return _decode_fields(fields, values)
+
+    async def get_jobs(self, job_ids: list[str]) -> list[dict[str, Any] | None]:
+        if not self._redis:
+            return self._jobs.get_jobs(job_ids)
+        pipe = self._redis.pipeline(transaction=False)
+        for job_id in job_ids:
+            pipe.hgetall(self._jobs._key(job_id))
+        results = await pipe.execute(raise_on_error=False)
+        for index, (job_id, raw) in enumerate(zip(job_ids, results, strict=True)):
+            if isinstance(raw, Exception):
+                if not _is_legacy_error(raw):
+                    raise raw
+                results[index] = await self._read_hash(job_id)
+        return [_decode_job(raw) for raw in results]
+
+    async def watch(
+        self, job_id: str, heartbeat_sec: float
+    ) -> AsyncIterator[dict[str, Any] | None]:
+        """Yield the job now and after every update until it reaches a terminal status.
+
+        Yields ``None`` after ``heartbeat_sec`` without updates so callers can keep
+        idle connections alive. Yields nothing if the job does not exist.
+        """
+        if not self._redis:
+            async for item in self._watch_local(job_id, heartbeat_sec):
+                yield item
+            return
+
+        updates = await self._events.subscribe(job_id)
+        try:
+            # Read after subscribing so no update can slip between the two.
+            item = await self.get_job(job_id)
+            if item is None:
+                return
+            yield item
+            while item["status"] not in TERMINAL_STATUSES:
+                try:
+                    item = await asyncio.wait_for(updates.get(), timeout=heartbeat_sec)
+                except TimeoutError:
+                    latest = await self.get_job(job_id)
+                    if latest is None:
+                        return
+                    if latest["updated_at"] == item["updated_at"]:
+                        yield None
+                        continue
+                    item = latest  # missed while the event listener was reconnecting
+                yield item
+        finally:
+            self._events.unsubscribe(job_id, updates)
+
+    async def _watch_local(
+        self, job_id: str, heartbeat_sec: float
+    ) -> AsyncIterator[dict[str, Any] | None]:
+        loop = asyncio.get_running_loop()
+        updates: asyncio.Queue[dict[str, Any]] = asyncio.Queue()
+
+        def on_update(item: dict[str, Any]) -> None:
+            loop.call_soon_threadsafe(updates.put_nowait, item)
+
+        self._jobs.add_listener(job_id, on_update)
+        try:
+            item = self._jobs.get_job(job_id)
+            if item is None:
+                return
+            yield item
+            while item["status"] not in TERMINAL_STATUSES:
+                try:
+                    item = await asyncio.wait_for(updates.get(), timeout=heartbeat_sec)
+                except TimeoutError:
+                    yield None
+                    continue
+                yield item
+        finally:
+            self._jobs.remove_listener(job_id, on_update)
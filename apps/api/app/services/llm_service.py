@@ -1,35 +1,39 @@
+import json
 import logging
 import re
+from collections.abc import AsyncIterator
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from typing import Any
 
 import httpx
-from openai import BadRequestError, OpenAI
+from openai import AsyncOpenAI, BadRequestError, OpenAI
 
 from app.core.config import get_settings
 from app.schemas.generate import GenerateRequest
-from app.services.prompt_builder import build_generation_prompt
+from app.services.prompt_builder import (
+    PROMPT_PREFIX,
+    build_fix_prompt,
+    build_generation_prompt,
+    build_regenerate_prompt,
+)
 
 logger = logging.getLogger(__name__)
 
 
-class LLMService:
+@dataclass
+class StreamEvent:
+    """One step of a streamed generation: a text delta, or the final code once ``code`` is set."""
+
+    delta: str = ""
+    code: str | None = None
+    warnings: list[str] = field(default_factory=list)
+
+
+class _LLMServiceBase:
     def __init__(self) -> None:
         self.settings = get_settings()
         self.provider = self.settings.llm_provider.strip().lower()
-        self.openai_client = OpenAI(api_key=self.settings.openai_api_key) if self.settings.openai_api_key else None
-        self.hf_router_client = (
-            OpenAI(
-                base_url=self.settings.hf_router_base_url.rstrip("/"),
-                api_key=self.settings.hf_api_token,
-            )
-            if self.settings.hf_api_token
-            else None
-        )
-        self.ollama_client = httpx.Client(
-            base_url=self.settings.ollama_base_url.rstrip("/"),
-            timeout=self.settings.llm_request_timeout_sec,
-        )
-        self.hf_client = httpx.Client(timeout=self.settings.llm_request_timeout_sec)
 
     @property
     def model_name(self) -> str:
@@ -56,16 +60,33 @@ class GeneratedScene(Scene):
         self.wait(1)
 '''
 
-    def _ollama_generate(self, prompt: str, temperature: float | None = None) -> str:
+    def _fallback_generation(
+        self, payload: GenerateRequest, exc: Exception
+    ) -> tuple[str, list[str]]:
+        logger.warning("Primary LLM generation failed, using fallback template: %s", exc)
+        message = str(exc).strip()
+        if len(message) > 260:
+            message = f"{message[:260]}..."
+        return self._fallback_code(payload.topic), [
+            f"LLM unavailable ({self.provider}): {message}. Using fallback template"
+        ]
+
+    def _ollama_payload(self, prompt: str, temperature: float | None) -> dict[str, object]:
         payload: dict[str, object] = {
             "model": self.settings.ollama_model,
             "prompt": prompt,
             "stream": False,
         }
+        keep_alive = self.settings.ollama_keep_alive.strip()
+        if keep_alive:
+            # Ollama takes a duration ("30m") or a number of seconds (-1 keeps it loaded).
+            numeric = keep_alive.lstrip("-").isdigit()
+            payload["keep_alive"] = int(keep_alive) if numeric else keep_alive
         if temperature is not None:
             payload["options"] = {"temperature": temperature}
+        return payload
 
-        response = self.ollama_client.post("/api/generate", json=payload)
+    def _parse_ollama_response(self, response: httpx.Response) -> str:
         if response.is_error:
             detail = response.text.strip()
             raise RuntimeError(f"Ollama error {response.status_code}: {detail}")
@@ -75,28 +96,18 @@ class GeneratedScene(Scene):
             raise RuntimeError("Ollama returned empty response")
         return text
 
-    def _openai_generate(self, prompt: str, temperature: float | None = None) -> str:
-        if not self.openai_client:
-            raise RuntimeError("OpenAI client not initialized")
-
-        payload = {
+    def _openai_payload(self, prompt: str, temperature: float | None) -> dict[str, object]:
+        payload: dict[str, object] = {
             "model": self.settings.openai_model,
             "input": prompt,
         }
         if temperature is not None:
             payload["temperature"] = temperature
+        return payload
 
-        try:
-            response = self.openai_client.responses.create(**payload)
-        except BadRequestError as exc:
-            message = str(exc).lower()
-            if "temperature" in message and "unsupported" in message and "temperature" in payload:
-                payload.pop("temperature", None)
-                response = self.openai_client.responses.create(**payload)
-            else:
-                raise
-
-        return response.output_text
+    def _is_unsupported_temperature(self, exc: BadRequestError, payload: dict[str, object]) -> bool:
+        message = str(exc).lower()
+        return "temperature" in message and "unsupported" in message and "temperature" in payload
 
     def _extract_hf_text(self, body: Any, prompt: str) -> str:
         text = ""
@@ -131,7 +142,9 @@ class GeneratedScene(Scene):
             raise RuntimeError("HF endpoint returned empty response")
         return text
 
-    def _hf_generate(self, prompt: str, temperature: float | None = None) -> str:
+    def _hf_request(
+        self, prompt: str, temperature: float | None
+    ) -> tuple[str, dict[str, object], dict[str, str]]:
         endpoint_url = self.settings.hf_endpoint_url.strip()
         if not endpoint_url:
             raise RuntimeError("HF_ENDPOINT_URL is not configured")
@@ -152,17 +165,15 @@ class GeneratedScene(Scene):
             "parameters": parameters,
             "options": {"wait_for_model": True},
         }
+        return endpoint_url, payload, headers
 
-        response = self.hf_client.post(endpoint_url, json=payload, headers=headers)
+    def _parse_hf_response(self, response: httpx.Response, prompt: str) -> str:
         if response.is_error:
             detail = response.text.strip()
             raise RuntimeError(f"HF endpoint error {response.status_code}: {detail}")
         return self._extract_hf_text(response.json(), prompt)
 
-    def _hf_router_generate(self, prompt: str, temperature: float | None = None) -> str:
-        if not self.hf_router_client:
-            raise RuntimeError("HF_API_TOKEN is not configured for hf_router provider")
-
+    def _hf_router_payload(self, prompt: str, temperature: float | None) -> dict[str, object]:
         payload: dict[str, object] = {
             "model": self.settings.hf_model_id,
             "messages": [{"role": "user", "content": prompt}],
@@ -170,8 +181,9 @@ class GeneratedScene(Scene):
         }
         if temperature is not None:
             payload["temperature"] = temperature
+        return payload
 
-        completion = self.hf_router_client.chat.completions.create(**payload)
+    def _parse_hf_router_completion(self, completion: Any) -> str:
         if not completion.choices:
             raise RuntimeError("HF router returned no choices")
 
@@ -190,6 +202,61 @@ class GeneratedScene(Scene):
             raise RuntimeError("HF router returned empty message content")
         return content
 
+
+class LLMService(_LLMServiceBase):
+    def __init__(self) -> None:
+        super().__init__()
+        self.openai_client = OpenAI(api_key=self.settings.openai_api_key) if self.settings.openai_api_key else None
+        self.hf_router_client = (
+            OpenAI(
+                base_url=self.settings.hf_router_base_url.rstrip("/"),
+                api_key=self.settings.hf_api_token,
+            )
+            if self.settings.hf_api_token
+            else None
+        )
+        self.ollama_client = httpx.Client(
+            base_url=self.settings.ollama_base_url.rstrip("/"),
+            timeout=self.settings.llm_request_timeout_sec,
+        )
+        self.hf_client = httpx.Client(timeout=self.settings.llm_request_timeout_sec)
+
+    def _ollama_generate(self, prompt: str, temperature: float | None = None) -> str:
+        response = self.ollama_client.post(
+            "/api/generate", json=self._ollama_payload(prompt, temperature)
+        )
+        return self._parse_ollama_response(response)
+
+    def _openai_generate(self, prompt: str, temperature: float | None = None) -> str:
+        if not self.openai_client:
+            raise RuntimeError("OpenAI client not initialized")
+
+        payload = self._openai_payload(prompt, temperature)
+        try:
+            response = self.openai_client.responses.create(**payload)
+        except BadRequestError as exc:
+            if self._is_unsupported_temperature(exc, payload):
+                payload.pop("temperature", None)
+                response = self.openai_client.responses.create(**payload)
+            else:
+                raise
+
+        return response.output_text
+
+    def _hf_generate(self, prompt: str, temperature: float | None = None) -> str:
+        endpoint_url, payload, headers = self._hf_request(prompt, temperature)
+        response = self.hf_client.post(endpoint_url, json=payload, headers=headers)
+        return self._parse_hf_response(response, prompt)
+
+    def _hf_router_generate(self, prompt: str, temperature: float | None = None) -> str:
+        if not self.hf_router_client:
+            raise RuntimeError("HF_API_TOKEN is not configured for hf_router provider")
+
+        completion = self.hf_router_client.chat.completions.create(
+            **self._hf_router_payload(prompt, temperature)
+        )
+        return self._parse_hf_router_completion(completion)
+
     def _generate(self, prompt: str, temperature: float | None = None) -> str:
         if self.provider == "ollama":
             return self._ollama_generate(prompt=prompt, temperature=temperature)
@@ -207,58 +274,231 @@ class GeneratedScene(Scene):
             raw = self._generate(prompt=prompt, temperature=0.2)
             return self._extract_code(raw), []
         except Exception as exc:
-            logger.warning("Primary LLM generation failed, using fallback template: %s", exc)
-            message = str(exc).strip()
-            if len(message) > 260:
-                message = f"{message[:260]}..."
-            return self._fallback_code(payload.topic), [
-                f"LLM unavailable ({self.provider}): {message}. Using fallback template"
-            ]
-
-    def fix_code(self, code: str, error: str) -> str:
-        prompt = f"""
-Fix the following Manim script.
-Constraints:
-- Keep `GeneratedScene(Scene)` and `construct(self)`.
-- Use only `from manim import *`.
-- No unsafe imports or system/file/network calls.
-- Return code only.
-- Do not call undefined/private methods on `self` (for example `_set_background`, `_add_area`).
-- Do not invent methods like `play_and_wait`; use valid Scene APIs such as `play(...)` and `wait(...)`.
-- If you need helper methods, define them explicitly in `GeneratedScene`.
-- Ensure final code can render directly with `manim ... GeneratedScene`.
-
-Runtime error:
-{error}
-
-Code:
-{code}
-""".strip()
+            return self._fallback_generation(payload, exc)
 
+    def fix_code(self, code: str, error: str, temperature: float = 0.1) -> str:
         try:
-            raw = self._generate(prompt=prompt, temperature=0.1)
+            raw = self._generate(prompt=build_fix_prompt(code, error), temperature=temperature)
             return self._extract_code(raw)
         except Exception:
             return code
 
+    def fix_code_candidates(self, code: str, error: str, temperatures: list[float]) -> list[str]:
+        """Ask for one fix per temperature concurrently; distinct non-empty results in
+        temperature order. Falls back to ``[code]`` when every request fails.
+        """
+        with ThreadPoolExecutor(max_workers=len(temperatures)) as executor:
+            fixes = list(executor.map(lambda t: self.fix_code(code, error, t), temperatures))
+        candidates = list(dict.fromkeys(fix for fix in fixes if fix.strip() and fix != code))
+        return candidates or [code]
+
     def regenerate_with_instruction(self, code: str, instruction: str) -> str:
-        prompt = f"""
-Revise this Manim script based on the instruction.
-Constraints:
-- Keep `GeneratedScene(Scene)` and `construct(self)`.
-- Use only `from manim import *`.
-- No unsafe imports or system/file/network calls.
-- Return code only.
+        try:
+            raw = self._generate(prompt=build_regenerate_prompt(code, instruction), temperature=0.2)
+            return self._extract_code(raw)
+        except Exception:
+            return code
+
+
+class AsyncLLMService(_LLMServiceBase):
+    """Non-blocking counterpart of ``LLMService`` for async route handlers.
+
+    Uses ``AsyncOpenAI`` and pooled ``httpx.AsyncClient`` instances so a slow
+    provider call holds an event-loop task rather than a threadpool thread.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        limits = httpx.Limits(
+            max_connections=self.settings.llm_max_connections,
+            max_keepalive_connections=self.settings.llm_max_connections,
+        )
+        self.openai_client = (
+            AsyncOpenAI(api_key=self.settings.openai_api_key)
+            if self.settings.openai_api_key
+            else None
+        )
+        self.hf_router_client = (
+            AsyncOpenAI(
+                base_url=self.settings.hf_router_base_url.rstrip("/"),
+                api_key=self.settings.hf_api_token,
+            )
+            if self.settings.hf_api_token
+            else None
+        )
+        self.ollama_client = httpx.AsyncClient(
+            base_url=self.settings.ollama_base_url.rstrip("/"),
+            timeout=self.settings.llm_request_timeout_sec,
+            limits=limits,
+        )
+        self.hf_client = httpx.AsyncClient(
+            timeout=self.settings.llm_request_timeout_sec, limits=limits
+        )
 
-Instruction:
-{instruction}
+    async def _ollama_generate(self, prompt: str, temperature: float | None = None) -> str:
+        response = await self.ollama_client.post(
+            "/api/generate", json=self._ollama_payload(prompt, temperature)
+        )
+        return self._parse_ollama_response(response)
 
-Code:
-{code}
-""".strip()
+    async def _openai_generate(self, prompt: str, temperature: float | None = None) -> str:
+        if not self.openai_client:
+            raise RuntimeError("OpenAI client not initialized")
 
+        payload = self._openai_payload(prompt, temperature)
         try:
-            raw = self._generate(prompt=prompt, temperature=0.2)
+            response = await self.openai_client.responses.create(**payload)
+        except BadRequestError as exc:
+            if self._is_unsupported_temperature(exc, payload):
+                payload.pop("temperature", None)
+                response = await self.openai_client.responses.create(**payload)
+            else:
+                raise
+
+        return response.output_text
+
+    async def _hf_generate(self, prompt: str, temperature: float | None = None) -> str:
+        endpoint_url, payload, headers = self._hf_request(prompt, temperature)
+        response = await self.hf_client.post(endpoint_url, json=payload, headers=headers)
+        return self._parse_hf_response(response, prompt)
+
+    async def _hf_router_generate(self, prompt: str, temperature: float | None = None) -> str:
+        if not self.hf_router_client:
+            raise RuntimeError("HF_API_TOKEN is not configured for hf_router provider")
+
+        completion = await self.hf_router_client.chat.completions.create(
+            **self._hf_router_payload(prompt, temperature)
+        )
+        return self._parse_hf_router_completion(completion)
+
+    async def _ollama_stream(
+        self, prompt: str, temperature: float | None = None
+    ) -> AsyncIterator[str]:
+        payload = self._ollama_payload(prompt, temperature)
+        payload["stream"] = True
+        async with self.ollama_client.stream("POST", "/api/generate", json=payload) as response:
+            if response.is_error:
+                await response.aread()
+                raise RuntimeError(f"Ollama error {response.status_code}: {response.text.strip()}")
+            async for line in response.aiter_lines():
+                if not line.strip():
+                    continue
+                chunk = json.loads(line)
+                if chunk.get("error"):
+                    raise RuntimeError(f"Ollama error: {chunk['error']}")
+                text = chunk.get("response")
+                if isinstance(text, str) and text:
+                    yield text
+                if chunk.get("done"):
+                    return
+
+    async def _openai_stream(
+        self, prompt: str, temperature: float | None = None
+    ) -> AsyncIterator[str]:
+        if not self.openai_client:
+            raise RuntimeError("OpenAI client not initialized")
+
+        payload = self._openai_payload(prompt, temperature)
+        try:
+            stream = await self.openai_client.responses.create(**payload, stream=True)
+        except BadRequestError as exc:
+            if self._is_unsupported_temperature(exc, payload):
+                payload.pop("temperature", None)
+                stream = await self.openai_client.responses.create(**payload, stream=True)
+            else:
+                raise
+
+        async for event in stream:
+            if event.type == "response.output_text.delta" and event.delta:
+                yield event.delta
+
+    async def _hf_router_stream(
+        self, prompt: str, temperature: float | None = None
+    ) -> AsyncIterator[str]:
+        if not self.hf_router_client:
+            raise RuntimeError("HF_API_TOKEN is not configured for hf_router provider")
+
+        stream = await self.hf_router_client.chat.completions.create(
+            **self._hf_router_payload(prompt, temperature), stream=True
+        )
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if isinstance(delta, str) and delta:
+                yield delta
+
+    async def _stream(self, prompt: str, temperature: float | None = None) -> AsyncIterator[str]:
+        if self.provider == "ollama":
+            stream = self._ollama_stream(prompt=prompt, temperature=temperature)
+        elif self.provider == "hf_router":
+            stream = self._hf_router_stream(prompt=prompt, temperature=temperature)
+        elif self.provider == "openai":
+            stream = self._openai_stream(prompt=prompt, temperature=temperature)
+        else:
+            # Dedicated HF endpoints do not stream; emit the whole completion at once.
+            yield await self._generate(prompt=prompt, temperature=temperature)
+            return
+
+        async for delta in stream:
+            yield delta
+
+    async def _generate(self, prompt: str, temperature: float | None = None) -> str:
+        if self.provider == "ollama":
+            return await self._ollama_generate(prompt=prompt, temperature=temperature)
+        if self.provider == "hf_endpoint":
+            return await self._hf_generate(prompt=prompt, temperature=temperature)
+        if self.provider == "hf_router":
+            return await self._hf_router_generate(prompt=prompt, temperature=temperature)
+        if self.provider == "openai":
+            return await self._openai_generate(prompt=prompt, temperature=temperature)
+        raise RuntimeError(f"Unsupported LLM_PROVIDER: {self.provider}")
+
+    async def warm_up(self) -> None:
+        """Load the Ollama model and evaluate ``PROMPT_PREFIX`` so its KV cache is reused.
+
+        Hosted providers need no warm-up; this is a no-op for them.
+        """
+        if self.provider != "ollama":
+            return
+        payload = self._ollama_payload(PROMPT_PREFIX, temperature=None)
+        payload["options"] = {"num_predict": 1}
+        response = await self.ollama_client.post("/api/generate", json=payload)
+        if response.is_error:
+            raise RuntimeError(f"Ollama error {response.status_code}: {response.text.strip()}")
+
+    async def generate_code(self, payload: GenerateRequest) -> tuple[str, list[str]]:
+        prompt = build_generation_prompt(payload)
+        try:
+            raw = await self._generate(prompt=prompt, temperature=0.2)
+            return self._extract_code(raw), []
+        except Exception as exc:
+            return self._fallback_generation(payload, exc)
+
+    async def stream_code(self, payload: GenerateRequest) -> AsyncIterator[StreamEvent]:
+        """Yield text deltas as the provider produces them, then a final event with the code.
+
+        The final event is authoritative: if the provider fails mid-stream it carries the
+        fallback template and a warning instead of the partial text.
+        """
+        prompt = build_generation_prompt(payload)
+        chunks: list[str] = []
+        try:
+            async for delta in self._stream(prompt=prompt, temperature=0.2):
+                chunks.append(delta)
+                yield StreamEvent(delta=delta)
+            code, warnings = self._extract_code("".join(chunks)), []
+            if not code:
+                raise RuntimeError(f"{self.provider} returned empty response")
+        except Exception as exc:
+            code, warnings = self._fallback_generation(payload, exc)
+        yield StreamEvent(code=code, warnings=warnings)
+
+    async def regenerate_with_instruction(self, code: str, instruction: str) -> str:
+        try:
+            raw = await self._generate(
+                prompt=build_regenerate_prompt(code, instruction), temperature=0.2
+            )
             return self._extract_code(raw)
         except Exception:
             return code
@@ -0,0 +1,41 @@
+"""Pre-flight runner: ``python manim_dry_run.py SCRIPT SCENE_CLASS QUALITY MEDIA_DIR``.
+
+Runs the scene's ``construct()`` with animations skipped and no video written, so runtime
+errors surface in seconds. It only needs manim, so the renderer image runs this same file.
+"""
+
+from __future__ import annotations
+
+import runpy
+import sys
+
+MANIM_QUALITY_MAP = {"1080p30": "high_quality", "720p30": "medium_quality", "480p15": "low_quality"}
+
+
+def enable_dry_run(config) -> None:
+    # Setting dry_run resets save_last_frame, which is what skips animations to their end
+    # state, so the order matters (and ``manim --dry_run --save_last_frame`` gets it wrong).
+    config.dry_run = True
+    config.save_last_frame = True
+
+
+def main(argv: list[str]) -> None:
+    from manim import config, tempconfig
+
+    script, scene_class, quality, media_dir = argv
+    namespace = runpy.run_path(script)
+    scene_cls = namespace.get(scene_class)
+    if scene_cls is None:
+        raise SystemExit(f"{scene_class} class not found in script")
+    overrides = {
+        "quality": MANIM_QUALITY_MAP.get(quality, "high_quality"),
+        "media_dir": media_dir,
+        "input_file": script,
+    }
+    with tempconfig(overrides):
+        enable_dry_run(config)
+        scene_cls().render()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import logging
+import os
+import re
+import shutil
+import tempfile
+import time
+from functools import lru_cache
+from pathlib import Path
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Name of the per-render directory Manim is pointed at for its partial movie files.
+PARTIAL_DIR_NAME = "partials"
+# Keeps Manim's own count-based cleanup away from our directory; eviction happens here.
+MANIM_MAX_FILES_CACHED = 1_000_000
+FILE_LIST_NAME = "partial_movie_file_list.txt"
+_PARTIAL_NAME = re.compile(r"^[0-9a-z_]+\.mp4$")
+
+
+def manim_config(partial_dir: str) -> str:
+    """Manim config file contents that send partial movies to ``partial_dir``."""
+    return (
+        f"[CLI]\npartial_movie_dir = {partial_dir}\nmax_files_cached = {MANIM_MAX_FILES_CACHED}\n"
+    )
+
+
+class PartialMovieCache:
+    """Size-bounded LRU store of Manim partial movie files shared across renders.
+
+    Manim names each partial movie after a hash of the animation and skips rendering
+    it when a file of that name already exists in the partial movie directory. Every
+    render gets a private partial directory: ``prepare`` seeds it with symlinks to the
+    cached entries for its quality, and ``collect`` moves newly rendered partials into
+    the cache, refreshes the entries the render used and evicts the least recently
+    used ones beyond ``max_bytes``. Renderers never write into the cache itself, so it
+    can be mounted read-only into the sandbox.
+
+    The scene runs in the same process as Manim and can write its partial directory,
+    so it could plant a file under a predictable animation hash. Only partials that a
+    successful render lists in its file list are admitted, which narrows but does not
+    close that hole: enable the cache only where every script submitter is trusted.
+    """
+
+    def __init__(self, root: str, max_bytes: int) -> None:
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def quality_dir(self, quality: str) -> Path:
+        path = self.root / quality
+        path.mkdir(parents=True, exist_ok=True)
+        return path
+
+    def prepare(self, quality: str, partial_dir: Path, link_root: str | None = None) -> None:
+        """Fill ``partial_dir`` with links to cached partials.
+
+        ``link_root`` is where the renderer sees this quality's cache directory (e.g. a
+        container mount point); defaults to the host path.
+        """
+        partial_dir.mkdir(parents=True, exist_ok=True)
+        source = self.quality_dir(quality)
+        target_root = Path(link_root) if link_root else source
+        for entry in os.scandir(source):
+            if entry.is_file() and _PARTIAL_NAME.match(entry.name):
+                os.symlink(target_root / entry.name, partial_dir / entry.name)
+
+    def collect(self, quality: str, partial_dir: Path, rendered: bool) -> None:
+        """Refresh the cached partials the render used and, if it ``rendered``, admit the
+        new partials it combined into its video."""
+        if not partial_dir.is_dir():
+            return
+        cache_dir = self.quality_dir(quality)
+        now = time.time()
+        used = self._used_names(partial_dir)
+        for name in used:
+            try:
+                os.utime(cache_dir / name, (now, now))
+            except FileNotFoundError:
+                pass
+        if not rendered:
+            return
+        used_names = set(used)
+        for entry in os.scandir(partial_dir):
+            # Symlinks point back into the cache; "uncached_*" files are not reusable.
+            if entry.is_symlink() or not entry.is_file() or entry.name.startswith("uncached_"):
+                continue
+            if (
+                entry.name in used_names
+                and _PARTIAL_NAME.match(entry.name)
+                and not (cache_dir / entry.name).exists()
+            ):
+                self._store(Path(entry.path), cache_dir / entry.name)
+        self._evict()
+
+    def _used_names(self, partial_dir: Path) -> list[str]:
+        file_list = partial_dir / FILE_LIST_NAME
+        if not file_list.exists():
+            return []
+        names = []
+        for line in file_list.read_text(encoding="utf-8").splitlines():
+            # Lines look like: file 'file:/path/to/<hash>.mp4'
+            if line.startswith("file "):
+                names.append(Path(line.strip().rstrip("'")).name)
+        return names
+
+    def _store(self, src: Path, dest: Path) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=dest.parent, suffix=".tmp")
+        os.close(fd)
+        try:
+            shutil.copyfile(src, tmp_path)
+            os.replace(tmp_path, dest)
+        finally:
+            Path(tmp_path).unlink(missing_ok=True)
+
+    def _evict(self) -> None:
+        entries = []
+        total = 0
+        for quality_dir in self.root.iterdir():
+            if not quality_dir.is_dir():
+                continue
+            for entry in os.scandir(quality_dir):
+                if not (entry.is_file() and _PARTIAL_NAME.match(entry.name)):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, Path(entry.path)))
+                total += stat.st_size
+        if total <= self.max_bytes:
+            return
+        # A render still holding a link to an evicted entry fails and is retried.
+        for _, size, path in sorted(entries):
+            path.unlink(missing_ok=True)
+            total -= size
+            if total <= self.max_bytes:
+                break
+        logger.info("Partial movie cache trimmed to %d bytes", total)
+
+
+@lru_cache
+def get_partial_cache() -> PartialMovieCache | None:
+    settings = get_settings()
+    if not settings.render_partial_cache_dir:
+        return None
+    return PartialMovieCache(
+        root=settings.render_partial_cache_dir,
+        max_bytes=settings.render_partial_cache_max_mb * 1024 * 1024,
+    )
@@ -1,11 +1,10 @@
 from app.schemas.generate import GenerateRequest
 
+# Every prompt starts with this exact text and puts everything request-specific after it,
+# so providers with prefix caching (Ollama's KV cache, TGI, OpenAI) compute it only once.
+PROMPT_PREFIX = """You are an expert Manim CE developer writing educational animation scripts.
 
-def build_generation_prompt(payload: GenerateRequest) -> str:
-    return f"""
-You are an expert Manim educator creating an educational animation script.
-
-Requirements:
+Rules for every script:
 - Return Python code only.
 - Must start with: from manim import *
 - Must include exactly one Scene class named GeneratedScene inheriting Scene.
@@ -14,16 +13,42 @@ Requirements:
 - Do not invent helper methods on Scene (for example `_set_background`, `_add_area`, `play_and_wait`).
 - Only call valid public Manim Scene APIs (for example: play, wait, add, remove, clear, next_section, add_sound).
 - Any helper function you use must be explicitly defined in `GeneratedScene`.
-- Keep animation approximately {payload.duration_seconds} seconds.
-- Audience level: {payload.level.value}
-- Style: {payload.style.value}
-- Keep code simple and robust for direct rendering in Manim CE.
+- Keep code simple and robust for direct rendering with `manim ... GeneratedScene`.
+
+"""
+
+
+def build_generation_prompt(payload: GenerateRequest) -> str:
+    return f"""{PROMPT_PREFIX}Task: write a new educational animation script.
+
+Target length: approximately {payload.duration_seconds} seconds.
+Audience level: {payload.level.value}
+Style: {payload.style.value}
 
 Topic:
 {payload.topic}
 
 Additional instructions:
-{payload.additional_instructions or 'None'}
+{payload.additional_instructions or "None"}
+
+Return only valid Python code."""
+
+
+def build_fix_prompt(code: str, error: str) -> str:
+    return f"""{PROMPT_PREFIX}Task: fix the following script so it renders.
+
+Runtime error:
+{error}
+
+Code:
+{code}"""
+
+
+def build_regenerate_prompt(code: str, instruction: str) -> str:
+    return f"""{PROMPT_PREFIX}Task: revise the following script based on the instruction.
+
+Instruction:
+{instruction}
 
-Return only valid Python code.
-""".strip()
+Code:
+{code}"""
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import ast
+import math
+from dataclasses import dataclass
+
+# Manim defaults for ``self.play(...)`` and ``self.wait()`` without explicit durations.
+DEFAULT_RUN_TIME_SEC = 1.0
+DEFAULT_WAIT_SEC = 1.0
+# Loops whose trip count is not a literal ``range(n)`` are assumed to run this many times.
+DEFAULT_LOOP_ITERATIONS = 3
+# Ceilings that keep estimates of absurd scripts finite: ``range(10**20)`` or deeply nested
+# loops must not overflow (an estimate beyond any render timeout is as good as any other).
+MAX_LOOP_ITERATIONS = 1_000_000
+MAX_MULTIPLIER = 1e9
+MAX_RENDER_SEC = 7 * 24 * 3600
+# Fixed costs: interpreter and Manim start-up, one LaTeX compile per Tex mobject, and the
+# per-animation setup (partial movie file, ffmpeg pipe).
+STARTUP_SEC = 4.0
+TEX_COMPILE_SEC = 1.5
+PLAY_OVERHEAD_SEC = 0.3
+TEX_CLASSES = {"Tex", "MathTex", "SingleStringMathTex", "BulletedList", "Title"}
+# Render seconds per second of animation, by quality preset.
+QUALITY_COST = {"480p15": 0.3, "720p30": 1.0, "1080p30": 2.0}
+DEFAULT_QUALITY_COST = QUALITY_COST["1080p30"]
+
+
+@dataclass
+class RenderEstimate:
+    scene_sec: float
+    render_sec: int
+
+
+def _number(node: ast.AST | None) -> float | None:
+    if isinstance(node, ast.Constant) and isinstance(node.value, int | float):
+        try:
+            value = float(node.value)
+        except OverflowError:
+            return None
+        return value if math.isfinite(value) else None
+    return None
+
+
+def _call_name(node: ast.Call) -> str | None:
+    if isinstance(node.func, ast.Name):
+        return node.func.id
+    if isinstance(node.func, ast.Attribute):
+        return node.func.attr
+    return None
+
+
+def _loop_iterations(node: ast.For) -> int:
+    it = node.iter
+    if isinstance(it, ast.Call) and _call_name(it) == "range" and it.args:
+        bounds = [_number(arg) for arg in it.args[:3]]
+        if all(bound is not None for bound in bounds):
+            try:
+                trips = range(*(int(bound) for bound in bounds))
+            except ValueError:
+                return DEFAULT_LOOP_ITERATIONS
+            try:
+                return min(len(trips), MAX_LOOP_ITERATIONS)
+            except OverflowError:
+                return MAX_LOOP_ITERATIONS
+    if isinstance(it, ast.List | ast.Tuple):
+        return len(it.elts)
+    return DEFAULT_LOOP_ITERATIONS
+
+
+class _CostVisitor(ast.NodeVisitor):
+    def __init__(self) -> None:
+        self.scene_sec = 0.0
+        self.plays = 0.0
+        self.tex = 0.0
+        self._multiplier = 1.0
+
+    def visit_For(self, node: ast.For) -> None:
+        self._visit_loop(node, _loop_iterations(node))
+
+    def visit_While(self, node: ast.While) -> None:
+        self._visit_loop(node, DEFAULT_LOOP_ITERATIONS)
+
+    def _visit_loop(self, node: ast.For | ast.While, iterations: int) -> None:
+        outer = self._multiplier
+        self._multiplier = min(outer * iterations, MAX_MULTIPLIER)
+        for stmt in node.body:
+            self.visit(stmt)
+        self._multiplier = outer
+        for stmt in node.orelse:
+            self.visit(stmt)
+
+    def visit_Call(self, node: ast.Call) -> None:
+        name = _call_name(node)
+        keywords = {kw.arg: kw.value for kw in node.keywords if kw.arg}
+        if name == "play":
+            self.plays += self._multiplier
+            run_time = _number(keywords.get("run_time"))
+            self.scene_sec += self._multiplier * (
+                run_time if run_time is not None else DEFAULT_RUN_TIME_SEC
+            )
+        elif name == "wait":
+            duration = _number(node.args[0] if node.args else keywords.get("duration"))
+            self.scene_sec += self._multiplier * (
+                duration if duration is not None else DEFAULT_WAIT_SEC
+            )
+        elif name in TEX_CLASSES:
+            self.tex += self._multiplier
+        self.generic_visit(node)
+
+
+def estimate_render_cost(tree: ast.Module, quality: str) -> RenderEstimate:
+    """Rough wall-clock cost of rendering a script, from its AST alone.
+
+    Sums ``play`` run times and ``wait`` durations (literal values, Manim defaults
+    otherwise), scaled by loop trip counts, then adds start-up, per-animation and
+    LaTeX compile overheads. Helper methods are counted once, wherever they are called
+    from. Good enough to rank jobs, not to promise a finish time.
+    """
+    visitor = _CostVisitor()
+    visitor.visit(tree)
+    cost_per_sec = QUALITY_COST.get(quality, DEFAULT_QUALITY_COST)
+    render_sec = (
+        STARTUP_SEC
+        + visitor.tex * TEX_COMPILE_SEC
+        + visitor.plays * PLAY_OVERHEAD_SEC
+        + visitor.scene_sec * cost_per_sec
+    )
+    return RenderEstimate(
+        scene_sec=min(visitor.scene_sec, MAX_RENDER_SEC),
+        render_sec=math.ceil(min(render_sec, MAX_RENDER_SEC)),
+    )
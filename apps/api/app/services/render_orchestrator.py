@@ -1,15 +1,35 @@
 from __future__ import annotations
 
 import glob
+import logging
 import os
 import shutil
 import subprocess
+import sys
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from threading import Event
 
 from app.core.config import get_settings
 from app.sandbox.docker_runner import DockerRunner
-from app.services.render_types import RenderResult, RenderTimeoutError
+from app.services import manim_dry_run
+from app.services.partial_cache import PARTIAL_DIR_NAME, get_partial_cache, manim_config
+from app.services.render_pool import DRY_RUN_MARKER, get_render_pool
+from app.services.render_process import LinkedEvent, run_process
+from app.services.render_types import EmptyRenderError, RenderResult, RenderTimeoutError
+from app.services.scene_sections import (
+    SCENE_CLASS,
+    SECTION_SCENE_CLASS,
+    plan_sections,
+    section_script,
+)
+
+logger = logging.getLogger(__name__)
+
+PREFLIGHT_QUALITY = "480p15"
+# Run as a script: the Manim CLI cannot order --dry_run before --save_last_frame.
+DRY_RUN_SCRIPT = manim_dry_run.__file__
 
 
 class RenderOrchestrator:
@@ -17,12 +37,178 @@ class RenderOrchestrator:
         self.settings = get_settings()
         self.docker_runner = DockerRunner()
 
-    def run(self, job_id: str, code: str, quality: str) -> RenderResult:
+    def run(
+        self, job_id: str, code: str, quality: str, cancel: Event | None = None
+    ) -> RenderResult:
+        """Render ``code``; setting ``cancel`` stops it with ``RenderCancelledError``."""
+        parallelism = self.settings.render_section_parallelism
+        if parallelism > 1:
+            sections = plan_sections(code)
+            if len(sections) > 1:
+                return self._run_sections(job_id, code, quality, sections, parallelism, cancel)
+        return self._render(job_id=job_id, code=code, quality=quality, cancel=cancel)
+
+    def dry_run(self, job_id: str, code: str) -> None:
+        """Pre-flight: execute the scene at 480p15 with animations skipped and nothing
+        written, so runtime errors surface in seconds instead of partway through a render.
+        """
+        timeout = self.settings.render_preflight_timeout_sec
         if self.settings.render_mode == "docker":
-            return self.docker_runner.run(job_id=job_id, code=code, quality=quality)
-        return self._run_local(job_id=job_id, code=code, quality=quality)
+            self.docker_runner.dry_run(
+                job_id=job_id, code=code, quality=PREFLIGHT_QUALITY, timeout=timeout
+            )
+            return
+
+        with tempfile.TemporaryDirectory(prefix=f"manim_{job_id}_") as tmp_dir:
+            if self.settings.render_mode == "pool":
+                (Path(tmp_dir) / DRY_RUN_MARKER).touch()
+                get_render_pool().render(
+                    code=code, quality=PREFLIGHT_QUALITY, work_dir=tmp_dir, timeout=timeout
+                )
+                return
 
-    def _run_local(self, job_id: str, code: str, quality: str) -> RenderResult:
+            script_path = Path(tmp_dir) / "scene.py"
+            script_path.write_text(code, encoding="utf-8")
+            cmd = [
+                sys.executable,
+                DRY_RUN_SCRIPT,
+                str(script_path),
+                SCENE_CLASS,
+                PREFLIGHT_QUALITY,
+                str(Path(tmp_dir) / "media"),
+            ]
+            try:
+                run_process(cmd, timeout)
+            except subprocess.TimeoutExpired as exc:
+                raise RenderTimeoutError("Pre-flight run timed out") from exc
+            except subprocess.CalledProcessError as exc:
+                stderr = (exc.stderr or "").strip()
+                stdout = (exc.stdout or "").strip()
+                raise RuntimeError(stderr or stdout or "Manim pre-flight failed") from exc
+
+    def _render(
+        self,
+        job_id: str,
+        code: str,
+        quality: str,
+        scene_class: str = SCENE_CLASS,
+        cancel: Event | None = None,
+    ) -> RenderResult:
+        if self.settings.render_mode == "docker":
+            return self.docker_runner.run(
+                job_id=job_id, code=code, quality=quality, scene_class=scene_class, cancel=cancel
+            )
+        if self.settings.render_mode == "pool":
+            # Pool workers pick the section scene from the script itself.
+            return self._run_pool(job_id=job_id, code=code, quality=quality, cancel=cancel)
+        return self._run_local(
+            job_id=job_id, code=code, quality=quality, scene_class=scene_class, cancel=cancel
+        )
+
+    def _run_sections(
+        self,
+        job_id: str,
+        code: str,
+        quality: str,
+        sections: list[int],
+        parallelism: int,
+        cancel: Event | None = None,
+    ) -> RenderResult:
+        """Render each ``next_section()`` section in its own process and join them losslessly.
+
+        The first section to fail stops the others and its error is raised.
+        """
+        logger.info("Rendering %s as %d parallel sections", job_id, len(sections))
+        sections_cancel = LinkedEvent(cancel)
+        failures: list[BaseException] = []
+
+        def render_section(index: int) -> RenderResult | None:
+            try:
+                return self._render(
+                    job_id=f"{job_id}_s{index}",
+                    code=section_script(code, index),
+                    quality=quality,
+                    scene_class=SECTION_SCENE_CLASS,
+                    cancel=sections_cancel,
+                )
+            except EmptyRenderError:
+                return None
+            except BaseException as exc:
+                # Recorded before cancelling, so the siblings' RenderCancelledError never
+                # shadows the error that actually failed the render.
+                failures.append(exc)
+                sections_cancel.set()
+                raise
+
+        with ThreadPoolExecutor(max_workers=min(parallelism, len(sections))) as executor:
+            futures = [executor.submit(render_section, index) for index in sections]
+        videos = [
+            future.result().video_file
+            for future in futures
+            if future.exception() is None and future.result() is not None
+        ]
+
+        try:
+            if failures:
+                raise failures[0]
+            if not videos:
+                raise EmptyRenderError("Render finished but output video not found")
+            return RenderResult(video_file=self._concat(job_id, videos))
+        finally:
+            for video in videos:
+                Path(video).unlink(missing_ok=True)
+
+    def _concat(self, job_id: str, videos: list[str]) -> str:
+        if len(videos) == 1:
+            fd, output = tempfile.mkstemp(prefix=f"{job_id}_", suffix=".mp4")
+            os.close(fd)
+            shutil.copyfile(videos[0], output)
+            return output
+
+        with tempfile.TemporaryDirectory(prefix=f"concat_{job_id}_") as tmp_dir:
+            list_file = Path(tmp_dir) / "sections.txt"
+            list_file.write_text("".join(f"file '{video}'\n" for video in videos), encoding="utf-8")
+            fd, output = tempfile.mkstemp(prefix=f"{job_id}_", suffix=".mp4")
+            os.close(fd)
+            cmd = [
+                "ffmpeg",
+                "-y",
+                "-loglevel",
+                "error",
+                "-f",
+                "concat",
+                "-safe",
+                "0",
+                "-i",
+                str(list_file),
+                "-c",
+                "copy",
+                output,
+            ]
+            try:
+                subprocess.run(
+                    cmd,
+                    check=True,
+                    timeout=self.settings.render_timeout_sec,
+                    capture_output=True,
+                    text=True,
+                )
+            except subprocess.TimeoutExpired as exc:
+                Path(output).unlink(missing_ok=True)
+                raise RenderTimeoutError("Section concat timed out") from exc
+            except subprocess.CalledProcessError as exc:
+                Path(output).unlink(missing_ok=True)
+                raise RuntimeError((exc.stderr or "").strip() or "Section concat failed") from exc
+            return output
+
+    def _run_local(
+        self,
+        job_id: str,
+        code: str,
+        quality: str,
+        scene_class: str = SCENE_CLASS,
+        cancel: Event | None = None,
+    ) -> RenderResult:
         quality_map = {"1080p30": "-qh", "720p30": "-qm", "480p15": "-ql"}
         quality_flag = quality_map.get(quality, "-qh")
 
@@ -35,33 +221,66 @@ class RenderOrchestrator:
                 "manim",
                 quality_flag,
                 str(script_path),
-                "GeneratedScene",
+                scene_class,
                 "--media_dir",
                 str(media_dir),
                 "-o",
                 "render.mp4",
             ]
 
+            partial_cache = get_partial_cache()
+            partial_dir = Path(tmp_dir) / PARTIAL_DIR_NAME
+            if partial_cache:
+                partial_cache.prepare(quality, partial_dir)
+                config_path = Path(tmp_dir) / "manim.cfg"
+                config_path.write_text(manim_config(str(partial_dir)), encoding="utf-8")
+                cmd.extend(["--config_file", str(config_path)])
+
+            rendered = False
             try:
-                subprocess.run(
-                    cmd,
-                    check=True,
-                    timeout=self.settings.render_timeout_sec,
-                    capture_output=True,
-                    text=True,
-                )
+                run_process(cmd, self.settings.render_timeout_sec, cancel=cancel)
+                rendered = True
             except subprocess.TimeoutExpired as exc:
                 raise RenderTimeoutError("Render timed out") from exc
             except subprocess.CalledProcessError as exc:
                 stderr = (exc.stderr or "").strip()
                 stdout = (exc.stdout or "").strip()
                 raise RuntimeError(stderr or stdout or "Manim render failed") from exc
+            finally:
+                if partial_cache:
+                    partial_cache.collect(quality, partial_dir, rendered=rendered)
 
-            candidates = glob.glob(os.path.join(tmp_dir, "**", "render.mp4"), recursive=True)
-            if not candidates:
-                raise RuntimeError("Render finished but output video not found")
+            return self._collect_output(job_id=job_id, tmp_dir=tmp_dir)
 
-            fd, stable_output = tempfile.mkstemp(prefix=f"{job_id}_", suffix=".mp4")
-            os.close(fd)
-            shutil.copyfile(candidates[0], stable_output)
-            return RenderResult(video_file=stable_output)
+    def _run_pool(
+        self, job_id: str, code: str, quality: str, cancel: Event | None = None
+    ) -> RenderResult:
+        with tempfile.TemporaryDirectory(prefix=f"manim_{job_id}_") as tmp_dir:
+            partial_cache = get_partial_cache()
+            partial_dir = Path(tmp_dir) / PARTIAL_DIR_NAME
+            if partial_cache:
+                partial_cache.prepare(quality, partial_dir)
+            rendered = False
+            try:
+                get_render_pool().render(
+                    code=code,
+                    quality=quality,
+                    work_dir=tmp_dir,
+                    timeout=self.settings.render_timeout_sec,
+                    cancel=cancel,
+                )
+                rendered = True
+            finally:
+                if partial_cache:
+                    partial_cache.collect(quality, partial_dir, rendered=rendered)
+            return self._collect_output(job_id=job_id, tmp_dir=tmp_dir)
+
+    def _collect_output(self, job_id: str, tmp_dir: str) -> RenderResult:
+        candidates = glob.glob(os.path.join(tmp_dir, "**", "render.mp4"), recursive=True)
+        if not candidates:
+            raise EmptyRenderError("Render finished but output video not found")
+
+        fd, stable_output = tempfile.mkstemp(prefix=f"{job_id}_", suffix=".mp4")
+        os.close(fd)
+        shutil.copyfile(candidates[0], stable_output)
+        return RenderResult(video_file=stable_output)
@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import time
+import traceback
+from functools import lru_cache
+from multiprocessing.connection import Connection
+from pathlib import Path
+from threading import Event, Lock
+
+from app.core.config import get_settings
+from app.services.manim_dry_run import MANIM_QUALITY_MAP, enable_dry_run
+from app.services.partial_cache import MANIM_MAX_FILES_CACHED, PARTIAL_DIR_NAME
+from app.services.render_process import CANCEL_POLL_SEC
+from app.services.render_types import RenderCancelledError, RenderTimeoutError
+from app.services.scene_sections import SCENE_CLASS, SECTION_SCENE_CLASS
+
+logger = logging.getLogger(__name__)
+
+# A file of this name in the work dir makes the worker run the scene with dry_run set.
+DRY_RUN_MARKER = "dry_run"
+
+
+def _render_in_process(code: str, quality: str, work_dir: str) -> None:
+    from manim import config, tempconfig
+
+    script_path = Path(work_dir) / "scene.py"
+    script_path.write_text(code, encoding="utf-8")
+
+    namespace: dict[str, object] = {"__name__": "__manim_scene__", "__file__": str(script_path)}
+    # Same trust level as ``manim render scene.py``: the code already passed CodeValidator and
+    # runs in a throwaway child forked for this render (see _render_forked).
+    exec(compile(code, str(script_path), "exec"), namespace)  # noqa: S102
+    # Section scripts (see scene_sections) define a subclass that renders one section.
+    scene_cls = namespace.get(SECTION_SCENE_CLASS) or namespace.get(SCENE_CLASS)
+    if scene_cls is None:
+        raise RuntimeError("GeneratedScene class not found in script")
+
+    overrides = {
+        "quality": MANIM_QUALITY_MAP.get(quality, "high_quality"),
+        "media_dir": str(Path(work_dir) / "media"),
+        "input_file": str(script_path),
+        "output_file": "render.mp4",
+    }
+    partial_dir = Path(work_dir) / PARTIAL_DIR_NAME
+    if partial_dir.is_dir():
+        overrides["partial_movie_dir"] = str(partial_dir)
+        overrides["max_files_cached"] = MANIM_MAX_FILES_CACHED
+    with tempconfig(overrides):
+        if (Path(work_dir) / DRY_RUN_MARKER).exists():
+            enable_dry_run(config)
+        scene_cls().render()
+
+
+def _render_forked(code: str, quality: str, work_dir: str) -> tuple[str, str, float]:
+    """Render in a child forked from this warm process, so whatever the script changes at
+    module level (``Mobject.set_default``, monkeypatches) dies with the child.
+
+    Returns the status, error detail and the child's peak RSS in MB.
+    """
+    reader, writer = multiprocessing.Pipe(duplex=False)
+    pid = os.fork()
+    if pid == 0:
+        reader.close()
+        try:
+            _render_in_process(code, quality, work_dir)
+            writer.send(("ok", ""))
+        except BaseException as exc:
+            detail = "".join(traceback.format_exception(exc)).strip()
+            writer.send(("error", detail or "Manim render failed"))
+        finally:
+            # Skip the parent's atexit handlers and buffered output.
+            os._exit(0)
+
+    writer.close()
+    try:
+        result = reader.recv()
+    except EOFError:
+        result = None
+    finally:
+        reader.close()
+    _, wait_status, usage = os.wait4(pid, 0)
+    # ru_maxrss is reported in kilobytes on Linux.
+    rss_mb = usage.ru_maxrss / 1024
+    if result is None:
+        exit_code = os.waitstatus_to_exitcode(wait_status)
+        detail = f"Render process exited with {exit_code} before reporting a result"
+        return "error", detail, rss_mb
+    status, detail = result
+    return status, detail, rss_mb
+
+
+def _worker_main(conn: Connection) -> None:
+    # Own process group, so the pool can kill this worker together with its render child.
+    os.setpgrp()
+    import manim  # noqa: F401  # paid once per worker instead of once per render
+
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            return
+        if message is None:
+            return
+
+        code, quality, work_dir = message
+        conn.send(_render_forked(code, quality, work_dir))
+
+
+class _PoolWorker:
+    def __init__(self, ctx: multiprocessing.context.BaseContext) -> None:
+        parent_conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.conn = parent_conn
+        self.renders = 0
+        self.rss_mb = 0.0
+
+    def stop(self) -> None:
+        try:
+            self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout=5)
+        self.kill()
+
+    def kill(self) -> None:
+        # The render child may outlive its worker, so always signal the whole group.
+        try:
+            os.killpg(self.process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(timeout=5)
+        self.conn.close()
+
+
+class ManimWorkerPool:
+    """Pool of long-lived processes that have already imported manim.
+
+    Each worker forks a fresh child per render, so renders start warm but share no
+    state. Workers are recycled after ``max_renders`` renders or once a render child's
+    peak RSS (which counts the worker's inherited pages) exceeds ``max_rss_mb``.
+    """
+
+    def __init__(self, size: int, max_renders: int, max_rss_mb: int) -> None:
+        self.size = max(1, size)
+        self.max_renders = max_renders
+        self.max_rss_mb = max_rss_mb
+        self._ctx = multiprocessing.get_context("spawn")
+        self._idle: queue.Queue[_PoolWorker] = queue.Queue()
+        self._lock = Lock()
+        self._started = False
+
+    def _spawn(self) -> _PoolWorker:
+        return _PoolWorker(self._ctx)
+
+    def start(self) -> None:
+        with self._lock:
+            if self._started:
+                return
+            for _ in range(self.size):
+                self._idle.put(self._spawn())
+            self._started = True
+
+    def shutdown(self) -> None:
+        with self._lock:
+            while True:
+                try:
+                    worker = self._idle.get_nowait()
+                except queue.Empty:
+                    break
+                worker.stop()
+            self._started = False
+
+    def _release(self, worker: _PoolWorker) -> None:
+        if self.max_renders and worker.renders >= self.max_renders:
+            logger.info("Recycling render worker after %s renders", worker.renders)
+        elif self.max_rss_mb and worker.rss_mb >= self.max_rss_mb:
+            logger.info("Recycling render worker after a %.0f MB peak render", worker.rss_mb)
+        else:
+            self._idle.put(worker)
+            return
+        worker.stop()
+        self._idle.put(self._spawn())
+
+    def _replace(self, worker: _PoolWorker) -> None:
+        worker.kill()
+        self._idle.put(self._spawn())
+
+    def _wait(self, worker: _PoolWorker, timeout: float, cancel: Event | None) -> None:
+        deadline = time.monotonic() + timeout
+        while not worker.conn.poll(CANCEL_POLL_SEC if cancel is not None else timeout):
+            if cancel is not None and cancel.is_set():
+                raise RenderCancelledError("Render cancelled")
+            if time.monotonic() >= deadline:
+                raise RenderTimeoutError("Render timed out")
+
+    def render(
+        self,
+        code: str,
+        quality: str,
+        work_dir: str,
+        timeout: float,
+        cancel: Event | None = None,
+    ) -> None:
+        self.start()
+        worker = self._idle.get()
+        try:
+            worker.conn.send((code, quality, work_dir))
+            self._wait(worker, timeout, cancel)
+            status, detail, rss_mb = worker.conn.recv()
+        except (RenderTimeoutError, RenderCancelledError):
+            self._replace(worker)
+            raise
+        except (EOFError, OSError) as exc:
+            self._replace(worker)
+            raise RuntimeError("Render worker exited unexpectedly") from exc
+
+        worker.renders += 1
+        worker.rss_mb = rss_mb
+        self._release(worker)
+        if status != "ok":
+            raise RuntimeError(detail)
+
+
+@lru_cache
+def get_render_pool() -> ManimWorkerPool:
+    settings = get_settings()
+    return ManimWorkerPool(
+        size=settings.render_pool_size,
+        max_renders=settings.render_pool_max_renders,
+        max_rss_mb=settings.render_pool_max_rss_mb,
+    )
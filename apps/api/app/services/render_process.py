@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import os
+import signal
+import subprocess
+import time
+from collections.abc import Callable
+from threading import Event
+
+from app.services.render_types import RenderCancelledError
+
+# How often a running render checks whether it has been cancelled.
+CANCEL_POLL_SEC = 0.2
+
+
+class LinkedEvent(Event):
+    """Cancel event that also reads as set once ``parent`` is set.
+
+    Lets a group of renders be stopped on its own without touching the caller's event.
+    Only ``is_set()`` follows the parent, which is all the render paths poll.
+    """
+
+    def __init__(self, parent: Event | None) -> None:
+        super().__init__()
+        self._parent = parent
+
+    def is_set(self) -> bool:
+        return super().is_set() or (self._parent is not None and self._parent.is_set())
+
+
+def _stop(process: subprocess.Popen, on_stop: Callable[[], None] | None) -> None:
+    if on_stop is not None:
+        on_stop()
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+    process.communicate()
+
+
+def run_process(
+    cmd: list[str],
+    timeout: float,
+    cancel: Event | None = None,
+    on_stop: Callable[[], None] | None = None,
+) -> subprocess.CompletedProcess[str]:
+    """``subprocess.run(cmd, check=True, capture_output=True, text=True)`` that can be cancelled.
+
+    The command runs in its own process group, which is killed on timeout or once
+    ``cancel`` is set; ``on_stop`` runs first, for processes that outlive their client
+    (such as a ``docker run`` container). Raises ``RenderCancelledError`` when cancelled.
+    """
+    deadline = time.monotonic() + timeout
+    with subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        start_new_session=True,
+    ) as process:
+        while True:
+            try:
+                stdout, stderr = process.communicate(timeout=CANCEL_POLL_SEC)
+                break
+            except subprocess.TimeoutExpired:
+                if cancel is not None and cancel.is_set():
+                    _stop(process, on_stop)
+                    raise RenderCancelledError("Render cancelled") from None
+                if time.monotonic() >= deadline:
+                    _stop(process, on_stop)
+                    raise subprocess.TimeoutExpired(cmd, timeout) from None
+    if process.returncode:
+        raise subprocess.CalledProcessError(process.returncode, cmd, stdout, stderr)
+    return subprocess.CompletedProcess(cmd, process.returncode, stdout, stderr)
@@ -1,3 +1,4 @@
+import subprocess
 from dataclasses import dataclass
 
 
@@ -5,6 +6,20 @@ class RenderTimeoutError(Exception):
     pass
 
 
+class EmptyRenderError(RuntimeError):
+    """Manim exited cleanly but wrote no video (e.g. every animation was skipped)."""
+
+
+class RenderCancelledError(RuntimeError):
+    """The render was stopped early because its result is no longer needed."""
+
+
+# What a render attempt is expected to fail with: Manim, ffmpeg and pool errors surface
+# as RuntimeError (including the two subclasses above), process and file problems as
+# OSError or SubprocessError.
+RENDER_ERRORS = (RenderTimeoutError, RuntimeError, OSError, subprocess.SubprocessError)
+
+
 @dataclass
 class RenderResult:
     video_file: str
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import ast
+
+SCENE_CLASS = "GeneratedScene"
+SECTION_SCENE_CLASS = "GeneratedSceneSection"
+
+# Appended to the user's script: a GeneratedScene subclass whose sections all skip
+# their animations except the one being rendered. Skipped animations still run, so
+# every section starts from the same scene state as in a serial render.
+_SECTION_SCENE_TEMPLATE = """
+
+class {class_name}({base}):
+    def setup(self):
+        super().setup()
+        self._section_index = 0
+        if {index} != 0:
+            self.renderer.file_writer.sections[-1].skip_animations = True
+
+    def next_section(
+        self, name="unnamed", section_type=DefaultSectionType.NORMAL, skip_animations=False
+    ):
+        self._section_index += 1
+        skip = skip_animations or self._section_index != {index}
+        super().next_section(name, section_type, skip)
+"""
+
+
+def _is_next_section(node: ast.AST) -> bool:
+    return (
+        isinstance(node, ast.Call)
+        and isinstance(node.func, ast.Attribute)
+        and node.func.attr == "next_section"
+    )
+
+
+def _construct_body(tree: ast.Module) -> list[ast.stmt] | None:
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef) and node.name == SCENE_CLASS:
+            for child in node.body:
+                if isinstance(child, ast.FunctionDef) and child.name == "construct":
+                    return child.body
+    return None
+
+
+def plan_sections(code: str | ast.Module) -> list[int]:
+    """Indices of the sections of ``GeneratedScene`` worth rendering separately.
+
+    Only ``self.next_section()`` calls made as top-level statements of ``construct`` are
+    split on, since their count is known before running the scene. Returns an empty
+    list when the scene cannot be split that way (calls inside loops, branches or
+    helpers), and skips sections that contain no statements.
+    """
+    tree = ast.parse(code) if isinstance(code, str) else code
+    body = _construct_body(tree)
+    if body is None:
+        return []
+
+    boundaries = {
+        id(stmt.value)
+        for stmt in body
+        if isinstance(stmt, ast.Expr) and _is_next_section(stmt.value)
+    }
+    if not boundaries:
+        return []
+    if any(_is_next_section(node) and id(node) not in boundaries for node in ast.walk(tree)):
+        return []
+
+    sections: list[int] = []
+    index = 0
+    has_statements = False
+    for stmt in body:
+        if isinstance(stmt, ast.Expr) and id(stmt.value) in boundaries:
+            if has_statements:
+                sections.append(index)
+            index += 1
+            has_statements = False
+        else:
+            has_statements = True
+    if has_statements:
+        sections.append(index)
+    return sections
+
+
+def section_script(code: str, index: int) -> str:
+    """``code`` plus a ``SECTION_SCENE_CLASS`` scene that renders only section ``index``."""
+    return code + _SECTION_SCENE_TEMPLATE.format(
+        class_name=SECTION_SCENE_CLASS, base=SCENE_CLASS, index=index
+    )
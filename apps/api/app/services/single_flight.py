@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import uuid
+from collections.abc import Awaitable, Callable
+
+from redis.asyncio import Redis as AsyncRedis
+from redis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
+
+_RELEASE_LOCK = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key so only one of them does the work.
+
+    Callers in the same process wait on one shared task, which keeps running when
+    the caller that started it is cancelled. When Redis is available, callers on
+    other replicas see the leader's ``SET NX`` lock, subscribe to its result channel
+    and receive the published value. A follower that cannot get a result in
+    time (leader crashed, lock expired) falls back to running the work itself.
+    """
+
+    def __init__(self, redis: AsyncRedis | None, lock_ttl_sec: int, wait_timeout_sec: int) -> None:
+        self._redis = redis
+        self.lock_ttl_sec = lock_ttl_sec
+        self.wait_timeout_sec = wait_timeout_sec
+        self._inflight: dict[str, asyncio.Task[str]] = {}
+
+    def _lock_key(self, key: str) -> str:
+        return f"singleflight:lock:{key}"
+
+    def _channel(self, key: str) -> str:
+        return f"singleflight:done:{key}"
+
+    async def do(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[str]],
+        lookup: Callable[[], Awaitable[str | None]],
+    ) -> str:
+        task = self._inflight.get(key)
+        if task is None:
+            # Detached from the caller's task: a client disconnect cancels only that
+            # caller's wait, not the work the other callers share.
+            task = asyncio.create_task(self._do_shared(key, fn, lookup))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: asyncio.Task[str]) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # retrieved here in case every caller has gone away
+
+    async def _do_shared(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[str]],
+        lookup: Callable[[], Awaitable[str | None]],
+    ) -> str:
+        if not self._redis:
+            return await fn()
+
+        lock_key = self._lock_key(key)
+        token = uuid.uuid4().hex
+        acquired = await self._redis.set(lock_key, token, nx=True, ex=self.lock_ttl_sec)
+        if not acquired:
+            shared = await self._wait_for_leader(key, lookup)
+            if shared is not None:
+                return shared
+            logger.info("Single-flight leader for %s gave no result, running locally", key)
+            return await fn()
+
+        envelope: dict[str, object] = {"ok": False, "error": "Leader failed"}
+        try:
+            result = await fn()
+            envelope = {"ok": True, "value": result}
+            return result
+        except Exception as exc:
+            envelope = {"ok": False, "error": str(exc)}
+            raise
+        finally:
+            await self._announce(key, envelope, lock_key, token)
+
+    async def _announce(
+        self, key: str, envelope: dict[str, object], lock_key: str, token: str
+    ) -> None:
+        # Runs in the leader's ``finally``: a Redis error here must not replace the
+        # leader's own result or exception. Followers fall back on their own timeout.
+        try:
+            await self._redis.publish(self._channel(key), json.dumps(envelope))
+        except RedisError:
+            logger.warning("Could not publish single-flight result for %s", key, exc_info=True)
+        try:
+            await self._redis.eval(_RELEASE_LOCK, 1, lock_key, token)
+        except RedisError:
+            logger.warning("Could not release single-flight lock for %s", key, exc_info=True)
+
+    async def _wait_for_leader(
+        self, key: str, lookup: Callable[[], Awaitable[str | None]]
+    ) -> str | None:
+        pubsub = self._redis.pubsub()
+        await pubsub.subscribe(self._channel(key))
+        try:
+            # The leader may have finished between our lock attempt and the subscribe.
+            cached = await lookup()
+            if cached is not None:
+                return cached
+
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + self.wait_timeout_sec
+            while (remaining := deadline - loop.time()) > 0:
+                message = await pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=min(remaining, 1.0)
+                )
+                if message:
+                    envelope = json.loads(message["data"])
+                    if envelope.get("ok"):
+                        return envelope["value"]
+                    raise RuntimeError(str(envelope.get("error") or "Leader failed"))
+                if not await self._redis.exists(self._lock_key(key)):
+                    return await lookup()
+            return None
+        finally:
+            await pubsub.unsubscribe(self._channel(key))
+            await pubsub.aclose()
@@ -1,35 +1,188 @@
 from __future__ import annotations
 
+import hashlib
+import os
+import re
 import shutil
+import tempfile
 from pathlib import Path
 
 from app.core.config import get_settings
+from app.services.video_packager import HLS_DIR, get_video_packager
+
+HASH_CHUNK_SIZE = 1024 * 1024
+_HLS_FILE_NAME = re.compile(r"^[A-Za-z0-9_-]+\.(m3u8|m4s|mp4)$")
 
 
 class StorageService:
+    """Content-addressed video store.
+
+    Each distinct video is written once to ``blobs/<sha256[:2]>/<sha256>.mp4``;
+    ``<job_id>.mp4`` entries are hardlinks to that blob, so the inode link count
+    doubles as the reference count used by ``delete``; storage roots without
+    hardlink support are rejected at start-up. Secondary renders of a job
+    (e.g. the progressive ``preview``) live alongside as ``<job_id>.<variant>.mp4``.
+
+    Videos are packaged on the way in (faststart). Derived assets (HLS, poster,
+    animated preview) are made once per blob in ``<sha256>.assets/`` by
+    ``package_assets``, after the job is done, and exposed per job through a
+    ``<job_id>.assets`` symlink that dangles until then.
+    """
+
     def __init__(self) -> None:
         self.settings = get_settings()
         self.root = Path(self.settings.video_storage_root)
         self.root.mkdir(parents=True, exist_ok=True)
+        self.blob_root = self.root / "blobs"
+        self.blob_root.mkdir(parents=True, exist_ok=True)
+        self._check_hardlinks()
+        self.packager = get_video_packager()
+
+    def _job_path(self, job_id: str, variant: str | None = None) -> Path:
+        if variant:
+            return self.root / f"{job_id}.{variant}.mp4"
+        return self.root / f"{job_id}.mp4"
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.blob_root / digest[:2] / f"{digest}.mp4"
+
+    def _assets_link(self, job_id: str) -> Path:
+        return self.root / f"{job_id}.assets"
+
+    def _file_digest(self, path: Path | str) -> str:
+        digest = hashlib.sha256()
+        with open(path, "rb") as fh:
+            while chunk := fh.read(HASH_CHUNK_SIZE):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _write_blob(self, src_file: str, blob: Path) -> None:
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=blob.parent, suffix=".tmp")
+        os.close(fd)
+        try:
+            shutil.copyfile(src_file, tmp_path)
+            os.replace(tmp_path, blob)
+        finally:
+            Path(tmp_path).unlink(missing_ok=True)
+
+    def _check_hardlinks(self) -> None:
+        # Reference counting relies on st_nlink; a copied entry would never free its blob.
+        fd, probe = tempfile.mkstemp(dir=self.blob_root, suffix=".tmp")
+        os.close(fd)
+        link = Path(f"{probe}.link")
+        try:
+            os.link(probe, link)
+        except OSError as exc:
+            raise RuntimeError(
+                f"Video storage at {self.root} must support hardlinks: {exc}"
+            ) from exc
+        finally:
+            link.unlink(missing_ok=True)
+            Path(probe).unlink(missing_ok=True)
 
-    def put(self, job_id: str, src_file: str) -> str:
-        target = self.root / f"{job_id}.mp4"
-        shutil.copyfile(src_file, target)
+    def _link(self, src: Path, dest: Path) -> None:
+        dest.unlink(missing_ok=True)
+        os.link(src, dest)
+
+    def put(self, job_id: str, src_file: str, variant: str | None = None) -> str:
+        packaged = self.packager.faststart(src_file)
+        try:
+            digest = self._file_digest(packaged)
+            blob = self._blob_path(digest)
+            target = self._job_path(job_id, variant)
+            if not blob.exists():
+                self._write_blob(packaged, blob)
+            try:
+                self._link(blob, target)
+            except FileNotFoundError:
+                # The blob was garbage-collected by a concurrent delete; write it again.
+                self._write_blob(packaged, blob)
+                self._link(blob, target)
+        finally:
+            if packaged != src_file:
+                Path(packaged).unlink(missing_ok=True)
+
+        if variant is None and self.packager.produces_assets:
+            self._set_assets_link(job_id, blob.with_suffix(".assets"))
         return str(target)
 
-    def clone(self, source_job_id: str, target_job_id: str) -> str | None:
-        src = self.root / f"{source_job_id}.mp4"
-        if not src.exists():
+    def package_assets(self, job_id: str) -> bool:
+        """Make the derived assets of the job's video, unless its blob already has them."""
+        link = self._assets_link(job_id)
+        if not link.is_symlink():
+            return False
+        blob = (self.root / os.readlink(link)).with_suffix(".mp4")
+        if not blob.exists():
+            return False
+        return self._ensure_assets(blob)
+
+    def _ensure_assets(self, blob: Path) -> bool:
+        assets_dir = blob.with_suffix(".assets")
+        if assets_dir.is_dir():
+            return True
+        tmp_dir = Path(tempfile.mkdtemp(dir=blob.parent, suffix=".tmp"))
+        try:
+            self.packager.package_assets(blob, tmp_dir)
+            if any(tmp_dir.iterdir()):
+                try:
+                    os.rename(tmp_dir, assets_dir)
+                except OSError:
+                    pass  # a concurrent put packaged the same blob first
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        return assets_dir.is_dir()
+
+    def _set_assets_link(self, job_id: str, assets_dir: Path) -> None:
+        link = self._assets_link(job_id)
+        link.unlink(missing_ok=True)
+        os.symlink(os.path.relpath(assets_dir, self.root), link)
+
+    def clone(
+        self, source_job_id: str, target_job_id: str, variant: str | None = None
+    ) -> str | None:
+        src = self._job_path(source_job_id, variant)
+        dest = self._job_path(target_job_id, variant)
+        try:
+            self._link(src, dest)
+        except FileNotFoundError:
             return None
-        dest = self.root / f"{target_job_id}.mp4"
-        shutil.copyfile(src, dest)
+        if variant is not None:
+            return str(dest)
+        source_assets = self._assets_link(source_job_id)
+        if source_assets.is_symlink():
+            self._assets_link(target_job_id).unlink(missing_ok=True)
+            os.symlink(os.readlink(source_assets), self._assets_link(target_job_id))
         return str(dest)
 
-    def get(self, job_id: str) -> str | None:
-        target = self.root / f"{job_id}.mp4"
+    def get_asset(self, job_id: str, name: str) -> str | None:
+        """Path of a derived asset (e.g. ``poster.jpg``) of the job's video, if it exists."""
+        target = self._assets_link(job_id) / name
+        return str(target) if target.is_file() else None
+
+    def get_hls(self, job_id: str, name: str) -> str | None:
+        if not _HLS_FILE_NAME.match(name):
+            return None
+        return self.get_asset(job_id, f"{HLS_DIR}/{name}")
+
+    def get(self, job_id: str, variant: str | None = None) -> str | None:
+        target = self._job_path(job_id, variant)
         return str(target) if target.exists() else None
 
-    def delete(self, job_id: str) -> None:
-        target = self.root / f"{job_id}.mp4"
-        if target.exists():
-            target.unlink()
+    def delete(self, job_id: str, variant: str | None = None) -> None:
+        target = self._job_path(job_id, variant)
+        if variant is None:
+            self._assets_link(job_id).unlink(missing_ok=True)
+        try:
+            links = target.stat().st_nlink
+        except FileNotFoundError:
+            return
+
+        blob = None
+        if links == 2:
+            # Only the blob and this entry remain, so the blob goes too.
+            blob = self._blob_path(self._file_digest(target))
+        target.unlink(missing_ok=True)
+        if blob is not None and blob.exists() and blob.stat().st_nlink == 1:
+            blob.unlink(missing_ok=True)
+            shutil.rmtree(blob.with_suffix(".assets"), ignore_errors=True)
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import hashlib
+import re
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+
+# Character shingle length; short enough that reworded or reordered topics still overlap.
+SHINGLE_SIZE = 3
+# 64 MinHash values split into 16 LSH bands of 4: topics with a shingle Jaccard of about
+# 0.5 or more share at least one band, and are then checked against the real threshold.
+NUM_PERMUTATIONS = 64
+BAND_ROWS = 4
+_PRIME = (1 << 61) - 1
+_STOPWORDS = frozenset(
+    {"a", "an", "and", "the", "of", "in", "on", "to", "for", "with", "how", "what", "why"}
+    | {"is", "are", "explain", "show", "visualize"}
+)
+_NON_WORD = re.compile(r"[^\w]+")
+
+
+def _hash64(data: bytes, salt: bytes = b"") -> int:
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8, salt=salt).digest(), "big")
+
+
+# Fixed coefficients for the universal hashes ``(a * x + b) mod p``, one per permutation.
+_PERMUTATIONS = [
+    (_hash64(b"a", str(index).encode()) % (_PRIME - 1) + 1, _hash64(b"b", str(index).encode()))
+    for index in range(NUM_PERMUTATIONS)
+]
+
+
+def normalize_topic(topic: str) -> str:
+    """Lower-cased words of ``topic`` without punctuation or filler words."""
+    words = _NON_WORD.sub(" ", topic.casefold()).split()
+    return " ".join(word for word in words if word not in _STOPWORDS) or " ".join(words)
+
+
+def shingles(text: str) -> frozenset[str]:
+    padded = f" {text} "
+    if len(padded) <= SHINGLE_SIZE:
+        return frozenset({padded})
+    return frozenset(padded[i : i + SHINGLE_SIZE] for i in range(len(padded) - SHINGLE_SIZE + 1))
+
+
+def minhash(items: frozenset[str]) -> list[int]:
+    hashes = [_hash64(item.encode("utf-8")) for item in items]
+    return [min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMUTATIONS]
+
+
+def jaccard(left: frozenset[str], right: frozenset[str]) -> float:
+    return len(left & right) / len(left | right) if left or right else 1.0
+
+
+@dataclass(frozen=True)
+class TopicMatch:
+    request_hash: str
+    topic: str
+    similarity: float
+
+
+@dataclass(frozen=True)
+class _Entry:
+    topic: str
+    shingles: frozenset[str]
+    bands: tuple[tuple[str, int, int], ...]
+
+
+class TopicIndex:
+    """In-process MinHash/LSH index from topics to generation cache keys.
+
+    Topics are only compared within a partition (everything in the request but the
+    topic), and candidates found through LSH are confirmed with the exact Jaccard
+    similarity of their character shingles. Bounded by entry count, least recently
+    used first out.
+    """
+
+    def __init__(self, threshold: float, max_entries: int) -> None:
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._buckets: dict[tuple[str, int, int], set[str]] = {}
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _bands(self, partition: str, items: frozenset[str]) -> tuple[tuple[str, int, int], ...]:
+        signature = minhash(items)
+        return tuple(
+            (partition, band, hash(tuple(signature[start : start + BAND_ROWS])))
+            for band, start in enumerate(range(0, NUM_PERMUTATIONS, BAND_ROWS))
+        )
+
+    def add(self, partition: str, topic: str, request_hash: str) -> None:
+        items = shingles(normalize_topic(topic))
+        entry = _Entry(topic, items, self._bands(partition, items))
+        with self._lock:
+            self._remove(request_hash)
+            self._entries[request_hash] = entry
+            for bucket in entry.bands:
+                self._buckets.setdefault(bucket, set()).add(request_hash)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def lookup(self, partition: str, topic: str) -> list[TopicMatch]:
+        """Indexed topics in ``partition`` at least ``threshold`` similar, best first."""
+        items = shingles(normalize_topic(topic))
+        bands = self._bands(partition, items)
+        with self._lock:
+            candidates = set().union(*(self._buckets.get(bucket, ()) for bucket in bands))
+            matches = []
+            for request_hash in candidates:
+                entry = self._entries[request_hash]
+                similarity = jaccard(items, entry.shingles)
+                if similarity >= self.threshold:
+                    matches.append(TopicMatch(request_hash, entry.topic, similarity))
+            matches.sort(key=lambda match: match.similarity, reverse=True)
+            if matches:
+                self._entries.move_to_end(matches[0].request_hash)
+        return matches
+
+    def discard(self, request_hash: str) -> None:
+        with self._lock:
+            self._remove(request_hash)
+
+    def _remove(self, request_hash: str) -> None:
+        entry = self._entries.pop(request_hash, None)
+        if entry is None:
+            return
+        for bucket in entry.bands:
+            members = self._buckets.get(bucket)
+            if members is not None:
+                members.discard(request_hash)
+                if not members:
+                    del self._buckets[bucket]
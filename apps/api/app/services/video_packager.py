@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+import logging
+import os
+import shutil
+import struct
+import subprocess
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+HLS_DIR = "hls"
+HLS_PLAYLIST = "index.m3u8"
+HLS_INIT_SEGMENT = "init.mp4"
+POSTER_FILE = "poster.jpg"
+ANIMATED_PREVIEW_FILE = "preview.webp"
+POSTER_WIDTH = 640
+ANIMATED_PREVIEW_WIDTH = 320
+ANIMATED_PREVIEW_FPS = 8
+ANIMATED_PREVIEW_MAX_SEC = 6
+
+
+def needs_faststart(path: str | Path) -> bool:
+    """True if the MP4's ``moov`` box comes after ``mdat``, so players must fetch the whole file.
+
+    Only the top-level box headers are read. Files that do not parse as MP4 are left alone.
+    """
+    with open(path, "rb") as fh:
+        while header := fh.read(8):
+            if len(header) < 8:
+                return False
+            size, box_type = struct.unpack(">I4s", header)
+            if box_type == b"moov":
+                return False
+            if box_type == b"mdat":
+                return True
+            if size == 1:
+                extended = fh.read(8)
+                if len(extended) < 8:
+                    return False
+                size = struct.unpack(">Q", extended)[0] - 8
+            elif size == 0:
+                return False
+            if size < 8:
+                return False
+            fh.seek(size - 8, os.SEEK_CUR)
+    return False
+
+
+class VideoPackager:
+    """Post-render packaging: moves the ``moov`` box to the front for progressive playback,
+    optionally cuts HLS fMP4 segments (stream copy, no re-encode), and extracts a poster
+    frame plus a small animated preview for gallery views.
+    """
+
+    def __init__(
+        self,
+        faststart: bool,
+        hls: bool,
+        hls_segment_sec: int,
+        timeout_sec: int,
+        thumbnails: bool = False,
+    ) -> None:
+        self.faststart_enabled = faststart
+        self.hls_enabled = hls
+        self.hls_segment_sec = hls_segment_sec
+        self.timeout_sec = timeout_sec
+        self.thumbnails_enabled = thumbnails
+
+    @property
+    def produces_assets(self) -> bool:
+        return self.hls_enabled or self.thumbnails_enabled
+
+    def _ffmpeg(self, args: list[str]) -> None:
+        subprocess.run(
+            ["ffmpeg", "-y", "-loglevel", "error", *args],
+            check=True,
+            timeout=self.timeout_sec,
+            capture_output=True,
+            text=True,
+        )
+
+    def faststart(self, src_file: str) -> str:
+        """Return a faststart copy of ``src_file`` in a new temp file, or ``src_file`` itself
+        when it is already faststart or packaging is off or fails.
+        """
+        if not self.faststart_enabled or not needs_faststart(src_file):
+            return src_file
+        fd, output = tempfile.mkstemp(prefix="faststart_", suffix=".mp4")
+        os.close(fd)
+        try:
+            self._ffmpeg(
+                ["-i", src_file, "-map", "0", "-c", "copy", "-movflags", "+faststart", output]
+            )
+        except (OSError, subprocess.SubprocessError) as exc:
+            Path(output).unlink(missing_ok=True)
+            logger.warning("Faststart packaging failed for %s: %s", src_file, exc)
+            return src_file
+        return output
+
+    def package_assets(self, video_file: str | Path, out_dir: str | Path) -> None:
+        """Write every enabled derived asset for ``video_file`` into ``out_dir``."""
+        out_dir = Path(out_dir)
+        if self.hls_enabled:
+            hls_dir = out_dir / HLS_DIR
+            hls_dir.mkdir(exist_ok=True)
+            if not self.package_hls(video_file, hls_dir):
+                shutil.rmtree(hls_dir, ignore_errors=True)
+        if self.thumbnails_enabled:
+            self.poster(video_file, out_dir / POSTER_FILE)
+            self.animated_preview(video_file, out_dir / ANIMATED_PREVIEW_FILE)
+
+    def poster(self, video_file: str | Path, output: Path) -> bool:
+        # The last frame is the finished scene, which says more than the usual blank opening.
+        try:
+            self._ffmpeg(
+                [
+                    "-sseof",
+                    "-0.5",
+                    "-i",
+                    str(video_file),
+                    "-frames:v",
+                    "1",
+                    "-vf",
+                    f"scale={POSTER_WIDTH}:-2",
+                    "-q:v",
+                    "3",
+                    str(output),
+                ]
+            )
+        except (OSError, subprocess.SubprocessError) as exc:
+            logger.warning("Poster extraction failed for %s: %s", video_file, exc)
+            return False
+        return output.exists()
+
+    def animated_preview(self, video_file: str | Path, output: Path) -> bool:
+        """Low-fps looping WebP of the whole video, sped up to at most a few seconds."""
+        try:
+            speedup = max(1.0, self._duration(video_file) / ANIMATED_PREVIEW_MAX_SEC)
+            filters = (
+                f"setpts=PTS/{speedup:.3f},fps={ANIMATED_PREVIEW_FPS},"
+                f"scale={ANIMATED_PREVIEW_WIDTH}:-2"
+            )
+            self._ffmpeg(
+                [
+                    "-i",
+                    str(video_file),
+                    "-an",
+                    "-vf",
+                    filters,
+                    "-t",
+                    str(ANIMATED_PREVIEW_MAX_SEC),
+                    "-loop",
+                    "0",
+                    "-c:v",
+                    "libwebp",
+                    "-quality",
+                    "60",
+                    str(output),
+                ]
+            )
+        except (OSError, ValueError, subprocess.SubprocessError) as exc:
+            logger.warning("Animated preview failed for %s: %s", video_file, exc)
+            return False
+        return output.exists()
+
+    def _duration(self, video_file: str | Path) -> float:
+        result = subprocess.run(
+            [
+                "ffprobe",
+                "-v",
+                "error",
+                "-show_entries",
+                "format=duration",
+                "-of",
+                "default=noprint_wrappers=1:nokey=1",
+                str(video_file),
+            ],
+            check=True,
+            timeout=self.timeout_sec,
+            capture_output=True,
+            text=True,
+        )
+        return float(result.stdout.strip())
+
+    def package_hls(self, video_file: str | Path, out_dir: str | Path) -> bool:
+        """Write a VOD HLS playlist with fMP4 segments for ``video_file`` into ``out_dir``."""
+        out_dir = Path(out_dir)
+        try:
+            self._ffmpeg(
+                [
+                    "-i",
+                    str(video_file),
+                    "-map",
+                    "0",
+                    "-c",
+                    "copy",
+                    "-f",
+                    "hls",
+                    "-hls_time",
+                    str(self.hls_segment_sec),
+                    "-hls_playlist_type",
+                    "vod",
+                    "-hls_segment_type",
+                    "fmp4",
+                    "-hls_fmp4_init_filename",
+                    HLS_INIT_SEGMENT,
+                    "-hls_segment_filename",
+                    str(out_dir / "segment_%05d.m4s"),
+                    str(out_dir / HLS_PLAYLIST),
+                ]
+            )
+        except (OSError, subprocess.SubprocessError) as exc:
+            logger.warning("HLS packaging failed for %s: %s", video_file, exc)
+            return False
+        return (out_dir / HLS_PLAYLIST).exists()
+
+
+@lru_cache
+def get_video_packager() -> VideoPackager:
+    settings = get_settings()
+    return VideoPackager(
+        faststart=settings.video_faststart,
+        hls=settings.video_hls,
+        hls_segment_sec=settings.video_hls_segment_sec,
+        timeout_sec=settings.render_timeout_sec,
+        thumbnails=settings.video_thumbnails,
+    )
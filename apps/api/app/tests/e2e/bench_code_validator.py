@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import time
+
+from app.services.code_validator import CodeValidator
+
+HEADER = "from manim import *\n\n\nclass GeneratedScene(Scene):\n"
+STEP = """    def step_{index}(self):
+        square = Square(side_length={index} % 5 + 1).shift(RIGHT * ({index} % 3))
+        label = MathTex(r"x_{{{index}}}").next_to(square, UP)
+        self.play(Create(square), Write(label), run_time=0.5)
+        self.play(square.animate.rotate(PI / 4), label.animate.set_color(YELLOW))
+        self.wait(0.1)
+
+"""
+
+
+def build_script(target_bytes: int = 99_000) -> str:
+    parts = [HEADER]
+    calls = []
+    size = len(HEADER)
+    index = 0
+    while size < target_bytes:
+        step = STEP.format(index=index)
+        parts.append(step)
+        calls.append(f"        self.step_{index}()\n")
+        size += len(step) + len(calls[-1])
+        index += 1
+    parts.append("    def construct(self):\n")
+    parts.extend(calls)
+    return "".join(parts)
+
+
+def _best_ms(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main() -> None:
+    code = build_script()
+    validator = CodeValidator()
+    size = len(code.encode("utf-8"))
+    cold = _best_ms(lambda: validator._validate(code, size), repeat=5)
+    validator.validate(code)
+    warm = _best_ms(lambda: validator.validate(code), repeat=50)
+    print(f"Script size: {size / 1024:.1f} KB, ok={validator.validate(code).ok}")
+    print(f"Full validation: {cold:.2f} ms")
+    print(f"Memoized lookup: {warm:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from app.schemas.generate import GenerateRequest, LevelPreset, StylePreset
+from app.services.llm_service import AsyncLLMService
+from app.services.prompt_builder import build_generation_prompt
+
+TOPICS = [
+    "Explain the Pythagorean theorem",
+    "Visualize a binary search",
+    "Show how a derivative is a limit",
+    "Illustrate vector addition",
+    "Explain the unit circle",
+]
+
+
+async def _first_token_ms(service: AsyncLLMService, prompt: str) -> float:
+    started = time.perf_counter()
+    stream = service._stream(prompt=prompt, temperature=0.2)
+    try:
+        await anext(stream)
+    finally:
+        await stream.aclose()
+    return (time.perf_counter() - started) * 1000
+
+
+async def run(runs: int, warm_up: bool) -> None:
+    service = AsyncLLMService()
+    if warm_up:
+        started = time.perf_counter()
+        await service.warm_up()
+        print(f"Warm-up: {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    latencies = []
+    for index in range(runs):
+        payload = GenerateRequest(
+            topic=TOPICS[index % len(TOPICS)],
+            duration_seconds=30,
+            style=StylePreset.MINIMAL,
+            level=LevelPreset.SCHOOL,
+        )
+        latencies.append(await _first_token_ms(service, build_generation_prompt(payload)))
+
+    print(f"Provider: {service.provider} ({service.model_name})")
+    print(f"First request: {latencies[0]:.0f} ms")
+    if len(latencies) > 1:
+        print(f"Later requests (median): {statistics.median(latencies[1:]):.0f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Time to first streamed token. Compare OLLAMA_KEEP_ALIVE=0 without "
+        "--warm-up (cold model, no cached prefix) against the defaults with --warm-up."
+    )
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--warm-up", action="store_true")
+    args = parser.parse_args()
+    asyncio.run(run(args.runs, args.warm_up))
+
+
+if __name__ == "__main__":
+    main()
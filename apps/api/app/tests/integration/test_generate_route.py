@@ -1,6 +1,12 @@
+import json
+
 from fastapi.testclient import TestClient
 
+from app.api import routes_generate
+from app.api.deps import get_async_llm_service, get_topic_index
+from app.core.config import get_settings
 from app.main import app
+from app.services.topic_index import TopicIndex
 
 
 def test_generate_route_returns_code() -> None:
@@ -17,3 +23,83 @@ def test_generate_route_returns_code() -> None:
     body = response.json()
     assert "code" in body
     assert "class GeneratedScene(Scene)" in body["code"]
+
+
+def test_generate_route_streams_sse_events() -> None:
+    client = TestClient(app)
+    payload = {
+        "topic": "Explain streaming animations",
+        "duration_seconds": 30,
+        "style": "minimal",
+        "level": "school",
+        "additional_instructions": "",
+    }
+    response = client.post("/generate?stream=true", json=payload)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+
+    events = [block for block in response.text.split("\n\n") if block.strip()]
+    final = events[-1].splitlines()
+    assert final[0] == "event: done"
+    body = json.loads(final[1].removeprefix("data: "))
+    assert "class GeneratedScene(Scene)" in body["code"]
+
+
+CODE = """from manim import *
+
+class GeneratedScene(Scene):
+    def construct(self):
+        self.wait(1)
+"""
+
+
+class FakeLLMService:
+    provider = "fake"
+    model_name = "fake-model"
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def generate_code(self, payload):
+        self.calls += 1
+        return CODE, []
+
+
+def test_generate_route_serves_near_duplicate_topics_from_similarity_cache(monkeypatch) -> None:
+    settings = get_settings().model_copy(
+        update={"generate_similarity_cache": True, "generate_single_flight": False}
+    )
+    monkeypatch.setattr(routes_generate, "get_settings", lambda: settings)
+    llm = FakeLLMService()
+    app.dependency_overrides[get_async_llm_service] = lambda: llm
+    index = TopicIndex(threshold=0.8, max_entries=10)
+    app.dependency_overrides[get_topic_index] = lambda: index
+    client = TestClient(app)
+    payload = {
+        "topic": "Similarity cache Pythagorean theorem",
+        "duration_seconds": 45,
+        "style": "minimal",
+        "level": "school",
+        "additional_instructions": "",
+    }
+    try:
+        first = client.post("/generate", json=payload)
+        assert first.json()["warnings"] == []
+
+        reworded = client.post(
+            "/generate", json={**payload, "topic": "the similarity cache pythagorean theorem "}
+        )
+        assert llm.calls == 1
+        assert reworded.json()["code"] == first.json()["code"]
+        assert reworded.json()["warnings"][0].startswith("Served from similarity cache (100%")
+
+        other_level = {
+            **payload,
+            "topic": "similarity cache pythagorean theorem",
+            "level": "advanced",
+        }
+        client.post("/generate", json=other_level)
+        assert llm.calls == 2
+    finally:
+        app.dependency_overrides.pop(get_async_llm_service, None)
+        app.dependency_overrides.pop(get_topic_index, None)
@@ -0,0 +1,64 @@
+from fastapi.testclient import TestClient
+
+from app.api.deps import get_async_cache_service, get_async_llm_service
+from app.main import app
+
+CODE = """from manim import *
+
+class GeneratedScene(Scene):
+    def construct(self):
+        self.wait(1)
+"""
+
+
+class FakeLLMService:
+    provider = "fake"
+    model_name = "fake-model"
+
+    def __init__(self, revised: str | None) -> None:
+        self.revised = revised
+
+    async def regenerate_with_instruction(self, code: str, instruction: str) -> str:
+        return self.revised or code
+
+
+class FakeCacheService:
+    def __init__(self) -> None:
+        self.stored = {}
+
+    def hash_text(self, text: str) -> str:
+        return text
+
+    async def get_regeneration(self, regen_hash: str) -> str | None:
+        return self.stored.get(regen_hash)
+
+    async def set_regeneration(self, regen_hash: str, code: str) -> None:
+        self.stored[regen_hash] = code
+
+
+def _regenerate(revised: str | None) -> tuple[dict, FakeCacheService]:
+    cache = FakeCacheService()
+    app.dependency_overrides[get_async_llm_service] = lambda: FakeLLMService(revised)
+    app.dependency_overrides[get_async_cache_service] = lambda: cache
+    try:
+        response = TestClient(app).post(
+            "/regenerate", json={"code": CODE, "instruction": "Make it slower"}
+        )
+    finally:
+        app.dependency_overrides.pop(get_async_llm_service, None)
+        app.dependency_overrides.pop(get_async_cache_service, None)
+    assert response.status_code == 200
+    return response.json(), cache
+
+
+def test_regenerate_route_caches_revised_code() -> None:
+    revised = CODE.replace("wait(1)", "wait(2)")
+    body, cache = _regenerate(revised)
+    assert body["code"] == revised
+    assert list(cache.stored.values()) == [revised]
+
+
+def test_regenerate_route_does_not_cache_unchanged_code() -> None:
+    body, cache = _regenerate(None)
+    assert body["code"] == CODE
+    assert cache.stored == {}
@@ -1,14 +1,20 @@
+from types import SimpleNamespace
+
 from fastapi.testclient import TestClient
 
+from app.api.deps import get_job_service, get_storage_service
 from app.core.config import get_settings
 from app.main import app
+from app.services import storage_service as storage_module
 
 
 def test_render_then_status_flow(monkeypatch) -> None:
     settings = get_settings()
     settings.use_queue = False
 
-    def fake_task(job_id: str, code: str, quality: str, retry_on_error: bool = True) -> None:
+    def fake_task(
+        job_id: str, code: str, quality: str, retry_on_error: bool = True, progressive: bool = False
+    ) -> None:
         return None
 
     monkeypatch.setattr("app.api.routes_render.process_render_job", fake_task)
@@ -28,11 +34,87 @@ def test_render_then_status_flow(monkeypatch) -> None:
     assert status_response.json()["status"] == "queued"
 
 
+def test_duplicate_render_follows_in_flight_job(monkeypatch) -> None:
+    settings = get_settings()
+    settings.use_queue = False
+    enqueued = []
+
+    def fake_task(
+        job_id: str, code: str, quality: str, retry_on_error: bool = True, progressive: bool = False
+    ) -> None:
+        enqueued.append(job_id)
+
+    monkeypatch.setattr("app.api.routes_render.process_render_job", fake_task)
+
+    client = TestClient(app)
+    render_payload = {
+        "code": "from manim import *\n\nclass GeneratedScene(Scene):\n    def construct(self):\n        self.wait(2)\n",
+        "quality": "720p30",
+        "retry_on_error": True,
+    }
+    leader_id = client.post("/render", json=render_payload).json()["job_id"]
+    follower_id = client.post("/render", json=render_payload).json()["job_id"]
+    assert follower_id != leader_id
+    assert enqueued == [leader_id]
+
+    get_job_service().update_job(leader_id, status="rendering", stage="rendering", progress=40)
+    follower = client.get(f"/status/{follower_id}").json()
+    assert follower["leader_job_id"] == leader_id
+    assert follower["status"] == "rendering"
+    assert follower["progress"] == 40
+    assert 0 < follower["eta_sec"] < follower["estimated_render_sec"]
+
+
+def test_progressive_follower_gets_leader_preview(tmp_path, monkeypatch) -> None:
+    get_settings().use_queue = False
+    enqueued = []
+    monkeypatch.setattr(
+        "app.api.routes_render.process_render_job", lambda job_id, *args: enqueued.append(job_id)
+    )
+    settings = SimpleNamespace(video_storage_root=str(tmp_path / "videos"))
+    monkeypatch.setattr(storage_module, "get_settings", lambda: settings)
+    storage = storage_module.StorageService()
+    app.dependency_overrides[get_storage_service] = lambda: storage
+
+    client = TestClient(app)
+    render_payload = {
+        "code": "from manim import *\n\nclass GeneratedScene(Scene):\n    def construct(self):\n        self.wait(7)\n",
+        "quality": "720p30",
+        "retry_on_error": True,
+        "progressive": True,
+    }
+    try:
+        leader_id = client.post("/render", json=render_payload).json()["job_id"]
+        preview = tmp_path / "preview.mp4"
+        preview.write_bytes(b"low-res")
+        storage.put(leader_id, str(preview), variant="preview")
+        get_job_service().update_job(
+            leader_id, status="rendering", stage="preview_ready", progress=50, preview_ready=True
+        )
+
+        follower_id = client.post("/render", json=render_payload).json()["job_id"]
+        follower = client.get(f"/status/{follower_id}").json()
+        assert follower["leader_job_id"] == leader_id
+        assert follower["preview_ready"] is True
+        assert client.get(f"/video/{follower_id}?variant=preview").content == b"low-res"
+
+        # A plain render of the same code wants no preview, so it does not follow.
+        plain_id = client.post("/render", json={**render_payload, "progressive": False}).json()[
+            "job_id"
+        ]
+        assert client.get(f"/status/{plain_id}").json()["leader_job_id"] is None
+        assert enqueued == [leader_id, plain_id]
+    finally:
+        app.dependency_overrides.pop(get_storage_service, None)
+
+
 def test_render_accepts_invalid_code_when_retry_enabled(monkeypatch) -> None:
     settings = get_settings()
     settings.use_queue = False
 
-    def fake_task(job_id: str, code: str, quality: str, retry_on_error: bool = True) -> None:
+    def fake_task(
+        job_id: str, code: str, quality: str, retry_on_error: bool = True, progressive: bool = False
+    ) -> None:
         return None
 
     monkeypatch.setattr("app.api.routes_render.process_render_job", fake_task)
@@ -45,3 +127,142 @@ def test_render_accepts_invalid_code_when_retry_enabled(monkeypatch) -> None:
     }
     response = client.post("/render", json=invalid_payload)
     assert response.status_code == 202
+
+
+def test_render_drops_estimate_the_cost_model_cannot_make(monkeypatch) -> None:
+    settings = get_settings()
+    settings.use_queue = False
+
+    def broken_estimate(tree, quality: str, progressive: bool = False) -> int:
+        raise OverflowError("cannot convert float infinity to integer")
+
+    monkeypatch.setattr("app.api.routes_render.process_render_job", lambda *args: None)
+    monkeypatch.setattr("app.api.routes_render.estimate_job_seconds", broken_estimate)
+
+    client = TestClient(app)
+    payload = {
+        "code": "from manim import *\n\nclass GeneratedScene(Scene):\n"
+        "    def construct(self):\n        for i in range(100000000000000000000):\n"
+        "            self.wait()\n",
+        "quality": "480p15",
+        "retry_on_error": True,
+    }
+    response = client.post("/render", json=payload)
+    assert response.status_code == 202
+    status_body = client.get(f"/status/{response.json()['job_id']}").json()
+    assert status_body["estimated_render_sec"] is None
+
+
+def test_status_events_stream_closes_on_terminal_status() -> None:
+    job_service = get_job_service()
+    job = job_service.create_job()
+    job_service.update_job(job["job_id"], status="done", stage="done", progress=100)
+
+    client = TestClient(app)
+    response = client.get(f"/status/{job['job_id']}/events")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.text.startswith("event: status\n")
+    assert '"status":"done"' in response.text
+
+    assert client.get("/status/job_missing/events").status_code == 404
+
+
+def test_status_supports_etag_revalidation() -> None:
+    job_service = get_job_service()
+    job = job_service.create_job()
+
+    client = TestClient(app)
+    first = client.get(f"/status/{job['job_id']}")
+    etag = first.headers["etag"]
+    assert first.status_code == 200
+
+    cached = client.get(f"/status/{job['job_id']}", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+
+    job_service.update_job(job["job_id"], progress=50)
+    changed = client.get(f"/status/{job['job_id']}", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.json()["progress"] == 50
+
+
+def test_status_batch_returns_jobs_and_missing_ids() -> None:
+    job_service = get_job_service()
+    first = job_service.create_job()
+    second = job_service.create_job()
+
+    client = TestClient(app)
+    payload = {"job_ids": [first["job_id"], second["job_id"], "job_missing", first["job_id"]]}
+    response = client.post("/status/batch", json=payload)
+    assert response.status_code == 200
+    body = response.json()
+    assert [item["job_id"] for item in body["jobs"]] == [first["job_id"], second["job_id"]]
+    assert body["missing"] == ["job_missing"]
+
+    revalidated = client.post(
+        "/status/batch", json=payload, headers={"If-None-Match": response.headers["etag"]}
+    )
+    assert revalidated.status_code == 304
+
+
+def test_video_preview_variant_is_served_before_final_render(tmp_path, monkeypatch) -> None:
+    settings = SimpleNamespace(video_storage_root=str(tmp_path / "videos"))
+    monkeypatch.setattr(storage_module, "get_settings", lambda: settings)
+    storage = storage_module.StorageService()
+    app.dependency_overrides[get_storage_service] = lambda: storage
+
+    job_service = get_job_service()
+    job = job_service.create_job()
+    client = TestClient(app)
+    try:
+        assert client.get(f"/video/{job['job_id']}?variant=preview").status_code == 409
+
+        preview = tmp_path / "preview.mp4"
+        preview.write_bytes(b"low-res")
+        storage.put(job["job_id"], str(preview), variant="preview")
+        job_service.update_job(
+            job["job_id"], status="rendering", stage="preview_ready", preview_ready=True
+        )
+
+        assert client.get(f"/status/{job['job_id']}").json()["preview_ready"] is True
+        response = client.get(f"/video/{job['job_id']}?variant=preview")
+        assert response.status_code == 200
+        assert response.content == b"low-res"
+        assert client.get(f"/video/{job['job_id']}").status_code == 409
+        assert client.get(f"/video/{job['job_id']}?variant=poster").status_code == 422
+    finally:
+        app.dependency_overrides.pop(get_storage_service, None)
+
+
+def test_video_asset_routes_serve_packaged_files(tmp_path, monkeypatch) -> None:
+    settings = SimpleNamespace(video_storage_root=str(tmp_path / "videos"))
+    monkeypatch.setattr(storage_module, "get_settings", lambda: settings)
+    storage = storage_module.StorageService()
+    assets_dir = tmp_path / "videos" / "assets-out"
+    (assets_dir / "hls").mkdir(parents=True)
+    (assets_dir / "hls" / "index.m3u8").write_text("#EXTM3U\n", encoding="utf-8")
+    (assets_dir / "poster.jpg").write_bytes(b"jpeg")
+    app.dependency_overrides[get_storage_service] = lambda: storage
+
+    job_service = get_job_service()
+    job = job_service.create_job()
+    storage._set_assets_link(job["job_id"], assets_dir)
+    client = TestClient(app)
+    try:
+        assert client.get(f"/video/{job['job_id']}/hls/index.m3u8").status_code == 409
+
+        job_service.update_job(job["job_id"], status="done", stage="done", progress=100)
+        response = client.get(f"/video/{job['job_id']}/hls/index.m3u8")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/vnd.apple.mpegurl")
+        assert "immutable" in response.headers["cache-control"]
+        assert client.get(f"/video/{job['job_id']}/hls/secret.txt").status_code == 404
+
+        poster = client.get(f"/video/{job['job_id']}/poster")
+        assert poster.status_code == 200
+        assert poster.headers["content-type"] == "image/jpeg"
+        assert "immutable" in poster.headers["cache-control"]
+        assert client.get(f"/video/{job['job_id']}/preview").status_code == 404
+    finally:
+        app.dependency_overrides.pop(get_storage_service, None)
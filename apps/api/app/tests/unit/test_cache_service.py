@@ -0,0 +1,111 @@
+from app.core.config import get_settings
+from app.services.cache_service import COMPRESSED_PREFIX, CacheService, LRUCache, error_signature
+
+
+def _offline_cache() -> CacheService:
+    service = CacheService()
+    service._redis = None
+    return service
+
+
+def test_lru_cache_evicts_by_entries_and_bytes() -> None:
+    cache = LRUCache(max_entries=2, max_bytes=10)
+    cache.set("a", "1111")
+    cache.set("b", "2222")
+    assert cache.get("a") == "1111"
+
+    cache.set("c", "3333")
+    assert cache.get("b") is None
+    assert cache.get("a") == "1111"
+
+    cache.set("d", "44444444")
+    assert len(cache) == 1
+    assert cache.evictions == 3
+
+
+def test_lru_cache_expires_entries(monkeypatch) -> None:
+    cache = LRUCache(max_entries=10, max_bytes=1000)
+    now = [100.0]
+    monkeypatch.setattr("app.services.cache_service.time.monotonic", lambda: now[0])
+    cache.set("a", "value", ttl_sec=5)
+    assert cache.get("a") == "value"
+
+    now[0] = 106.0
+    assert cache.get("a") is None
+
+
+def test_cache_service_counts_hits_and_misses() -> None:
+    service = _offline_cache()
+    assert service.get_generation("missing") is None
+    service.set_generation("hash", "code")
+    assert service.get_generation("hash") == "code"
+
+    stats = service.stats()
+    assert stats["misses"] == 1
+    assert stats["local_hits"] == 1
+
+
+def test_cache_service_compresses_large_values() -> None:
+    service = _offline_cache()
+    small = "job_123"
+    large = "self.play(Write(Text('x')))\n" * 500
+
+    assert service._encode(small) == small
+    encoded = service._encode(large)
+    assert encoded.startswith(COMPRESSED_PREFIX)
+    assert len(encoded) < len(large) // 4
+    assert service._decode(encoded) == large
+
+
+def test_cache_service_applies_namespace_ttls() -> None:
+    service = _offline_cache()
+    settings = get_settings()
+    assert service._ttl_for("cache:generate:abc") == settings.cache_generate_ttl_sec
+    assert service._ttl_for("cache:render:abc") == settings.cache_render_ttl_sec
+
+
+class DictRedis:
+    def __init__(self) -> None:
+        self.values: dict[str, str] = {}
+
+    def get(self, key: str) -> str | None:
+        return self.values.get(key)
+
+    def set(self, key: str, value: str, ex: int | None = None) -> None:
+        self.values[key] = value
+
+
+def test_cache_service_reads_render_jobs_from_redis_only() -> None:
+    service = CacheService()
+    service._redis = DictRedis()
+    service.set_render_job("hash", "job_leader")
+    service.set_generation("hash", "code")
+
+    # The worker repoints the render entry when it hands a render over to a follower.
+    service._redis.values["cache:render:hash"] = "job_follower"
+    service._redis.values["cache:generate:hash"] = "other"
+
+    assert service.get_render_job("hash") == "job_follower"
+    assert service.get_generation("hash") == "code"
+    assert service.stats()["local_entries"] == 1
+
+
+def test_error_signature_drops_per_run_noise() -> None:
+    first = (
+        'File "/tmp/manim_job_0123456789ab_x1/scene.py", line 7, in construct\n'
+        "NameError: name 'Circel' is not defined"
+    )
+    second = (
+        'File "/tmp/sandbox_job_ba9876543210_q2/workspace/scene.py", line 9, in construct\n'
+        "NameError: name 'Circel' is not defined"
+    )
+    assert error_signature(first) == error_signature(second)
+    assert "scene.py" in error_signature(first)
+    assert error_signature("NameError: name 'Squre'") != error_signature(first)
+
+
+def test_cache_service_memoizes_fixes_under_repair_ttl() -> None:
+    service = _offline_cache()
+    service.set_fix("hash", "fixed code")
+    assert service.get_fix("hash") == "fixed code"
+    assert service._ttl_for("cache:fix:hash") == get_settings().cache_repair_ttl_sec
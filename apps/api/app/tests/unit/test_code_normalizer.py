@@ -0,0 +1,49 @@
+import ast
+
+from app.services.code_normalizer import canonicalize_module
+from app.services.code_validator import CodeValidator
+
+
+def test_canonical_form_ignores_cosmetic_differences() -> None:
+    original = """
+from manim import *
+
+class GeneratedScene(Scene):
+    def construct(self):
+        self.play(Write(Text("Hello")))
+"""
+    cosmetic = '''
+"""Module docstring."""
+from manim import *
+
+
+class GeneratedScene(Scene):
+    """Scene docstring."""
+
+    def construct(self):  # entry point
+        # say hello
+        self.play(Write(Text('Hello')))
+'''
+    assert canonicalize_module(ast.parse(original)) == canonicalize_module(ast.parse(cosmetic))
+
+
+def test_canonical_form_keeps_semantic_differences() -> None:
+    first = "from manim import *\nx = Text('a')\n"
+    second = "from manim import *\nx = Text('b')\n"
+    assert canonicalize_module(ast.parse(first)) != canonicalize_module(ast.parse(second))
+
+
+def test_canonical_form_reuses_validator_tree_without_mutating_it() -> None:
+    code = '''from manim import *
+
+class GeneratedScene(Scene):
+    def construct(self):
+        """Only a docstring."""
+'''
+    result = CodeValidator().validate(code)
+    assert result.tree is not None
+    canonical = canonicalize_module(result.tree)
+
+    assert "Only a docstring" not in canonical
+    assert "pass" in canonical
+    assert ast.get_docstring(result.tree.body[1].body[0]) == "Only a docstring."
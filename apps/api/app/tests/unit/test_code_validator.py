@@ -1,3 +1,6 @@
+import ast
+
+from app.services import code_validator
 from app.services.code_validator import CodeValidator
 
 
@@ -67,3 +70,47 @@ class GeneratedScene(Scene):
 """
     result = CodeValidator().validate(code)
     assert result.ok is True
+
+
+def test_code_validator_memoizes_results_by_code() -> None:
+    code = """
+from manim import *
+
+class GeneratedScene(Scene):
+    def construct(self):
+        self.play_and_wait(Write(Text("Memo")))
+"""
+    first = CodeValidator().validate(code)
+    second = CodeValidator().validate(code)
+    assert second == first
+    assert not second.ok
+    # The memo keeps the verdict only; the tree is parsed again when asked for.
+    assert second._tree is None
+    assert isinstance(second.tree, ast.Module)
+    assert all(not hasattr(verdict, "tree") for verdict in code_validator._results.values())
+
+
+def test_code_validator_memoizes_syntax_errors_without_tree() -> None:
+    code = "from manim import *\nclass GeneratedScene(Scene:\n"
+    first = CodeValidator().validate(code)
+    second = CodeValidator().validate(code)
+    assert second == first
+    assert second.errors[0].startswith("Syntax error")
+    assert second.tree is None
+
+
+def test_code_validator_checks_nested_scene_calls_once() -> None:
+    code = """
+from manim import *
+
+class GeneratedScene(Scene):
+    def construct(self):
+        def inner():
+            self._secret()
+            open("x")
+        inner()
+"""
+    result = CodeValidator().validate(code)
+    assert len(result.errors) == 2
+    assert result.errors[0].startswith("Undefined private method on self at line 7")
+    assert result.errors[1] == "Forbidden call: open"
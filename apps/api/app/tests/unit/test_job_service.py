@@ -1,4 +1,9 @@
-from app.services.job_service import JobService
+import asyncio
+import json
+
+from redis.exceptions import ResponseError
+
+from app.services.job_service import AsyncJobService, JobEventHub, JobService
 
 
 def test_job_service_create_and_update() -> None:
@@ -11,3 +16,127 @@ def test_job_service_create_and_update() -> None:
     assert updated is not None
     assert updated["status"] == "rendering"
     assert updated["progress"] == 50
+
+
+def test_async_job_service_shares_in_memory_fallback() -> None:
+    service = JobService()
+    service._redis = None
+    async_service = AsyncJobService(service)
+    job = service.create_job()
+
+    service.update_job(job["job_id"], stage="rendering")
+    assert asyncio.run(async_service.get_job(job["job_id"]))["stage"] == "rendering"
+
+
+def test_job_service_transition_requires_expected_status() -> None:
+    service = JobService()
+    service._redis = None
+    job = service.create_job()
+
+    assert service.transition_job(job["job_id"], ["rendering"], status="done") is None
+    moved = service.transition_job(job["job_id"], ["queued"], status="rendering", error=None)
+    assert moved is not None
+    assert moved["status"] == "rendering"
+    assert service.get_job_fields(job["job_id"], "status", "progress") == {
+        "status": "rendering",
+        "progress": 0,
+    }
+
+
+def test_job_service_migrates_legacy_json_jobs_on_read() -> None:
+    service = JobService()
+    legacy = {"job_id": "job_old", "status": "done", "progress": 100, "error": None}
+    store: dict[str, object] = {"job:job_old": json.dumps(legacy)}
+
+    class LegacyRedis:
+        def hgetall(self, key: str) -> dict[str, str]:
+            if isinstance(store.get(key), str):
+                raise ResponseError("WRONGTYPE Operation against a key holding the wrong kind")
+            return store.get(key, {})
+
+    def migrate(keys: list[str]) -> int:
+        item = json.loads(store[keys[0]])
+        store[keys[0]] = {name: str(value) for name, value in item.items() if value is not None}
+        return 1
+
+    service._redis = LegacyRedis()
+    service._migrate_script = migrate
+
+    job = service.get_job("job_old")
+    assert job is not None
+    assert job["status"] == "done"
+    assert job["progress"] == 100
+    assert job["error"] is None
+    assert isinstance(store["job:job_old"], dict)
+
+
+def test_async_job_service_watch_streams_until_terminal() -> None:
+    service = JobService()
+    service._redis = None
+    async_service = AsyncJobService(service)
+    job = service.create_job()
+
+    async def run():
+        seen = []
+        async for item in async_service.watch(job["job_id"], heartbeat_sec=0.05):
+            if item is None:
+                service.update_job(job["job_id"], status="done", progress=100)
+                continue
+            seen.append(item["status"])
+        return seen
+
+    assert asyncio.run(run()) == ["queued", "done"]
+
+
+def test_async_job_service_watchers_share_one_event_listener(monkeypatch) -> None:
+    service = JobService()
+    service._redis = None
+    job = service.create_job()
+    async_service = AsyncJobService(service)
+    hub = JobEventHub("redis://localhost:6379/0")
+    async_service._redis = object()  # any truthy client: watch goes through the hub
+    async_service._events = hub
+
+    async def subscribe(job_id: str) -> asyncio.Queue:
+        updates: asyncio.Queue = asyncio.Queue()
+        hub._subscribers[job_id].add(updates)
+        return updates
+
+    async def get_job(job_id: str):
+        return service.get_job(job_id)
+
+    monkeypatch.setattr(hub, "subscribe", subscribe)
+    monkeypatch.setattr(async_service, "get_job", get_job)
+
+    async def collect() -> list[str]:
+        return [item["status"] async for item in async_service.watch(job["job_id"], 5) if item]
+
+    async def run():
+        watchers = [asyncio.create_task(collect()) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        done = {**job, "status": "done", "progress": 100, "updated_at": "later"}
+        hub.dispatch(f"job-events:{job['job_id']}", json.dumps(done))
+        return await asyncio.gather(*watchers)
+
+    assert asyncio.run(run()) == [["queued", "done"]] * 3
+    assert hub._subscribers == {}
+
+
+def test_job_service_mirrors_running_updates_to_followers() -> None:
+    service = JobService()
+    service._redis = None
+    leader = service.create_job()
+    follower = service.create_job(leader_job_id=leader["job_id"])
+    service.add_follower(leader["job_id"], follower["job_id"])
+
+    service.update_job(leader["job_id"], status="rendering", stage="rendering", progress=40)
+    assert service.get_job_fields(follower["job_id"], "status", "progress") == {
+        "status": "rendering",
+        "progress": 40,
+    }
+
+    service.update_job(leader["job_id"], status="done", video_path="/tmp/leader.mp4")
+    assert service.get_job(follower["job_id"])["status"] == "rendering"
+    assert service.remove_follower(leader["job_id"], follower["job_id"]) is True
+    assert service.remove_follower(leader["job_id"], follower["job_id"]) is False
+    assert service.drain_followers(leader["job_id"]) == []
@@ -1,5 +1,10 @@
+import asyncio
+import json
 from types import SimpleNamespace
 
+import httpx
+
+from app.schemas.generate import GenerateRequest, LevelPreset, StylePreset
 from app.services import llm_service
 
 
@@ -7,6 +12,7 @@ def _fake_settings(**overrides):
     base = {
         "llm_provider": "hf_endpoint",
         "llm_request_timeout_sec": 120,
+        "llm_max_connections": 10,
         "hf_router_base_url": "https://router.huggingface.co/v1",
         "hf_endpoint_url": "https://example.endpoint.aws.endpoints.huggingface.cloud",
         "hf_api_token": "token",
@@ -16,6 +22,7 @@ def _fake_settings(**overrides):
         "openai_model": "gpt-5-mini",
         "ollama_base_url": "http://ollama:11434",
         "ollama_model": "deepseek-coder:1.3b",
+        "ollama_keep_alive": "30m",
     }
     base.update(overrides)
     return SimpleNamespace(**base)
@@ -62,3 +69,69 @@ def test_hf_router_generate_uses_openai_compatible_chat(monkeypatch) -> None:
     service.hf_router_client = SimpleNamespace(chat=SimpleNamespace(completions=_FakeCompletions()))
     text = service._hf_router_generate("generate code", temperature=0.2)
     assert "print('router')" in text
+
+
+def test_async_hf_router_generate_awaits_client(monkeypatch) -> None:
+    monkeypatch.setattr(llm_service, "get_settings", lambda: _fake_settings(llm_provider="hf_router"))
+    service = llm_service.AsyncLLMService()
+
+    class _FakeCompletions:
+        @staticmethod
+        async def create(**kwargs):
+            message = SimpleNamespace(content="```python\nprint('async')\n```")
+            return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    service.hf_router_client = SimpleNamespace(chat=SimpleNamespace(completions=_FakeCompletions()))
+    code = asyncio.run(service.regenerate_with_instruction("print('old')", "make it async"))
+    assert code == "print('async')"
+
+
+def test_async_ollama_stream_yields_deltas_then_code(monkeypatch) -> None:
+    monkeypatch.setattr(llm_service, "get_settings", lambda: _fake_settings(llm_provider="ollama"))
+    service = llm_service.AsyncLLMService()
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert json.loads(request.content)["stream"] is True
+        lines = [
+            {"response": "```python\nprint(", "done": False},
+            {"response": "'streamed')\n```", "done": False},
+            {"response": "", "done": True},
+        ]
+        return httpx.Response(200, text="\n".join(json.dumps(line) for line in lines))
+
+    service.ollama_client = httpx.AsyncClient(
+        base_url="http://ollama", transport=httpx.MockTransport(handler)
+    )
+    payload = GenerateRequest(
+        topic="Streaming", duration_seconds=30, style=StylePreset.MINIMAL, level=LevelPreset.SCHOOL
+    )
+
+    async def collect():
+        return [event async for event in service.stream_code(payload)]
+
+    events = asyncio.run(collect())
+    assert [event.delta for event in events[:-1]] == ["```python\nprint(", "'streamed')\n```"]
+    assert events[-1].code == "print('streamed')"
+    assert events[-1].warnings == []
+
+
+def test_ollama_warm_up_preloads_model_with_prompt_prefix(monkeypatch) -> None:
+    monkeypatch.setattr(
+        llm_service, "get_settings", lambda: _fake_settings(llm_provider="ollama")
+    )
+    service = llm_service.AsyncLLMService()
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(json.loads(request.content))
+        return httpx.Response(200, json={"response": "", "done": True})
+
+    service.ollama_client = httpx.AsyncClient(
+        base_url="http://ollama", transport=httpx.MockTransport(handler)
+    )
+    asyncio.run(service.warm_up())
+
+    assert len(requests) == 1
+    assert requests[0]["prompt"] == llm_service.PROMPT_PREFIX
+    assert requests[0]["keep_alive"] == "30m"
+    assert requests[0]["options"] == {"num_predict": 1}
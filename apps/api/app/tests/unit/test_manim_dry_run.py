@@ -0,0 +1,108 @@
+import os
+import subprocess
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.config import get_settings
+from app.sandbox import docker_runner
+from app.services import render_orchestrator
+from app.services.manim_dry_run import enable_dry_run
+from app.services.render_types import EmptyRenderError
+
+ENTRYPOINT = Path(__file__).parents[5] / "containers" / "renderer" / "entrypoint.sh"
+
+
+class FakeManimConfig:
+    """Mirrors ManimConfig: turning dry_run on also turns save_last_frame off."""
+
+    def __init__(self) -> None:
+        self.save_last_frame = False
+        self._dry_run = False
+
+    @property
+    def dry_run(self) -> bool:
+        return self._dry_run
+
+    @dry_run.setter
+    def dry_run(self, value: bool) -> None:
+        self._dry_run = value
+        if value:
+            self.save_last_frame = False
+
+
+def test_enable_dry_run_keeps_animations_skipped() -> None:
+    config = FakeManimConfig()
+    enable_dry_run(config)
+    assert config.dry_run is True
+    assert config.save_last_frame is True
+
+
+def _capture_commands(monkeypatch, module, render_mode: str) -> list[list[str]]:
+    commands = []
+    monkeypatch.setattr(
+        render_orchestrator,
+        "get_settings",
+        lambda: SimpleNamespace(render_mode=render_mode, render_preflight_timeout_sec=30),
+    )
+    monkeypatch.setattr(module, "run_process", lambda cmd, timeout, **kwargs: commands.append(cmd))
+    return commands
+
+
+def test_local_preflight_runs_the_dry_run_wrapper(monkeypatch) -> None:
+    commands = _capture_commands(monkeypatch, render_orchestrator, "local")
+
+    render_orchestrator.RenderOrchestrator().dry_run("job_x", "from manim import *\n")
+
+    (cmd,) = commands
+    assert cmd[1] == render_orchestrator.DRY_RUN_SCRIPT
+    assert cmd[3:5] == ["GeneratedScene", "480p15"]
+    assert "--dry_run" not in cmd
+
+
+def _entrypoint_args(cmd: list[str]) -> list[str]:
+    # Everything after the image is passed to the image's ENTRYPOINT (entrypoint.sh).
+    return cmd[cmd.index(get_settings().renderer_image) + 1 :]
+
+
+def test_docker_preflight_uses_the_entrypoint_dry_run_mode(monkeypatch, tmp_path) -> None:
+    commands = _capture_commands(monkeypatch, docker_runner, "docker")
+
+    render_orchestrator.RenderOrchestrator().dry_run("job_x", "from manim import *\n")
+
+    (cmd,) = commands
+    args = _entrypoint_args(cmd)
+    assert args == ["scene.py", "GeneratedScene", "480p15", docker_runner.DRY_RUN_MODE]
+
+    # Run the real entrypoint with those args and a stub python to see which branch it takes.
+    stub = tmp_path / "python"
+    stub.write_text('#!/bin/sh\necho "$@"\n', encoding="utf-8")
+    stub.chmod(0o755)
+    result = subprocess.run(
+        ["bash", str(ENTRYPOINT), *args],
+        capture_output=True,
+        text=True,
+        check=True,
+        env={**os.environ, "PATH": f"{tmp_path}:{os.environ['PATH']}"},
+    )
+    assert result.stdout.split() == [
+        "/dry_run.py",
+        "/workspace/scene.py",
+        "GeneratedScene",
+        "480p15",
+        "/tmp/manim",
+    ]
+
+
+def test_docker_render_passes_only_entrypoint_args(monkeypatch) -> None:
+    commands = []
+    monkeypatch.setattr(
+        docker_runner, "run_process", lambda cmd, timeout, **kwargs: commands.append(cmd)
+    )
+
+    with pytest.raises(EmptyRenderError):
+        docker_runner.DockerRunner().run("job_x", "from manim import *\n", "720p30")
+
+    (cmd,) = commands
+    assert _entrypoint_args(cmd) == ["scene.py", "GeneratedScene", "720p30"]
@@ -0,0 +1,69 @@
+import os
+from pathlib import Path
+
+from app.services.partial_cache import FILE_LIST_NAME, PartialMovieCache, manim_config
+
+
+def _render(partial_dir: Path, rendered: dict[str, bytes], used: list[str]) -> None:
+    for name, content in rendered.items():
+        (partial_dir / name).write_bytes(content)
+    lines = [f"file 'file:{partial_dir / name}'" for name in used]
+    (partial_dir / FILE_LIST_NAME).write_text("\n".join(lines), encoding="utf-8")
+
+
+def test_partial_cache_reuses_partials_across_renders(tmp_path) -> None:
+    cache = PartialMovieCache(str(tmp_path / "cache"), max_bytes=1024)
+    first = tmp_path / "first"
+    cache.prepare("480p15", first)
+    _render(first, {"111_aaa.mp4": b"a", "uncached_00000.mp4": b"x"}, ["111_aaa.mp4"])
+    cache.collect("480p15", first, rendered=True)
+
+    second = tmp_path / "second"
+    cache.prepare("480p15", second)
+    assert sorted(os.listdir(second)) == ["111_aaa.mp4"]
+    assert (second / "111_aaa.mp4").is_symlink()
+    assert (second / "111_aaa.mp4").read_bytes() == b"a"
+
+    container = tmp_path / "container"
+    cache.prepare("480p15", container, link_root="/partial-cache")
+    assert os.readlink(container / "111_aaa.mp4") == "/partial-cache/111_aaa.mp4"
+
+
+def test_partial_cache_evicts_least_recently_used(tmp_path) -> None:
+    cache = PartialMovieCache(str(tmp_path / "cache"), max_bytes=10)
+    cache_dir = cache.quality_dir("720p30")
+    for index, name in enumerate(["1_old.mp4", "2_used.mp4"]):
+        (cache_dir / name).write_bytes(b"12345")
+        os.utime(cache_dir / name, (1000 + index, 1000 + index))
+
+    partial_dir = tmp_path / "render"
+    cache.prepare("720p30", partial_dir)
+    # Reusing the older entry makes it the most recent; the new partial pushes out the other.
+    _render(partial_dir, {"3_new.mp4": b"12345"}, ["1_old.mp4", "3_new.mp4"])
+    cache.collect("720p30", partial_dir, rendered=True)
+
+    assert sorted(os.listdir(cache_dir)) == ["1_old.mp4", "3_new.mp4"]
+
+
+def test_partial_cache_only_admits_partials_of_successful_renders(tmp_path) -> None:
+    cache = PartialMovieCache(str(tmp_path / "cache"), max_bytes=1024)
+    cache_dir = cache.quality_dir("480p15")
+
+    failed = tmp_path / "failed"
+    cache.prepare("480p15", failed)
+    _render(failed, {"111_aaa.mp4": b"a"}, ["111_aaa.mp4"])
+    cache.collect("480p15", failed, rendered=False)
+    assert os.listdir(cache_dir) == []
+
+    # A file the scene wrote itself, outside what Manim combined into the video, is skipped.
+    planted = tmp_path / "planted"
+    cache.prepare("480p15", planted)
+    _render(planted, {"111_aaa.mp4": b"a", "222_forged.mp4": b"evil"}, ["111_aaa.mp4"])
+    cache.collect("480p15", planted, rendered=True)
+    assert os.listdir(cache_dir) == ["111_aaa.mp4"]
+
+
+def test_manim_config_points_partials_at_render_dir() -> None:
+    config = manim_config("/partials")
+    assert config.startswith("[CLI]\n")
+    assert "partial_movie_dir = /partials" in config
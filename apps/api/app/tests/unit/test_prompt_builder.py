@@ -1,5 +1,10 @@
 from app.schemas.generate import GenerateRequest, LevelPreset, StylePreset
-from app.services.prompt_builder import build_generation_prompt
+from app.services.prompt_builder import (
+    PROMPT_PREFIX,
+    build_fix_prompt,
+    build_generation_prompt,
+    build_regenerate_prompt,
+)
 
 
 def test_prompt_builder_includes_key_constraints() -> None:
@@ -16,3 +21,21 @@ def test_prompt_builder_includes_key_constraints() -> None:
     assert "GeneratedScene" in prompt
     assert "quadratic formula" in prompt.lower()
     assert "60 seconds" in prompt
+
+
+def test_prompts_share_a_stable_prefix() -> None:
+    payload = GenerateRequest(
+        topic="Explain quadratic formula",
+        duration_seconds=60,
+        style=StylePreset.COLORFUL,
+        level=LevelPreset.SCHOOL,
+    )
+
+    prompts = [
+        build_generation_prompt(payload),
+        build_fix_prompt("print('x')", "NameError: name 'Circl' is not defined"),
+        build_regenerate_prompt("print('x')", "make it blue"),
+    ]
+    assert all(prompt.startswith(PROMPT_PREFIX) for prompt in prompts)
+    assert "60" not in PROMPT_PREFIX
+    assert "quadratic" not in PROMPT_PREFIX.lower()
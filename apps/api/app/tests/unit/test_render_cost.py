@@ -0,0 +1,96 @@
+import ast
+from types import SimpleNamespace
+
+from app.services.render_cost import MAX_RENDER_SEC, estimate_render_cost
+from app.workers import tasks_render
+
+SHORT_SCENE = """
+from manim import *
+
+class GeneratedScene(Scene):
+    def construct(self):
+        self.play(Write(Text("Hi")))
+        self.wait()
+"""
+
+LONG_SCENE = """
+from manim import *
+
+class GeneratedScene(Scene):
+    def construct(self):
+        for i in range(20):
+            self.play(Write(MathTex(r"x^2")), run_time=3)
+            self.wait(2)
+"""
+
+
+def test_estimate_sums_durations_loops_and_tex() -> None:
+    short = estimate_render_cost(ast.parse(SHORT_SCENE), "1080p30")
+    long = estimate_render_cost(ast.parse(LONG_SCENE), "1080p30")
+
+    assert short.scene_sec == 2.0
+    assert long.scene_sec == 100.0
+    assert long.render_sec > short.render_sec
+    assert estimate_render_cost(ast.parse(LONG_SCENE), "480p15").render_sec < long.render_sec
+
+
+HUGE_LOOP_SCENE = """
+from manim import *
+
+class GeneratedScene(Scene):
+    def construct(self):
+        for i in range(100000000000000000000):
+            self.wait(1e400)
+        for i in range(1000000):
+            for j in range(1000000):
+                for k in range(1000000):
+                    for m in range(1000000):
+                        self.play(Write(Tex("x")))
+"""
+
+
+def test_estimate_stays_finite_for_huge_and_nested_ranges() -> None:
+    estimate = estimate_render_cost(ast.parse(HUGE_LOOP_SCENE), "1080p30")
+
+    assert estimate.render_sec == MAX_RENDER_SEC
+    assert estimate.scene_sec <= MAX_RENDER_SEC
+
+
+def test_render_queue_name_buckets_by_estimate(monkeypatch) -> None:
+    settings = SimpleNamespace(
+        render_interactive_qualities="480p15",
+        render_size_buckets=True,
+        render_short_max_sec=30,
+        render_long_min_sec=180,
+    )
+    monkeypatch.setattr(tasks_render, "get_settings", lambda: settings)
+
+    assert tasks_render.render_queue_name("1080p30", 10) == tasks_render.SHORT_RENDER_QUEUE
+    assert tasks_render.render_queue_name("1080p30", 60) == tasks_render.RENDER_QUEUE
+    assert tasks_render.render_queue_name("1080p30", 600) == tasks_render.LONG_RENDER_QUEUE
+    assert tasks_render.render_queue_name("1080p30", None) == tasks_render.RENDER_QUEUE
+    assert tasks_render.render_queue_name("480p15", 600) == tasks_render.INTERACTIVE_RENDER_QUEUE
+    # A progressive job starts with its 480p15 preview pass.
+    assert (
+        tasks_render.render_queue_name("1080p30", 600, progressive=True)
+        == tasks_render.INTERACTIVE_RENDER_QUEUE
+    )
+
+    settings.render_size_buckets = False
+    assert tasks_render.render_queue_name("1080p30", 10) == tasks_render.RENDER_QUEUE
+
+
+def test_worker_queue_names_append_stolen_queues(monkeypatch) -> None:
+    settings = SimpleNamespace(render_worker_queues="render-long, render", render_worker_steal=True)
+    monkeypatch.setattr(tasks_render, "get_settings", lambda: settings)
+
+    assert tasks_render.worker_queue_names() == [
+        "render-long",
+        "render",
+        "render-interactive",
+        "render-short",
+    ]
+    settings.render_worker_steal = False
+    assert tasks_render.worker_queue_names() == ["render-long", "render"]
+    settings.render_worker_queues = ""
+    assert tasks_render.worker_queue_names() == list(tasks_render.RENDER_QUEUES)
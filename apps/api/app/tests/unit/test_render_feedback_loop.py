@@ -1,15 +1,140 @@
+import os
 import tempfile
+from threading import Event
 from types import SimpleNamespace
 
+import pytest
+
+from app.services.cache_service import CacheService
+from app.services.job_service import JobService
+from app.services.render_types import RenderCancelledError, RenderTimeoutError
 from app.workers import tasks_render
 
+SCENE = (
+    "from manim import *\n\nclass GeneratedScene(Scene):\n    def construct(self):\n        pass\n"
+)
+BROKEN = SCENE.replace("pass", "self.play(Create(Circel()))")
+NAME_ERROR = "NameError: name 'Circel' is not defined"
+
+
+class FakeLLMService:
+    provider = "fake"
+    model_name = "fake-model"
+
+    def __init__(self, events: list, fixed_code: str = SCENE) -> None:
+        self.events = events
+        self.fixed_code = fixed_code
+        self.temperatures = []
+
+    def fix_code(self, code: str, error: str) -> str:
+        self.events.append(("fix", error))
+        return self.fixed_code
+
+    def fix_code_candidates(self, code: str, error: str, temps: list[float]) -> list[str]:
+        self.temperatures.extend(temps)
+        return [
+            self.fixed_code.replace("pass", f"self.wait({index})") for index in range(len(temps))
+        ]
+
+
+class FakeRenderOrchestrator:
+    """Records every call; ``render_error``/``dry_run_error`` decide which ones fail."""
+
+    def __init__(self, env: SimpleNamespace) -> None:
+        self.env = env
+
+    def dry_run(self, job_id: str, code: str) -> None:
+        self.env.events.append(("dry_run", code))
+        error = self.env.dry_run_error(code)
+        if isinstance(error, Exception):
+            raise error
+        if error:
+            raise RuntimeError(error)
+
+    def run(self, job_id: str, code: str, quality: str, cancel=None):
+        self.env.events.append(("render", job_id, code, quality))
+        error = self.env.render_error(job_id, code, quality)
+        if error:
+            raise RuntimeError(error)
+        fd, tmp = tempfile.mkstemp(prefix=f"{job_id}_", suffix=".mp4")
+        os.close(fd)
+        return SimpleNamespace(video_file=tmp)
+
+
+class FakeStorageService:
+    def __init__(self, env: SimpleNamespace) -> None:
+        self.env = env
+
+    def put(self, job_id: str, src_file: str, variant: str | None = None) -> str:
+        self.env.events.append(("put", job_id, variant))
+        return f"/data/videos/{job_id}.mp4"
+
+    def package_assets(self, job_id: str) -> bool:
+        self.env.events.append(("assets", job_id, self.env.job_service.get_job(job_id)["status"]))
+        return True
+
+    def clone(self, source_job_id: str, target_job_id: str, variant: str | None = None) -> str:
+        flag = self.env.job_service.get_job(target_job_id).get("preview_ready")
+        self.env.events.append(("clone", target_job_id, variant, flag))
+        return f"/data/videos/{target_job_id}.mp4"
+
+
+@pytest.fixture
+def job_service() -> JobService:
+    service = JobService()
+    service._redis = None
+    return service
+
 
-def test_render_feedback_loop_repairs_validation_then_renders(monkeypatch) -> None:
-    initial_code = "from manim import *\n\nclass Wrong(Scene):\n    def construct(self):\n        pass\n"
-    fixed_code = (
+@pytest.fixture
+def env(monkeypatch, job_service) -> SimpleNamespace:
+    """Patches tasks_render with in-memory fakes that record calls in ``env.events``."""
+    env = SimpleNamespace(
+        job_service=job_service,
+        events=[],
+        render_error=lambda job_id, code, quality: None,
+        dry_run_error=lambda code: None,
+    )
+    env.llm = FakeLLMService(env.events)
+
+    def configure(**overrides) -> None:
+        settings = SimpleNamespace(
+            max_render_retries=0, render_fix_candidates=1, render_preflight=False, use_queue=False
+        )
+        settings.__dict__.update(overrides)
+        monkeypatch.setattr(tasks_render, "get_settings", lambda: settings)
+
+    env.configure = configure
+    configure()
+    # Memoized fixes live in memory, so a Redis left running by other tests is never read.
+    env.cache = CacheService()
+    env.cache._redis = None
+    monkeypatch.setattr(tasks_render, "CacheService", lambda: env.cache)
+    monkeypatch.setattr(tasks_render, "JobService", lambda: job_service)
+    monkeypatch.setattr(tasks_render, "LLMService", lambda: env.llm)
+    monkeypatch.setattr(tasks_render, "RenderOrchestrator", lambda: FakeRenderOrchestrator(env))
+    monkeypatch.setattr(tasks_render, "StorageService", lambda: FakeStorageService(env))
+    return env
+
+
+def _calls(env: SimpleNamespace, name: str) -> list[tuple]:
+    return [event[1:] for event in env.events if event[0] == name]
+
+
+def test_render_feedback_loop_repairs_validation_then_renders(monkeypatch, env) -> None:
+    initial_code = (
+        "from manim import *\n\nclass Wrong(Scene):\n    def construct(self):\n        pass\n"
+    )
+    env.llm.fixed_code = (
         "from manim import *\n\nclass GeneratedScene(Scene):\n"
         "    def construct(self):\n        self.play(Write(Text('ok')))\n"
     )
+    updates = []
+    transition_job = env.job_service.transition_job
+
+    def record_update(job_id: str, from_statuses, **fields):
+        updates.append(fields)
+        return transition_job(job_id, from_statuses, **fields)
 
     class FakeValidator:
         def __init__(self) -> None:
@@ -18,46 +143,201 @@ def test_render_feedback_loop_repairs_validation_then_renders(monkeypatch) -> No
         def validate(self, code: str):
             self.calls += 1
             if self.calls == 1:
-                return SimpleNamespace(ok=False, errors=["Missing required class: GeneratedScene(Scene)"])
+                return SimpleNamespace(
+                    ok=False, errors=["Missing required class: GeneratedScene(Scene)"]
+                )
             return SimpleNamespace(ok=True, errors=[])
 
-    class FakeJobService:
-        def __init__(self) -> None:
-            self.updates = []
+    monkeypatch.setattr(tasks_render, "CodeValidator", FakeValidator)
+    monkeypatch.setattr(env.job_service, "transition_job", record_update)
+    env.configure(max_render_retries=2)
+    job = env.job_service.create_job()
 
-        def update_job(self, job_id: str, **updates):
-            self.updates.append((job_id, updates))
-            return updates
+    tasks_render.process_render_job(job["job_id"], initial_code, "1080p30", retry_on_error=True)
+
+    assert len(_calls(env, "fix")) >= 1
+    assert any(update.get("status") == "retrying" for update in updates)
+    assert any(update.get("status") == "done" for update in updates)
+
+
+def test_follower_takes_over_when_leader_fails(env, job_service) -> None:
+    leader = job_service.create_job()
+    followers = [job_service.create_job(leader_job_id=leader["job_id"]) for _ in range(2)]
+    for follower in followers:
+        job_service.add_follower(leader["job_id"], follower["job_id"])
+    env.render_error = lambda job_id, code, quality: (
+        "renderer crashed" if job_id == leader["job_id"] else None
+    )
+
+    tasks_render.process_render_job(leader["job_id"], SCENE, "480p15", retry_on_error=False)
+
+    successor, other = (job_service.get_job(item["job_id"]) for item in followers)
+    assert _calls(env, "assets") == [(successor["job_id"], "done")]
+    assert [job_id for job_id, *_ in _calls(env, "render")] == [
+        leader["job_id"],
+        successor["job_id"],
+    ]
+    assert job_service.get_job(leader["job_id"])["status"] == "failed"
+    assert successor["status"] == "done"
+    assert successor["leader_job_id"] is None
+    assert other["status"] == "done"
+    assert other["video_path"] == f"/data/videos/{other['job_id']}.mp4"
 
-    class FakeLLMService:
-        def __init__(self) -> None:
-            self.fix_calls = 0
 
-        def fix_code(self, code: str, error: str) -> str:
-            self.fix_calls += 1
-            return fixed_code
+def test_progressive_render_stores_preview_then_final(env, job_service) -> None:
+    env.configure(render_preflight=True)
+    job = job_service.create_job()
 
-    class FakeRenderOrchestrator:
-        def run(self, job_id: str, code: str, quality: str):
+    tasks_render.process_render_job(job["job_id"], SCENE, "1080p30", False, progressive=True)
+
+    item = job_service.get_job(job["job_id"])
+    assert [quality for *_, quality in _calls(env, "render")] == ["480p15", "1080p30"]
+    assert [variant for _, variant in _calls(env, "put")] == ["preview", None]
+    # Derived assets are made after the job is already marked done.
+    assert env.events[-1] == ("assets", job["job_id"], "done")
+    assert item["status"] == "done"
+    assert item["preview_ready"] is True
+
+
+def test_progressive_render_skips_final_pass_when_preview_fails(env, job_service) -> None:
+    env.configure(render_preflight=True)
+    env.render_error = lambda job_id, code, quality: NAME_ERROR if quality == "480p15" else None
+    job = job_service.create_job()
+
+    tasks_render.process_render_job(job["job_id"], SCENE, "1080p30", False, progressive=True)
+
+    item = job_service.get_job(job["job_id"])
+    assert [quality for *_, quality in _calls(env, "render")] == ["480p15"]
+    assert _calls(env, "put") == []
+    assert item["status"] == "failed"
+    assert "preview_ready" not in item
+
+
+def test_progressive_preview_reaches_followers_and_final_pass_is_queued(
+    monkeypatch, env, job_service
+) -> None:
+    leader = job_service.create_job()["job_id"]
+    follower = job_service.create_job(leader_job_id=leader)["job_id"]
+    job_service.add_follower(leader, follower)
+    enqueued = []
+    monkeypatch.setattr(
+        tasks_render, "enqueue_render", lambda queue, *args: enqueued.append((queue.name, args))
+    )
+    env.configure(
+        use_queue=True,
+        redis_url="redis://localhost:6379/0",
+        render_interactive_qualities="480p15",
+        render_size_buckets=False,
+    )
+
+    tasks_render.process_render_job(leader, SCENE, "1080p30", False, progressive=True)
+
+    # The follower's preview file exists before its preview_ready flag is mirrored.
+    assert env.events == [
+        ("render", leader, SCENE, "480p15"),
+        ("put", leader, "preview"),
+        ("clone", follower, "preview", None),
+    ]
+    assert job_service.get_job_fields(follower, "stage", "preview_ready") == {
+        "stage": "preview_ready",
+        "preview_ready": True,
+    }
+    assert enqueued == [(tasks_render.RENDER_QUEUE, (leader, SCENE, "1080p30", False, True, True))]
+
+    env.events.clear()
+    tasks_render.process_render_job(leader, SCENE, "1080p30", False, True, preview_done=True)
+    assert env.events[:2] == [("render", leader, SCENE, "1080p30"), ("put", leader, None)]
+    assert job_service.get_job(follower)["status"] == "done"
+
+
+def test_speculative_repair_renders_candidates_and_keeps_first_success(env, job_service) -> None:
+    job = job_service.create_job()
+    env.configure(max_render_retries=1, render_fix_candidates=3)
+    env.render_error = lambda job_id, code, quality: (
+        NAME_ERROR if "Circel" in code or "wait(0)" in code else None
+    )
+
+    tasks_render.process_render_job(job["job_id"], BROKEN, "480p15", retry_on_error=True)
+
+    assert env.llm.temperatures == [0.1, 0.4, 0.7]
+    assert len(_calls(env, "render")) >= 3
+    assert job_service.get_job(job["job_id"])["status"] == "done"
+
+
+def test_losing_candidate_renders_are_cancelled() -> None:
+    stopped = Event()
+
+    class SlowLoserOrchestrator:
+        def run(self, job_id: str, code: str, quality: str, cancel=None):
+            if code == "slow":
+                if cancel.wait(5):
+                    stopped.set()
+                raise RenderCancelledError("Render cancelled")
             fd, tmp = tempfile.mkstemp(prefix=f"{job_id}_", suffix=".mp4")
+            os.close(fd)
             return SimpleNamespace(video_file=tmp)
 
-    class FakeStorageService:
-        def put(self, job_id: str, src_file: str) -> str:
-            return f"/data/videos/{job_id}.mp4"
+    winner, result = tasks_render._render_first(
+        SlowLoserOrchestrator(), "job_test", ["slow", "fast"], "480p15"
+    )
+    os.unlink(result.video_file)
 
-    fake_job_service = FakeJobService()
-    fake_llm_service = FakeLLMService()
+    assert winner == "fast"
+    assert stopped.wait(5)
 
-    monkeypatch.setattr(tasks_render, "CodeValidator", FakeValidator)
-    monkeypatch.setattr(tasks_render, "JobService", lambda: fake_job_service)
-    monkeypatch.setattr(tasks_render, "LLMService", lambda: fake_llm_service)
-    monkeypatch.setattr(tasks_render, "RenderOrchestrator", FakeRenderOrchestrator)
-    monkeypatch.setattr(tasks_render, "StorageService", FakeStorageService)
-    monkeypatch.setattr(tasks_render, "get_settings", lambda: SimpleNamespace(max_render_retries=2))
 
-    tasks_render.process_render_job("job_test", initial_code, "1080p30", retry_on_error=True)
+def test_preflight_failure_goes_to_fix_loop_before_full_render(env, job_service) -> None:
+    job = job_service.create_job()
+    env.configure(max_render_retries=1, render_preflight=True)
+    env.dry_run_error = lambda code: NAME_ERROR if "Circel" in code else None
+
+    tasks_render.process_render_job(job["job_id"], BROKEN, "1080p30", retry_on_error=True)
+
+    assert [name for name, *_ in env.events] == [
+        "dry_run",
+        "fix",
+        "dry_run",
+        "render",
+        "put",
+        "assets",
+    ]
+    assert "Circel" in env.events[1][1]
+    assert job_service.get_job(job["job_id"])["status"] == "done"
+
+
+def test_preflight_timeout_goes_to_fix_loop_instead_of_timing_out(env, job_service) -> None:
+    job = job_service.create_job()
+    env.configure(max_render_retries=1, render_preflight=True)
+    env.dry_run_error = lambda code: (
+        RenderTimeoutError("Sandbox render timed out") if "Circel" in code else None
+    )
+
+    tasks_render.process_render_job(job["job_id"], BROKEN, "1080p30", retry_on_error=True)
+
+    assert [name for name, *_ in env.events][:4] == ["dry_run", "fix", "dry_run", "render"]
+    assert "Pre-flight dry run timed out" in env.events[1][1]
+    assert job_service.get_job(job["job_id"])["status"] == "done"
+
+
+def test_repeat_failure_reuses_memoized_fix(env, job_service) -> None:
+    env.configure(max_render_retries=1)
+    env.render_error = lambda job_id, code, quality: (
+        f'File "/tmp/manim_{job_id}_x/scene.py", line 5\nNameError' if "Circel" in code else None
+    )
+
+    jobs = [job_service.create_job()["job_id"] for _ in range(2)]
+    for job_id in jobs:
+        tasks_render.process_render_job(job_id, BROKEN, "480p15", retry_on_error=True)
+
+    assert len(_calls(env, "fix")) == 1
+    assert all(job_service.get_job(job_id)["status"] == "done" for job_id in jobs)
+
+
+def test_render_job_does_not_reopen_a_finished_job(env) -> None:
+    job = env.job_service.create_job()
+    env.job_service.update_job(job["job_id"], status="done", stage="done", video_path="/v.mp4")
+
+    tasks_render.process_render_job(job["job_id"], "print('x')", "1080p30")
 
-    assert fake_llm_service.fix_calls >= 1
-    assert any(update.get("status") == "retrying" for _, update in fake_job_service.updates)
-    assert any(update.get("status") == "done" for _, update in fake_job_service.updates)
+    assert _calls(env, "render") == []
+    assert env.job_service.get_job(job["job_id"])["video_path"] == "/v.mp4"
@@ -0,0 +1,142 @@
+from threading import Event
+
+import pytest
+
+from app.services import render_pool
+from app.services.render_pool import ManimWorkerPool
+from app.services.render_types import RenderCancelledError, RenderTimeoutError
+
+
+class FakeConn:
+    def __init__(self, reply=("ok", "", 100.0), ready: bool = True) -> None:
+        self.reply = reply
+        self.ready = ready
+        self.sent = []
+        self.closed = False
+
+    def send(self, message) -> None:
+        self.sent.append(message)
+
+    def poll(self, timeout: float) -> bool:
+        return self.ready
+
+    def recv(self):
+        return self.reply
+
+
+class FakeWorker:
+    def __init__(self, conn: FakeConn) -> None:
+        self.conn = conn
+        self.renders = 0
+        self.rss_mb = 0.0
+        self.stopped = False
+        self.killed = False
+
+    def stop(self) -> None:
+        self.stopped = True
+
+    def kill(self) -> None:
+        self.killed = True
+
+
+def _pool_with_fakes(
+    monkeypatch, conns, max_renders: int = 0, max_rss_mb: int = 0
+) -> tuple[ManimWorkerPool, list[FakeWorker]]:
+    pool = ManimWorkerPool(size=1, max_renders=max_renders, max_rss_mb=max_rss_mb)
+    spawned: list[FakeWorker] = []
+
+    def fake_spawn():
+        worker = FakeWorker(conns.pop(0) if conns else FakeConn())
+        spawned.append(worker)
+        return worker
+
+    monkeypatch.setattr(pool, "_spawn", fake_spawn)
+    return pool, spawned
+
+
+def test_render_pool_reuses_warm_worker(monkeypatch) -> None:
+    pool, spawned = _pool_with_fakes(monkeypatch, [])
+    pool.render("code", "480p15", "/tmp/a", timeout=5)
+    pool.render("code", "480p15", "/tmp/b", timeout=5)
+
+    assert len(spawned) == 1
+    assert spawned[0].renders == 2
+    assert spawned[0].conn.sent[1] == ("code", "480p15", "/tmp/b")
+
+
+def test_render_pool_recycles_after_max_renders(monkeypatch) -> None:
+    pool, spawned = _pool_with_fakes(monkeypatch, [], max_renders=2)
+    for _ in range(3):
+        pool.render("code", "480p15", "/tmp/a", timeout=5)
+
+    assert len(spawned) == 2
+    assert spawned[0].stopped is True
+
+
+def test_render_pool_recycles_on_memory_growth(monkeypatch) -> None:
+    conns = [FakeConn(reply=("ok", "", 4096.0))]
+    pool, spawned = _pool_with_fakes(monkeypatch, conns, max_rss_mb=1024)
+    pool.render("code", "480p15", "/tmp/a", timeout=5)
+
+    assert len(spawned) == 2
+    assert spawned[0].stopped is True
+
+
+def test_render_pool_replaces_worker_on_timeout(monkeypatch) -> None:
+    pool, spawned = _pool_with_fakes(monkeypatch, [FakeConn(ready=False)])
+    with pytest.raises(RenderTimeoutError):
+        pool.render("code", "480p15", "/tmp/a", timeout=0.01)
+
+    assert spawned[0].killed is True
+    assert len(spawned) == 2
+
+
+def test_render_pool_kills_worker_of_cancelled_render(monkeypatch) -> None:
+    pool, spawned = _pool_with_fakes(monkeypatch, [FakeConn(ready=False)])
+    cancel = Event()
+    cancel.set()
+    with pytest.raises(RenderCancelledError):
+        pool.render("code", "480p15", "/tmp/a", timeout=60, cancel=cancel)
+
+    assert spawned[0].killed is True
+    assert len(spawned) == 2
+
+
+def test_render_pool_surfaces_scene_errors(monkeypatch) -> None:
+    conns = [FakeConn(reply=("error", "NameError: name 'Foo'", 90.0))]
+    pool, _ = _pool_with_fakes(monkeypatch, conns)
+    with pytest.raises(RuntimeError, match="NameError"):
+        pool.render("code", "480p15", "/tmp/a", timeout=5)
+
+
+LEAKED_STATE = {"default_color": "WHITE"}
+
+
+def test_forked_render_does_not_leak_module_state(monkeypatch) -> None:
+    def fake_render(code: str, quality: str, work_dir: str) -> None:
+        LEAKED_STATE["default_color"] = "RED"
+
+    monkeypatch.setattr(render_pool, "_render_in_process", fake_render)
+    status, _, _ = render_pool._render_forked("code", "480p15", "/tmp/a")
+    assert status == "ok"
+    assert LEAKED_STATE["default_color"] == "WHITE"
+
+
+def test_forked_render_reports_scene_errors(monkeypatch) -> None:
+    def fake_render(code: str, quality: str, work_dir: str) -> None:
+        raise NameError("name 'Foo' is not defined")
+
+    monkeypatch.setattr(render_pool, "_render_in_process", fake_render)
+    status, detail, _ = render_pool._render_forked("code", "480p15", "/tmp/a")
+    assert status == "error"
+    assert "NameError" in detail
+
+
+def test_forked_render_reports_the_childs_peak_rss(monkeypatch) -> None:
+    def fake_render(code: str, quality: str, work_dir: str) -> None:
+        ballast = bytearray(64 * 1024 * 1024)
+        ballast[::4096] = b"x" * len(ballast[::4096])
+
+    monkeypatch.setattr(render_pool, "_render_in_process", fake_render)
+    _, _, rss_mb = render_pool._render_forked("code", "480p15", "/tmp/a")
+    assert rss_mb >= 64
@@ -0,0 +1,38 @@
+import subprocess
+import sys
+import time
+from threading import Event, Timer
+
+import pytest
+
+from app.services.render_process import run_process
+from app.services.render_types import RenderCancelledError
+
+SLEEP = [sys.executable, "-c", "import time; time.sleep(30)"]
+
+
+def test_run_process_returns_output_and_raises_on_failure() -> None:
+    result = run_process([sys.executable, "-c", "print('rendered')"], timeout=10)
+    assert result.stdout.strip() == "rendered"
+
+    with pytest.raises(subprocess.CalledProcessError) as exc_info:
+        run_process([sys.executable, "-c", "import sys; sys.exit('boom')"], timeout=10)
+    assert "boom" in exc_info.value.stderr
+
+
+def test_run_process_kills_cancelled_command_and_runs_stop_hook() -> None:
+    cancel = Event()
+    stopped = []
+    Timer(0.2, cancel.set).start()
+
+    started = time.monotonic()
+    with pytest.raises(RenderCancelledError):
+        run_process(SLEEP, timeout=30, cancel=cancel, on_stop=lambda: stopped.append(True))
+
+    assert time.monotonic() - started < 5
+    assert stopped == [True]
+
+
+def test_run_process_times_out() -> None:
+    with pytest.raises(subprocess.TimeoutExpired):
+        run_process(SLEEP, timeout=0.3)
@@ -0,0 +1,146 @@
+import ast
+import time
+from threading import Event
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import render_orchestrator
+from app.services.render_types import EmptyRenderError, RenderCancelledError, RenderResult
+from app.services.scene_sections import SECTION_SCENE_CLASS, plan_sections, section_script
+
+SECTIONED_SCENE = """from manim import *
+
+class GeneratedScene(Scene):
+    def construct(self):
+        self.next_section("intro")
+        title = Text("Hi")
+        self.play(Write(title))
+        self.next_section("body")
+        self.play(FadeOut(title))
+        self.next_section("outro")
+        self.wait()
+"""
+
+
+def test_plan_sections_splits_on_top_level_next_section() -> None:
+    # Section 0 (before the first next_section call) is empty and is not rendered.
+    assert plan_sections(SECTIONED_SCENE) == [1, 2, 3]
+
+
+def test_plan_sections_refuses_dynamic_sections() -> None:
+    looped = SECTIONED_SCENE.replace(
+        '        self.next_section("outro")\n',
+        "        for _ in range(2):\n            self.next_section()\n",
+    )
+    assert plan_sections(looped) == []
+    assert plan_sections(SECTIONED_SCENE.replace("next_section", "wait")) == []
+
+
+def test_section_script_defines_section_scene() -> None:
+    tree = ast.parse(section_script(SECTIONED_SCENE, 2))
+    classes = [node.name for node in tree.body if isinstance(node, ast.ClassDef)]
+    assert classes == ["GeneratedScene", SECTION_SCENE_CLASS]
+
+
+def test_orchestrator_renders_sections_and_concats_in_order(monkeypatch, tmp_path) -> None:
+    monkeypatch.setattr(
+        render_orchestrator,
+        "get_settings",
+        lambda: SimpleNamespace(render_section_parallelism=4, render_timeout_sec=10),
+    )
+    orchestrator = render_orchestrator.RenderOrchestrator()
+    rendered = []
+
+    def fake_render(job_id: str, code: str, quality: str, scene_class: str, cancel=None):
+        rendered.append((job_id, scene_class))
+        if job_id.endswith("_s2"):
+            raise EmptyRenderError("nothing to render")
+        video = tmp_path / f"{job_id}.mp4"
+        video.write_bytes(job_id.encode())
+        return RenderResult(video_file=str(video))
+
+    joined = []
+
+    def fake_concat(job_id: str, videos: list[str]) -> str:
+        joined.extend(videos)
+        return str(tmp_path / "joined.mp4")
+
+    monkeypatch.setattr(orchestrator, "_render", fake_render)
+    monkeypatch.setattr(orchestrator, "_concat", fake_concat)
+
+    result = orchestrator.run("job_x", SECTIONED_SCENE, "480p15")
+
+    assert result.video_file == str(tmp_path / "joined.mp4")
+    assert sorted(rendered) == [(f"job_x_s{i}", SECTION_SCENE_CLASS) for i in (1, 2, 3)]
+    assert joined == [str(tmp_path / "job_x_s1.mp4"), str(tmp_path / "job_x_s3.mp4")]
+    assert not any(tmp_path.glob("job_x_s*.mp4"))
+
+
+def test_orchestrator_section_failure_fails_render(monkeypatch) -> None:
+    monkeypatch.setattr(
+        render_orchestrator,
+        "get_settings",
+        lambda: SimpleNamespace(render_section_parallelism=2, render_timeout_sec=10),
+    )
+    orchestrator = render_orchestrator.RenderOrchestrator()
+
+    def fake_render(job_id: str, code: str, quality: str, scene_class: str, cancel=None):
+        raise RuntimeError(f"{job_id} crashed")
+
+    monkeypatch.setattr(orchestrator, "_render", fake_render)
+    with pytest.raises(RuntimeError, match="crashed"):
+        orchestrator.run("job_y", SECTIONED_SCENE, "480p15")
+
+
+def _wait_for_cancel(cancel) -> None:
+    deadline = time.monotonic() + 5
+    while not cancel.is_set():
+        if time.monotonic() >= deadline:
+            raise AssertionError("section was never cancelled")
+        time.sleep(0.01)
+    raise RenderCancelledError("Render cancelled")
+
+
+def test_orchestrator_section_failure_cancels_sibling_sections(monkeypatch) -> None:
+    monkeypatch.setattr(
+        render_orchestrator,
+        "get_settings",
+        lambda: SimpleNamespace(render_section_parallelism=3, render_timeout_sec=10),
+    )
+    orchestrator = render_orchestrator.RenderOrchestrator()
+    cancelled = []
+
+    def fake_render(job_id: str, code: str, quality: str, scene_class: str, cancel=None):
+        if job_id.endswith("_s3"):
+            raise RuntimeError(f"{job_id} crashed")
+        try:
+            _wait_for_cancel(cancel)
+        finally:
+            cancelled.append(job_id)
+
+    monkeypatch.setattr(orchestrator, "_render", fake_render)
+    caller_cancel = Event()
+    with pytest.raises(RuntimeError, match="job_z_s3 crashed"):
+        orchestrator.run("job_z", SECTIONED_SCENE, "480p15", cancel=caller_cancel)
+
+    assert sorted(cancelled) == ["job_z_s1", "job_z_s2"]
+    assert not caller_cancel.is_set()
+
+
+def test_orchestrator_sections_follow_the_callers_cancel(monkeypatch) -> None:
+    monkeypatch.setattr(
+        render_orchestrator,
+        "get_settings",
+        lambda: SimpleNamespace(render_section_parallelism=3, render_timeout_sec=10),
+    )
+    orchestrator = render_orchestrator.RenderOrchestrator()
+    monkeypatch.setattr(
+        orchestrator,
+        "_render",
+        lambda job_id, code, quality, scene_class, cancel: _wait_for_cancel(cancel),
+    )
+    cancel = Event()
+    cancel.set()
+    with pytest.raises(RenderCancelledError):
+        orchestrator.run("job_c", SECTIONED_SCENE, "480p15", cancel=cancel)
@@ -0,0 +1,112 @@
+import asyncio
+
+import pytest
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from app.services.single_flight import SingleFlight
+
+
+async def _no_cache() -> str | None:
+    return None
+
+
+def test_single_flight_coalesces_concurrent_calls() -> None:
+    flight = SingleFlight(redis=None, lock_ttl_sec=10, wait_timeout_sec=10)
+    calls = 0
+
+    async def work() -> str:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return "result"
+
+    async def run():
+        return await asyncio.gather(*(flight.do("key", work, _no_cache) for _ in range(5)))
+
+    assert asyncio.run(run()) == ["result"] * 5
+    assert calls == 1
+
+
+def test_single_flight_shares_leader_failure_then_recovers() -> None:
+    flight = SingleFlight(redis=None, lock_ttl_sec=10, wait_timeout_sec=10)
+
+    async def failing() -> str:
+        await asyncio.sleep(0.01)
+        raise RuntimeError("provider down")
+
+    async def ok() -> str:
+        return "fresh"
+
+    async def run():
+        return await asyncio.gather(
+            flight.do("key", failing, _no_cache),
+            flight.do("key", failing, _no_cache),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert asyncio.run(flight.do("key", ok, _no_cache)) == "fresh"
+
+
+def test_single_flight_keeps_distinct_keys_separate() -> None:
+    flight = SingleFlight(redis=None, lock_ttl_sec=10, wait_timeout_sec=10)
+
+    async def run():
+        async def work_a() -> str:
+            return "a"
+
+        async def work_b() -> str:
+            return "b"
+
+        return await asyncio.gather(
+            flight.do("a", work_a, _no_cache), flight.do("b", work_b, _no_cache)
+        )
+
+    assert asyncio.run(run()) == ["a", "b"]
+    assert flight._inflight == {}
+
+
+def test_single_flight_survives_cancelled_leader_caller() -> None:
+    flight = SingleFlight(redis=None, lock_ttl_sec=10, wait_timeout_sec=10)
+
+    async def work() -> str:
+        await asyncio.sleep(0.05)
+        return "result"
+
+    async def run():
+        leader = asyncio.create_task(flight.do("key", work, _no_cache))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do("key", work, _no_cache))
+        await asyncio.sleep(0.01)
+        leader.cancel()  # e.g. the leader's client disconnected
+        return await follower, leader.cancelled()
+
+    assert asyncio.run(run()) == ("result", True)
+
+
+class BrokenAfterLockRedis:
+    """Grants the lock, then loses the connection before the leader can announce."""
+
+    async def set(self, *args, **kwargs) -> bool:
+        return True
+
+    async def publish(self, *args) -> int:
+        raise RedisConnectionError("connection lost")
+
+    async def eval(self, *args) -> int:
+        raise RedisConnectionError("connection lost")
+
+
+def test_single_flight_leader_keeps_its_outcome_when_redis_drops() -> None:
+    flight = SingleFlight(redis=BrokenAfterLockRedis(), lock_ttl_sec=10, wait_timeout_sec=10)
+
+    async def ok() -> str:
+        return "result"
+
+    async def failing() -> str:
+        raise ValueError("bad prompt")
+
+    assert asyncio.run(flight.do("a", ok, _no_cache)) == "result"
+    with pytest.raises(ValueError, match="bad prompt"):
+        asyncio.run(flight.do("b", failing, _no_cache))
@@ -0,0 +1,102 @@
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import storage_service
+
+
+def _service(monkeypatch, tmp_path: Path) -> storage_service.StorageService:
+    settings = SimpleNamespace(video_storage_root=str(tmp_path / "videos"))
+    monkeypatch.setattr(storage_service, "get_settings", lambda: settings)
+    return storage_service.StorageService()
+
+
+def _video(tmp_path: Path, name: str, content: bytes) -> str:
+    path = tmp_path / name
+    path.write_bytes(content)
+    return str(path)
+
+
+def test_storage_deduplicates_identical_videos(monkeypatch, tmp_path) -> None:
+    service = _service(monkeypatch, tmp_path)
+    first = service.put("job_a", _video(tmp_path, "a.mp4", b"same-bytes"))
+    second = service.put("job_b", _video(tmp_path, "b.mp4", b"same-bytes"))
+
+    assert Path(first).stat().st_ino == Path(second).stat().st_ino
+    assert len(list(service.blob_root.rglob("*.mp4"))) == 1
+
+
+def test_storage_clone_links_existing_video(monkeypatch, tmp_path) -> None:
+    service = _service(monkeypatch, tmp_path)
+    original = service.put("job_a", _video(tmp_path, "a.mp4", b"video"))
+    cloned = service.clone("job_a", "job_b")
+
+    assert cloned is not None
+    assert Path(cloned).stat().st_ino == Path(original).stat().st_ino
+    assert service.clone("job_missing", "job_c") is None
+
+
+def test_storage_delete_keeps_blob_until_last_reference(monkeypatch, tmp_path) -> None:
+    service = _service(monkeypatch, tmp_path)
+    service.put("job_a", _video(tmp_path, "a.mp4", b"video"))
+    service.clone("job_a", "job_b")
+
+    service.delete("job_a")
+    assert service.get("job_a") is None
+    assert Path(service.get("job_b")).read_bytes() == b"video"
+    assert len(list(service.blob_root.rglob("*.mp4"))) == 1
+
+    service.delete("job_b")
+    assert service.get("job_b") is None
+    assert list(service.blob_root.rglob("*.mp4")) == []
+
+
+class FakePackager:
+    produces_assets = True
+
+    def __init__(self) -> None:
+        self.packaged = 0
+
+    def faststart(self, src_file: str) -> str:
+        return src_file
+
+    def package_assets(self, video_file, out_dir) -> None:
+        self.packaged += 1
+        (Path(out_dir) / "hls").mkdir()
+        (Path(out_dir) / "hls" / "index.m3u8").write_text("#EXTM3U\n", encoding="utf-8")
+        (Path(out_dir) / "poster.jpg").write_bytes(b"jpeg")
+
+
+def test_storage_packages_assets_once_per_blob(monkeypatch, tmp_path) -> None:
+    service = _service(monkeypatch, tmp_path)
+    service.packager = FakePackager()
+    service.put("job_a", _video(tmp_path, "a.mp4", b"video"))
+    service.put("job_b", _video(tmp_path, "b.mp4", b"video"))
+    service.clone("job_a", "job_c")
+    # Storing a video leaves the assets for later; until then there are none to serve.
+    assert service.packager.packaged == 0
+    assert service.get_asset("job_c", "poster.jpg") is None
+
+    assert service.package_assets("job_a") is True
+    assert service.package_assets("job_b") is True
+    assert service.packager.packaged == 1
+    for job_id in ("job_a", "job_b", "job_c"):
+        assert Path(service.get_hls(job_id, "index.m3u8")).read_text() == "#EXTM3U\n"
+        assert Path(service.get_asset(job_id, "poster.jpg")).read_bytes() == b"jpeg"
+    assert service.get_hls("job_a", "../job_b.mp4") is None
+    assert service.get_asset("job_a", "preview.webp") is None
+
+    for job_id in ("job_a", "job_b", "job_c"):
+        service.delete(job_id)
+    assert list(service.blob_root.rglob("*.assets")) == []
+
+
+def test_storage_rejects_roots_without_hardlinks(monkeypatch, tmp_path) -> None:
+    def no_link(src, dest) -> None:
+        raise PermissionError("Operation not permitted")
+
+    monkeypatch.setattr(storage_service.os, "link", no_link)
+    with pytest.raises(RuntimeError, match="must support hardlinks"):
+        _service(monkeypatch, tmp_path)
+    assert list((tmp_path / "videos" / "blobs").iterdir()) == []
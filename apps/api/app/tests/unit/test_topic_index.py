@@ -0,0 +1,34 @@
+from app.services.topic_index import TopicIndex, normalize_topic
+
+
+def test_normalize_topic_drops_case_punctuation_and_filler_words() -> None:
+    assert normalize_topic("  Explain the Pythagorean theorem! ") == "pythagorean theorem"
+    assert normalize_topic("The") == "the"
+
+
+def test_lookup_finds_rewordings_within_the_same_partition() -> None:
+    index = TopicIndex(threshold=0.8, max_entries=10)
+    index.add("school", "Pythagorean theorem", "hash-1")
+    index.add("school", "Quadratic formula", "hash-2")
+
+    matches = index.lookup("school", "the pythagorean theorem ")
+    assert [match.request_hash for match in matches] == ["hash-1"]
+    assert matches[0].similarity == 1.0
+    assert matches[0].topic == "Pythagorean theorem"
+    assert index.lookup("advanced", "the pythagorean theorem") == []
+    assert index.lookup("school", "Fourier series") == []
+
+
+def test_index_evicts_least_recently_used_entries() -> None:
+    index = TopicIndex(threshold=0.8, max_entries=2)
+    index.add("p", "Pythagorean theorem", "hash-1")
+    index.add("p", "Quadratic formula", "hash-2")
+    assert index.lookup("p", "pythagorean theorem")
+    index.add("p", "Fourier series", "hash-3")
+
+    assert len(index) == 2
+    assert index.lookup("p", "quadratic formula") == []
+    assert index.lookup("p", "pythagorean theorem")
+
+    index.discard("hash-1")
+    assert index.lookup("p", "pythagorean theorem") == []
@@ -0,0 +1,65 @@
+import struct
+from pathlib import Path
+
+from app.services.video_packager import VideoPackager, needs_faststart
+
+
+def _box(box_type: bytes, payload: bytes = b"") -> bytes:
+    return struct.pack(">I4s", 8 + len(payload), box_type) + payload
+
+
+def _mp4(tmp_path: Path, name: str, *boxes: bytes) -> str:
+    path = tmp_path / name
+    path.write_bytes(b"".join(boxes))
+    return str(path)
+
+
+def test_needs_faststart_checks_moov_position(tmp_path) -> None:
+    tail_moov = _mp4(
+        tmp_path, "a.mp4", _box(b"ftyp", b"isom"), _box(b"mdat", b"x" * 64), _box(b"moov")
+    )
+    head_moov = _mp4(tmp_path, "b.mp4", _box(b"ftyp", b"isom"), _box(b"moov"), _box(b"mdat", b"x"))
+
+    assert needs_faststart(tail_moov) is True
+    assert needs_faststart(head_moov) is False
+    assert needs_faststart(_mp4(tmp_path, "c.mp4", b"not an mp4")) is False
+
+
+def test_faststart_only_rewrites_when_needed(monkeypatch, tmp_path) -> None:
+    packager = VideoPackager(faststart=True, hls=False, hls_segment_sec=4, timeout_sec=10)
+    calls = []
+
+    def fake_ffmpeg(args: list[str]) -> None:
+        calls.append(args)
+        Path(args[-1]).write_bytes(b"faststart")
+
+    monkeypatch.setattr(packager, "_ffmpeg", fake_ffmpeg)
+    head_moov = _mp4(tmp_path, "b.mp4", _box(b"moov"), _box(b"mdat"))
+    tail_moov = _mp4(tmp_path, "a.mp4", _box(b"mdat"), _box(b"moov"))
+
+    assert packager.faststart(head_moov) == head_moov
+    output = packager.faststart(tail_moov)
+    assert output != tail_moov
+    assert Path(output).read_bytes() == b"faststart"
+    assert "+faststart" in calls[0]
+    Path(output).unlink()
+
+
+def test_package_assets_writes_poster_and_animated_preview(monkeypatch, tmp_path) -> None:
+    packager = VideoPackager(
+        faststart=False, hls=False, hls_segment_sec=4, timeout_sec=10, thumbnails=True
+    )
+    calls = []
+
+    def fake_ffmpeg(args: list[str]) -> None:
+        calls.append(args)
+        Path(args[-1]).write_bytes(b"image")
+
+    monkeypatch.setattr(packager, "_ffmpeg", fake_ffmpeg)
+    monkeypatch.setattr(packager, "_duration", lambda video_file: 30.0)
+    packager.package_assets(tmp_path / "video.mp4", tmp_path)
+
+    assert (tmp_path / "poster.jpg").read_bytes() == b"image"
+    assert (tmp_path / "preview.webp").read_bytes() == b"image"
+    assert any(arg.startswith("setpts=PTS/5.000") for arg in calls[1])
+    assert not (tmp_path / "hls").exists()
@@ -0,0 +1,56 @@
+import pytest
+
+from app.workers import supervisor
+from app.workers.supervisor import parse_memory, plan_worker_cpusets
+
+GIB = 1024**3
+
+
+def test_parse_memory_accepts_docker_units() -> None:
+    assert parse_memory("512m") == 512 * 1024**2
+    assert parse_memory("1g") == GIB
+    assert parse_memory("1.5GB") == int(1.5 * GIB)
+    with pytest.raises(ValueError):
+        parse_memory("lots")
+
+
+def test_plan_sizes_workers_from_cores_and_memory() -> None:
+    cpus = list(range(8))
+
+    assert plan_worker_cpusets(cpus, 64 * GIB, "2.0", "1g") == ["0,1", "2,3", "4,5", "6,7"]
+    assert plan_worker_cpusets(cpus, 64 * GIB, "1.5", "1g") == ["0,1", "2,3", "4,5", "6,7"]
+    assert plan_worker_cpusets(cpus, 3 * GIB, "1.0", "1g") == ["0", "1", "2"]
+    assert plan_worker_cpusets([0], 512 * 1024**2, "1.0", "1g") == ["0"]
+
+
+def test_plan_leaves_oversized_explicit_counts_unpinned() -> None:
+    assert plan_worker_cpusets([0, 1], 64 * GIB, "1.0", "1g", workers=2) == ["0", "1"]
+    assert plan_worker_cpusets([0, 1], 64 * GIB, "1.0", "1g", workers=3) == ["", "", ""]
+
+
+def test_plan_budgets_for_concurrent_sandboxes_per_worker() -> None:
+    cpus = list(range(8))
+
+    assert plan_worker_cpusets(cpus, 64 * GIB, "1.0", "1g", fan_out=2) == [
+        "0,1",
+        "2,3",
+        "4,5",
+        "6,7",
+    ]
+    assert plan_worker_cpusets(cpus, 4 * GIB, "1.0", "1g", fan_out=4) == ["0,1,2,3"]
+    assert plan_worker_cpusets(cpus, 64 * GIB, "1.0", "1g", workers=3, fan_out=4) == [""] * 3
+
+
+def test_host_memory_respects_cgroup_limit(monkeypatch, tmp_path) -> None:
+    limit = tmp_path / "memory.max"
+    monkeypatch.setattr(supervisor, "CGROUP_MEMORY_LIMITS", (str(limit),))
+    monkeypatch.setattr(
+        supervisor.os, "sysconf", lambda name: 4096 if name == "SC_PAGE_SIZE" else GIB // 256
+    )
+
+    limit.write_text("2147483648\n")
+    assert supervisor._host_memory_bytes() == 2 * GIB
+    limit.write_text("max\n")
+    assert supervisor._host_memory_bytes() == 16 * GIB
+    limit.unlink()
+    assert supervisor._host_memory_bytes() == 16 * GIB
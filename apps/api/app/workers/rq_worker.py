@@ -1,9 +1,10 @@
 import logging
 
 from redis import Redis
-from rq import Worker
+from rq import SimpleWorker, Worker
 
 from app.core.config import get_settings
+from app.workers.tasks_render import worker_queue_names
 
 logger = logging.getLogger(__name__)
 
@@ -11,7 +12,13 @@ logger = logging.getLogger(__name__)
 def run_worker() -> None:
     settings = get_settings()
     redis_conn = Redis.from_url(settings.redis_url)
-    worker = Worker(["render"], connection=redis_conn)
+    # The warm render pool must outlive individual jobs, so run them in-process
+    # instead of in a forked work horse.
+    worker_cls = SimpleWorker if settings.render_mode == "pool" else Worker
+    # RQ always takes the next job from the first non-empty queue in this list.
+    queues = worker_queue_names()
+    logger.info("Render worker consuming %s", ", ".join(queues))
+    worker = worker_cls(queues, connection=redis_conn)
     worker.work()
 
 
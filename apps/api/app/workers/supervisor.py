@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import logging
+import math
+import multiprocessing
+import os
+import re
+import signal
+import time
+from multiprocessing.process import BaseProcess
+
+from app.core.config import get_settings
+from app.workers.rq_worker import run_worker
+
+logger = logging.getLogger(__name__)
+
+# Read by each child's Settings as ``sandbox_cpuset``.
+CPUSET_ENV = "SANDBOX_CPUSET"
+POLL_INTERVAL_SEC = 1.0
+RESTART_BACKOFF_MAX_SEC = 30.0
+# A child that stayed up this long is considered healthy again; its backoff resets.
+HEALTHY_UPTIME_SEC = 60.0
+_MEMORY_LIMIT = re.compile(r"^(\d+(?:\.\d+)?)([kmgt]?)b?$")
+_MEMORY_UNITS = {"": 1, "k": 1024, "m": 1024**2, "g": 1024**3, "t": 1024**4}
+# Memory limit of the supervisor's own cgroup, v2 first, then v1.
+CGROUP_MEMORY_LIMITS = (
+    "/sys/fs/cgroup/memory.max",
+    "/sys/fs/cgroup/memory/memory.limit_in_bytes",
+)
+
+
+def parse_memory(value: str) -> int:
+    """Bytes in a Docker-style memory limit such as ``512m`` or ``1g``."""
+    match = _MEMORY_LIMIT.match(value.strip().lower())
+    if not match:
+        raise ValueError(f"Invalid memory limit: {value!r}")
+    return int(float(match.group(1)) * _MEMORY_UNITS[match.group(2)])
+
+
+def _parse_cpuset(cpuset: str) -> set[int]:
+    cpus: set[int] = set()
+    for part in cpuset.split(","):
+        first, _, last = part.partition("-")
+        cpus.update(range(int(first), int(last or first) + 1))
+    return cpus
+
+
+def plan_worker_cpusets(
+    cpus: list[int],
+    memory_bytes: int,
+    sandbox_cpu: str,
+    sandbox_memory: str,
+    workers: int = 0,
+    fan_out: int = 1,
+) -> list[str]:
+    """One cpuset per render worker to start.
+
+    Each worker may run up to ``fan_out`` sandboxes at once. Without an explicit ``workers``
+    count, as many workers as both the cores (whole ``sandbox_cpu`` cores per sandbox) and
+    the memory (``sandbox_memory`` per sandbox) allow. Workers get disjoint cpusets; if an
+    explicit count does not fit, they are left unpinned.
+    """
+    fan_out = max(1, fan_out)
+    cores_per_worker = max(1, math.ceil(float(sandbox_cpu))) * fan_out
+    by_cpu = max(1, len(cpus) // cores_per_worker)
+    by_memory = max(1, memory_bytes // (parse_memory(sandbox_memory) * fan_out))
+    count = workers or min(by_cpu, by_memory)
+    if count * cores_per_worker > len(cpus):
+        logger.warning("%d render workers do not fit in %d cores; not pinning", count, len(cpus))
+        return [""] * count
+    return [
+        ",".join(
+            str(cpu) for cpu in cpus[index * cores_per_worker : (index + 1) * cores_per_worker]
+        )
+        for index in range(count)
+    ]
+
+
+def _cgroup_memory_limit() -> int | None:
+    for path in CGROUP_MEMORY_LIMITS:
+        try:
+            with open(path, encoding="utf-8") as fh:
+                value = fh.read().strip()
+        except OSError:
+            continue
+        # "max" (v2) or a huge page-aligned number (v1) means no limit.
+        return int(value) if value.isdigit() else None
+    return None
+
+
+def _host_memory_bytes() -> int:
+    """Physical memory, or the container's cgroup limit when that is lower."""
+    physical = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    limit = _cgroup_memory_limit()
+    return min(physical, limit) if limit else physical
+
+
+def _child_main(cpuset: str) -> None:
+    # Forked children inherit the supervisor's handlers; RQ installs its own.
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    if cpuset:
+        os.environ[CPUSET_ENV] = cpuset
+        get_settings.cache_clear()
+        if get_settings().render_mode != "docker":
+            # Local and pool renders run in this process tree, so pin it directly.
+            os.sched_setaffinity(0, _parse_cpuset(cpuset))
+    run_worker()
+
+
+class WorkerSupervisor:
+    """Runs one RQ render worker per cpuset, restarts crashed ones with exponential
+    backoff, and on SIGTERM/SIGINT lets them finish their current job before exiting.
+    """
+
+    def __init__(self, cpusets: list[str], drain_timeout_sec: float) -> None:
+        self.cpusets = cpusets
+        self.drain_timeout_sec = drain_timeout_sec
+        self._children: list[BaseProcess | None] = [None] * len(cpusets)
+        self._started_at = [0.0] * len(cpusets)
+        self._failures = [0] * len(cpusets)
+        self._restart_at = [0.0] * len(cpusets)
+        self._stopping = False
+        self._context = multiprocessing.get_context("fork")
+
+    def run(self) -> None:
+        signal.signal(signal.SIGTERM, self._request_stop)
+        signal.signal(signal.SIGINT, self._request_stop)
+        logger.info("Starting %d render workers (cpusets: %s)", len(self.cpusets), self.cpusets)
+        for slot in range(len(self.cpusets)):
+            self._start(slot)
+        while not self._stopping:
+            for slot in range(len(self.cpusets)):
+                self._check(slot)
+            time.sleep(POLL_INTERVAL_SEC)
+        self._drain()
+
+    def _start(self, slot: int) -> None:
+        process = self._context.Process(
+            target=_child_main, args=(self.cpusets[slot],), name=f"render-worker-{slot}"
+        )
+        process.start()
+        self._children[slot] = process
+        self._started_at[slot] = time.monotonic()
+
+    def _check(self, slot: int) -> None:
+        process = self._children[slot]
+        now = time.monotonic()
+        if process is not None:
+            if process.is_alive():
+                if now - self._started_at[slot] > HEALTHY_UPTIME_SEC:
+                    self._failures[slot] = 0
+                return
+            self._failures[slot] += 1
+            delay = min(RESTART_BACKOFF_MAX_SEC, 2.0 ** (self._failures[slot] - 1))
+            logger.warning(
+                "Render worker %d exited with %s; restarting in %.0fs",
+                slot,
+                process.exitcode,
+                delay,
+            )
+            self._children[slot] = None
+            self._restart_at[slot] = now + delay
+        if now >= self._restart_at[slot] and not self._stopping:
+            self._start(slot)
+
+    def _request_stop(self, signum: int, frame: object) -> None:
+        if self._stopping:
+            return
+        self._stopping = True
+        logger.info("Draining render workers")
+        for process in self._children:
+            if process is not None and process.is_alive():
+                # RQ treats SIGTERM as a warm shutdown: the current job finishes first.
+                os.kill(process.pid, signal.SIGTERM)
+
+    def _drain(self) -> None:
+        deadline = time.monotonic() + self.drain_timeout_sec
+        for process in self._children:
+            if process is not None:
+                process.join(max(0.0, deadline - time.monotonic()))
+        for process in self._children:
+            if process is not None and process.is_alive():
+                logger.warning("Render worker %s did not drain in time; killing it", process.name)
+                process.kill()
+                process.join()
+
+
+def run_supervisor() -> None:
+    settings = get_settings()
+    cpusets = plan_worker_cpusets(
+        cpus=sorted(os.sched_getaffinity(0)),
+        memory_bytes=_host_memory_bytes(),
+        sandbox_cpu=settings.sandbox_cpu,
+        sandbox_memory=settings.sandbox_memory,
+        workers=settings.render_workers,
+        # Sections and speculative fix candidates each render in a sandbox of their own,
+        # and every candidate may itself be split into sections.
+        fan_out=settings.render_section_parallelism * settings.render_fix_candidates,
+    )
+    # A progressive job renders twice; leave room for both passes plus storage.
+    WorkerSupervisor(cpusets, drain_timeout_sec=2 * settings.render_timeout_sec + 30).run()
+
+
+if __name__ == "__main__":
+    run_supervisor()
@@ -1,107 +1,526 @@
+import ast
 import logging
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from pathlib import Path
+from threading import Event
+
+from redis import Redis
+from rq import Queue
 
 from app.core.config import get_settings
-from app.domain.enums import JobStatus
+from app.domain.enums import ACTIVE_STATUSES, JobStatus
+from app.services.cache_service import CacheService, error_signature
 from app.services.code_validator import CodeValidator
 from app.services.job_service import JobService
 from app.services.llm_service import LLMService
+from app.services.render_cost import estimate_render_cost
 from app.services.render_orchestrator import RenderOrchestrator
-from app.services.render_types import RenderTimeoutError
+from app.services.render_types import RENDER_ERRORS, RenderResult, RenderTimeoutError
 from app.services.storage_service import StorageService
 
 logger = logging.getLogger(__name__)
 
+RENDER_TASK = "app.workers.tasks_render.process_render_job"
+PREVIEW_QUALITY = "480p15"
+PREVIEW_VARIANT = "preview"
+RENDER_QUEUE = "render"
+INTERACTIVE_RENDER_QUEUE = "render-interactive"
+SHORT_RENDER_QUEUE = "render-short"
+LONG_RENDER_QUEUE = "render-long"
+# Speculative repair: candidate i is requested at temperature 0.1 + i * step.
+FIX_TEMPERATURE_STEP = 0.3
+# Default worker priority: interactive qualities first, then batch jobs shortest bucket first.
+RENDER_QUEUES = (INTERACTIVE_RENDER_QUEUE, SHORT_RENDER_QUEUE, RENDER_QUEUE, LONG_RENDER_QUEUE)
 
-def process_render_job(job_id: str, code: str, quality: str, retry_on_error: bool = True) -> None:
-    validator = CodeValidator()
+
+def estimate_job_seconds(tree: ast.Module, quality: str, progressive: bool = False) -> int:
+    """Estimated render time of a whole job, including the preview pass if any."""
+    seconds = estimate_render_cost(tree, quality).render_sec
+    if progressive and quality != PREVIEW_QUALITY:
+        seconds += estimate_render_cost(tree, PREVIEW_QUALITY).render_sec
+    return seconds
+
+
+def _split_names(value: str) -> list[str]:
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+
+def render_queue_name(
+    quality: str, estimated_sec: int | None = None, progressive: bool = False
+) -> str:
+    """Queue for a job: interactive qualities get their own queue, batch jobs go by size
+    bucket, and batch jobs without an estimate go to the default queue.
+
+    A progressive job starts with its preview pass, so it goes to the interactive queue;
+    the full-quality pass is queued separately once the preview is stored.
+    """
+    settings = get_settings()
+    if progressive and quality != PREVIEW_QUALITY:
+        return INTERACTIVE_RENDER_QUEUE
+    if quality in _split_names(settings.render_interactive_qualities):
+        return INTERACTIVE_RENDER_QUEUE
+    if not settings.render_size_buckets or estimated_sec is None:
+        return RENDER_QUEUE
+    if estimated_sec <= settings.render_short_max_sec:
+        return SHORT_RENDER_QUEUE
+    if estimated_sec >= settings.render_long_min_sec:
+        return LONG_RENDER_QUEUE
+    return RENDER_QUEUE
+
+
+def worker_queue_names() -> list[str]:
+    """Queues a worker consumes, in priority order.
+
+    ``render_worker_queues`` names the worker's own queues (all of them by default). With
+    ``render_worker_steal`` the remaining render queues are appended after them, so an
+    idle worker picks up other tiers' jobs instead of waiting.
+    """
+    settings = get_settings()
+    names = _split_names(settings.render_worker_queues) or list(RENDER_QUEUES)
+    if settings.render_worker_steal:
+        names += [name for name in RENDER_QUEUES if name not in names]
+    return names
+
+
+def enqueue_render(
+    queue: Queue,
+    job_id: str,
+    code: str,
+    quality: str,
+    retry_on_error: bool,
+    progressive: bool = False,
+    preview_done: bool = False,
+) -> None:
+    # One pass per RQ job: a progressive job enqueues its full-quality pass separately.
+    queue.enqueue(
+        RENDER_TASK,
+        job_id,
+        code,
+        quality,
+        retry_on_error,
+        progressive,
+        preview_done,
+        job_timeout=get_settings().render_timeout_sec + 20,
+    )
+
+
+def share_finished_render(
+    job_service: JobService, storage: StorageService, source_job_id: str, job_id: str
+) -> bool:
+    """Complete ``job_id`` with a copy of ``source_job_id``'s video, if it has one."""
+    video_path = storage.clone(source_job_id, job_id)
+    if not video_path:
+        return False
+    job_service.transition_job(
+        job_id,
+        ACTIVE_STATUSES,
+        status=JobStatus.DONE.value,
+        stage="done",
+        progress=100,
+        video_path=video_path,
+        error=None,
+    )
+    return True
+
+
+def _hand_over(
+    job_service: JobService,
+    followers: list[str],
+    code: str,
+    quality: str,
+    retry_on_error: bool,
+    progressive: bool,
+) -> None:
+    # The oldest follower becomes the new leader; the rest now follow it.
+    successor, *rest = followers
+    job_service.transition_job(
+        successor,
+        ACTIVE_STATUSES,
+        status=JobStatus.QUEUED.value,
+        stage="queued",
+        progress=0,
+        error=None,
+        leader_job_id=None,
+    )
+    for follower_id in rest:
+        job_service.add_follower(successor, follower_id)
+        job_service.update_job(follower_id, leader_job_id=successor)
+
+    record = job_service.get_job_fields(successor, "render_hash", "estimated_render_sec") or {}
+    if record.get("render_hash"):
+        CacheService().set_render_job(record["render_hash"], successor)
+
+    logger.info("Render leader failed, %s takes over for %d follower(s)", successor, len(rest))
+    settings = get_settings()
+    if settings.use_queue:
+        queue = Queue(
+            render_queue_name(quality, record.get("estimated_render_sec"), progressive),
+            connection=Redis.from_url(settings.redis_url),
+        )
+        enqueue_render(queue, successor, code, quality, retry_on_error, progressive)
+    else:
+        process_render_job(successor, code, quality, retry_on_error, progressive)
+
+
+def process_render_job(
+    job_id: str,
+    code: str,
+    quality: str,
+    retry_on_error: bool = True,
+    progressive: bool = False,
+    preview_done: bool = False,
+) -> None:
+    """Render a job. ``preview_done`` marks the second RQ job of a queued progressive
+    render, which only runs the full-quality pass.
+    """
     job_service = JobService()
+    storage = StorageService()
+    two_pass = progressive and quality != PREVIEW_QUALITY
+
+    rendered_code: str | None = code
+    final_span = (50, 100) if two_pass else (0, 100)
+    if two_pass and not preview_done:
+        # A cheap low-res pass first: users get a preview early, and scenes that cannot
+        # render fail (and get fixed) before the expensive pass starts.
+        rendered_code = _render_with_retries(
+            job_service,
+            storage,
+            job_id,
+            code,
+            PREVIEW_QUALITY,
+            retry_on_error,
+            preview=True,
+            progress_span=(0, 50),
+        )
+        settings = get_settings()
+        if rendered_code is not None and settings.use_queue:
+            # The full-quality pass waits in its own tier, keeping interactive workers free.
+            record = job_service.get_job_fields(job_id, "estimated_render_sec") or {}
+            queue = Queue(
+                render_queue_name(quality, record.get("estimated_render_sec")),
+                connection=Redis.from_url(settings.redis_url),
+            )
+            enqueue_render(queue, job_id, rendered_code, quality, retry_on_error, progressive, True)
+            return
+    if rendered_code is not None:
+        rendered_code = _render_with_retries(
+            job_service,
+            storage,
+            job_id,
+            rendered_code,
+            quality,
+            retry_on_error,
+            progress_span=final_span,
+            # After a preview pass the code has already run once.
+            allow_preflight=not two_pass,
+        )
+
+    # Duplicate submissions attached while this job ran share its outcome.
+    followers = job_service.drain_followers(job_id)
+    if rendered_code is not None:
+        followers = [
+            follower_id
+            for follower_id in followers
+            if not share_finished_render(job_service, storage, job_id, follower_id)
+        ]
+    if followers:
+        _hand_over(job_service, followers, code, quality, retry_on_error, progressive)
+    if rendered_code is not None:
+        # Posters, previews and HLS only once the job and its followers are done, so they
+        # never hold up the result; their routes answer 404 until then.
+        storage.package_assets(job_id)
+
+
+def _render_with_retries(
+    job_service: JobService,
+    storage: StorageService,
+    job_id: str,
+    code: str,
+    quality: str,
+    retry_on_error: bool,
+    preview: bool = False,
+    progress_span: tuple[int, int] = (0, 100),
+    allow_preflight: bool = True,
+) -> str | None:
+    """Validate, render and store one pass, asking the LLM for fixes between attempts.
+
+    Returns the code that rendered, or None once the job has been marked failed or
+    timed out. With ``render_preflight`` on, each attempt first dry-runs the code so
+    runtime errors (and scenes too slow even to dry-run) reach the fix loop without a
+    full render. A preview pass stores its video as the ``preview`` variant and leaves
+    the job running with ``preview_ready`` set instead of marking it done.
+    """
+    start, end = progress_span
+
+    def scaled(progress: int) -> int:
+        return start + (end - start) * progress // 100
+
+    validator = CodeValidator()
     llm_service = LLMService()
+    cache = CacheService()
     render_orchestrator = RenderOrchestrator()
-    storage = StorageService()
     settings = get_settings()
 
     attempts = 1 + (settings.max_render_retries if retry_on_error else 0)
-    current_code = code
+    # A dry run only pays off ahead of a slower render of code that has not run yet.
+    preflight = (
+        allow_preflight and settings.render_preflight and not preview and quality != PREVIEW_QUALITY
+    )
+    # Usually one script; several speculative fixes after a failure in speculative mode.
+    candidates = [code]
 
     for attempt in range(1, attempts + 1):
-        job_service.update_job(
+        started = job_service.transition_job(
             job_id,
+            ACTIVE_STATUSES,
             status=JobStatus.VALIDATING.value,
             stage="validating",
-            progress=min(10 + (attempt - 1) * 10, 40),
+            progress=scaled(min(10 + (attempt - 1) * 10, 40)),
         )
-        validation = validator.validate(current_code)
-        if not validation.ok:
-            validation_error = f"Validation failed: {'; '.join(validation.errors)}"
+        if started is None:
+            # Finished elsewhere (e.g. a redelivered RQ job) or deleted; nothing left to do.
+            logger.info("Job %s is no longer active; skipping render", job_id)
+            return None
+        validations = [validator.validate(candidate) for candidate in candidates]
+        valid = [
+            candidate
+            for candidate, validation in zip(candidates, validations, strict=True)
+            if validation.ok
+        ]
+        if not valid:
+            validation_error = f"Validation failed: {'; '.join(validations[0].errors)}"
             if attempt < attempts:
-                job_service.update_job(
+                job_service.transition_job(
                     job_id,
+                    ACTIVE_STATUSES,
                     status=JobStatus.RETRYING.value,
                     stage="retrying_validation",
-                    progress=min(20 + attempt * 15, 80),
+                    progress=scaled(min(20 + attempt * 15, 80)),
                     error=validation_error,
                 )
-                fixed_code = llm_service.fix_code(current_code, validation_error)
-                current_code = fixed_code if fixed_code.strip() else current_code
+                candidates = _fix_candidates(
+                    llm_service,
+                    cache,
+                    validator,
+                    candidates[0],
+                    validation_error,
+                    settings.render_fix_candidates,
+                )
                 continue
 
-            job_service.update_job(
+            job_service.transition_job(
                 job_id,
+                ACTIVE_STATUSES,
                 status=JobStatus.FAILED.value,
                 stage="validation",
                 progress=100,
                 error=validation_error,
             )
-            return
+            return None
 
         try:
-            job_service.update_job(
+            if preflight:
+                job_service.transition_job(
+                    job_id,
+                    ACTIVE_STATUSES,
+                    status=JobStatus.RENDERING.value,
+                    stage="preflight",
+                    progress=scaled(min(15 + (attempt - 1) * 20, 75)),
+                    error=None,
+                )
+                valid = _preflight(render_orchestrator, job_id, valid)
+            job_service.transition_job(
                 job_id,
+                ACTIVE_STATUSES,
                 status=JobStatus.RENDERING.value,
                 stage="rendering",
-                progress=min(20 + (attempt - 1) * 20, 80),
+                progress=scaled(min(20 + (attempt - 1) * 20, 80)),
                 error=None,
             )
-            result = render_orchestrator.run(job_id=job_id, code=current_code, quality=quality)
-            video_path = storage.put(job_id, result.video_file)
+            current_code, result = _render_first(render_orchestrator, job_id, valid, quality)
+            variant = PREVIEW_VARIANT if preview else None
+            video_path = storage.put(job_id, result.video_file, variant=variant)
             tmp_video = Path(result.video_file)
             if tmp_video.exists():
                 tmp_video.unlink(missing_ok=True)
-            job_service.update_job(
+            if preview:
+                # Followers get their copy of the preview before the flag advertising it.
+                for follower_id in job_service.followers(job_id):
+                    storage.clone(job_id, follower_id, variant=PREVIEW_VARIANT)
+                job_service.transition_job(
+                    job_id,
+                    ACTIVE_STATUSES,
+                    stage="preview_ready",
+                    progress=end,
+                    error=None,
+                    preview_ready=True,
+                )
+                return current_code
+            job_service.transition_job(
                 job_id,
+                ACTIVE_STATUSES,
                 status=JobStatus.DONE.value,
                 stage="done",
                 progress=100,
                 video_path=video_path,
             )
-            return
+            return current_code
         except RenderTimeoutError as exc:
-            job_service.update_job(
+            job_service.transition_job(
                 job_id,
+                ACTIVE_STATUSES,
                 status=JobStatus.TIMEOUT.value,
                 stage="timeout",
                 progress=100,
                 error=str(exc),
             )
-            return
-        except Exception as exc:
+            return None
+        except RENDER_ERRORS as exc:
             if attempt < attempts:
-                job_service.update_job(
+                job_service.transition_job(
                     job_id,
+                    ACTIVE_STATUSES,
                     status=JobStatus.RETRYING.value,
                     stage="retrying_runtime",
-                    progress=min(40 + attempt * 20, 90),
+                    progress=scaled(min(40 + attempt * 20, 90)),
                     error=str(exc),
                 )
-                current_code = llm_service.fix_code(current_code, str(exc))
+                candidates = _fix_candidates(
+                    llm_service,
+                    cache,
+                    validator,
+                    valid[0],
+                    str(exc),
+                    settings.render_fix_candidates,
+                )
                 continue
 
-            job_service.update_job(
+            job_service.transition_job(
                 job_id,
+                ACTIVE_STATUSES,
                 status=JobStatus.FAILED.value,
                 stage="failed",
                 progress=100,
                 error=str(exc),
             )
-            return
+            return None
+
+
+def _fix_candidates(
+    llm_service: LLMService,
+    cache: CacheService,
+    validator: CodeValidator,
+    code: str,
+    error: str,
+    count: int,
+) -> list[str]:
+    """Repaired versions of ``code`` to try next, most conservative first.
+
+    A fix that validated before for the same code, error signature and model is reused
+    without an LLM call; new fixes are remembered only once one passes validation.
+    """
+    fix_hash = cache.hash_text(
+        f"fix:v2:{llm_service.provider}:{llm_service.model_name}:"
+        f"{cache.hash_text(code)}:{error_signature(error)}"
+    )
+    cached_fix = cache.get_fix(fix_hash)
+    if cached_fix:
+        return [cached_fix]
+
+    if count <= 1:
+        fixed_code = llm_service.fix_code(code, error)
+        fixes = [fixed_code if fixed_code.strip() else code]
+    else:
+        temperatures = [round(0.1 + index * FIX_TEMPERATURE_STEP, 2) for index in range(count)]
+        fixes = llm_service.fix_code_candidates(code, error, temperatures)
+    valid_fix = next((fix for fix in fixes if fix != code and validator.validate(fix).ok), None)
+    if valid_fix:
+        cache.set_fix(fix_hash, valid_fix)
+    return fixes
+
+
+def _dry_run(render_orchestrator: RenderOrchestrator, job_id: str, code: str) -> None:
+    try:
+        render_orchestrator.dry_run(job_id, code)
+    except RenderTimeoutError as exc:
+        # Not a job timeout: with animations skipped this is the script's own doing (an
+        # endless loop, heavy work in construct), so it goes to the fix loop.
+        raise RuntimeError(
+            "Pre-flight dry run timed out: construct() takes too long even with animations "
+            "skipped (endless loop or heavy computation?)"
+        ) from exc
+
+
+def _preflight(
+    render_orchestrator: RenderOrchestrator, job_id: str, candidates: list[str]
+) -> list[str]:
+    """Candidates whose dry run passes, in order; raises the first one's error if none do."""
+    if len(candidates) == 1:
+        _dry_run(render_orchestrator, job_id, candidates[0])
+        return candidates
+    with ThreadPoolExecutor(max_workers=len(candidates)) as executor:
+        futures = [
+            executor.submit(_dry_run, render_orchestrator, job_id, candidate)
+            for candidate in candidates
+        ]
+    passed = [
+        candidate
+        for candidate, future in zip(candidates, futures, strict=True)
+        if future.exception() is None
+    ]
+    if not passed:
+        raise futures[0].exception()
+    return passed
+
+
+def _discard_render(future: Future) -> None:
+    if not future.cancelled() and future.exception() is None:
+        Path(future.result().video_file).unlink(missing_ok=True)
+
+
+def _render_first(
+    render_orchestrator: RenderOrchestrator, job_id: str, candidates: list[str], quality: str
+) -> tuple[str, RenderResult]:
+    """Render candidates concurrently and return the first to succeed with its result.
+
+    Once one succeeds the others are killed; any that finished in the meantime have their
+    output discarded. If all fail, the first candidate's error is raised.
+    """
+    if len(candidates) == 1:
+        return candidates[0], render_orchestrator.run(
+            job_id=job_id, code=candidates[0], quality=quality
+        )
+
+    cancel = Event()
+    executor = ThreadPoolExecutor(max_workers=len(candidates))
+    futures = {
+        executor.submit(
+            render_orchestrator.run, job_id=job_id, code=candidate, quality=quality, cancel=cancel
+        ): candidate
+        for candidate in candidates
+    }
+    errors: dict[str, BaseException] = {}
+    winner: Future | None = None
+    try:
+        for future in as_completed(futures):
+            exc = future.exception()
+            if exc is None:
+                winner = future
+                break
+            errors[futures[future]] = exc
+    finally:
+        cancel.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    if winner is None:
+        raise errors[candidates[0]]
+    for future in futures:
+        if future is not winner:
+            future.add_done_callback(_discard_render)
+    logger.info(
+        "Fix candidate %d of %d rendered first for %s",
+        candidates.index(futures[winner]) + 1,
+        len(candidates),
+        job_id,
+    )
+    return futures[winner], winner.result()
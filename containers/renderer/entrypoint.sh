@@ -4,6 +4,7 @@ set -euo pipefail
 SCENE_FILE="${1:-scene.py}"
 SCENE_CLASS="${2:-GeneratedScene}"
 QUALITY="${3:-1080p30}"
+MODE="${4:-render}"
 
 QUALITY_FLAG="-qh"
 if [[ "$QUALITY" == "720p30" ]]; then
@@ -12,12 +13,32 @@ elif [[ "$QUALITY" == "480p15" ]]; then
   QUALITY_FLAG="-ql"
 fi
 
-manim "$QUALITY_FLAG" "/workspace/${SCENE_FILE}" "$SCENE_CLASS" --media_dir /tmp/manim -o output.mp4
+# When the worker mounts a partial movie dir, point Manim at it so animations already in
+# the shared cache are reused instead of re-rendered. The root filesystem is read-only,
+# so the config goes to the /tmp tmpfs.
+EXTRA_ARGS=()
+if [[ -d /partials ]]; then
+  cat > /tmp/partials.cfg <<CFG
+[CLI]
+partial_movie_dir = /partials
+max_files_cached = 1000000
+CFG
+  EXTRA_ARGS+=(--config_file /tmp/partials.cfg)
+fi
+
+# Pre-flight: run construct() with animations skipped and nothing written, only to surface
+# errors. A wrapper, because `manim --dry_run --save_last_frame` lets dry_run switch
+# save_last_frame (the part that skips animations) back off.
+if [[ "$MODE" == "dry_run" ]]; then
+  exec python /dry_run.py "/workspace/${SCENE_FILE}" "$SCENE_CLASS" "$QUALITY" /tmp/manim
+fi
+
+manim "$QUALITY_FLAG" "/workspace/${SCENE_FILE}" "$SCENE_CLASS" --media_dir /tmp/manim -o output.mp4 "${EXTRA_ARGS[@]}"
 
 OUTPUT_PATH="$(find /tmp/manim -name output.mp4 | head -n 1)"
 if [[ -z "$OUTPUT_PATH" ]]; then
   echo "output.mp4 not found"
-  exit 1
+  exit 3
 fi
 
 cp "$OUTPUT_PATH" /output/output.mp4